@@ -4,7 +4,7 @@ from app.database import engine, Base
 from app.routes import (
     customers, vehicles, appointments, services, 
     service_types, parts, loyalty, notifications, 
-    employees, dashboard, reports, auth, customer_dashboard, admin_customers, accountant, proformas
+    employees, dashboard, reports, auth, customer_dashboard, admin_customers, accountant, proformas, exports, branches, jobs
 )
 import os
 from dotenv import load_dotenv
@@ -54,6 +54,9 @@ app.include_router(customer_dashboard.router, prefix="/api/customer", tags=["Cus
 app.include_router(admin_customers.router, prefix="/api/admin/customers", tags=["Admin Customer Management"])
 app.include_router(accountant.router, prefix="/api/accountant", tags=["Accountant"])
 app.include_router(proformas.router, prefix="/api", tags=["Proformas"])
+app.include_router(exports.router, prefix="/api/admin/exports", tags=["Exports"])
+app.include_router(branches.router, prefix="/api/branches", tags=["Branches"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
 
 @app.get("/")
 async def root():
@@ -1,7 +1,7 @@
-from .customer import Customer
+from .customer import Customer, CustomerDataVersion, CustomerSummary
 from .vehicle import Vehicle
-from .service import Service, ServiceType, ServiceChecklist, Appointment, ServicePart
-from .part import PartInventory
+from .service import Service, ServiceType, ServiceChecklist, ChecklistPartMatch, Appointment, ServicePart, ServicePayment, DailyServiceRollup, ReportDateChange
+from .part import PartInventory, StockMovement
 from .loyalty import LoyaltyProgram, CustomerLoyalty, LoyaltyServiceHistory
 from .employee import Employee, UserAccount
 from .accountant import Accountant
@@ -9,16 +9,26 @@ from .notification import NotificationTemplate, Notification
 from .audit import AuditLog
 from .settings import SystemSetting
 from .proforma import Proforma, ProformaItem, MarketPrice
+from .export import ExportWatermark
+from .branch import Branch
+from .job import BackgroundJob
 
 __all__ = [
     "Customer",
+    "CustomerDataVersion",
+    "CustomerSummary",
     "Vehicle",
     "Service",
     "ServiceType",
     "ServiceChecklist",
+    "ChecklistPartMatch",
     "Appointment",
     "ServicePart",
+    "ServicePayment",
+    "DailyServiceRollup",
+    "ReportDateChange",
     "PartInventory",
+    "StockMovement",
     "LoyaltyProgram",
     "CustomerLoyalty",
     "LoyaltyServiceHistory",
@@ -32,6 +42,9 @@ __all__ = [
     "Proforma",
     "ProformaItem",
     "MarketPrice",
+    "ExportWatermark",
+    "Branch",
+    "BackgroundJob",
 ]
 
 
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+class Branch(Base):
+    __tablename__ = "branches"
+
+    # Canonical branch names (whitespace collapsed, upper case). Services keep
+    # the name in services.branch for display and reference it by branch_id.
+    branch_id = Column(Integer, primary_key=True, index=True)
+    branch_name = Column(String(100), unique=True, nullable=False)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+
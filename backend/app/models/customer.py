@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Date
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, DateTime, Date, Numeric, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -23,5 +23,33 @@ class Customer(Base):
     notifications = relationship("Notification", back_populates="customer")
     proformas = relationship("Proforma", back_populates="customer")  # No cascade - preserve proformas as business records
 
+class CustomerDataVersion(Base):
+    __tablename__ = "customer_data_versions"
 
+    # Bumped whenever a customer's vehicles, services, appointments or loyalty
+    # change; used as the ETag for the customer portal endpoints.
+    customer_id = Column(Integer, ForeignKey("customers.customer_id", ondelete="CASCADE"), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+class CustomerSummary(Base):
+    __tablename__ = "customer_summaries"
+
+    # Denormalized per-customer read model for the admin customer views. Kept in
+    # step with vehicles, services and loyalty by app/services/customer_summary.py
+    # inside the writing transaction; rebuild with scripts/rebuild_customer_summaries.py.
+    customer_id = Column(Integer, ForeignKey("customers.customer_id", ondelete="CASCADE"), primary_key=True)
+    vehicle_count = Column(Integer, nullable=False, default=0)
+    service_count = Column(Integer, nullable=False, default=0)
+    lifetime_paid = Column(Numeric(12, 2), nullable=False, default=0)
+    outstanding_amount = Column(Numeric(12, 2), nullable=False, default=0)
+    last_service_date = Column(Date, nullable=True)
+    next_service_due = Column(Date, nullable=True)
+    loyalty_id = Column(Integer, nullable=True)
+    loyalty_consecutive_count = Column(Integer, nullable=False, default=0)
+    loyalty_total_services = Column(Integer, nullable=False, default=0)
+    loyalty_free_services_earned = Column(Integer, nullable=False, default=0)
+    loyalty_free_services_used = Column(Integer, nullable=False, default=0)
+    loyalty_services_required = Column(Integer, nullable=True)
+    free_service_available = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+class ExportWatermark(Base):
+    __tablename__ = "export_watermarks"
+
+    # High-water mark of the last incremental bulk export of a table, per
+    # consumer (e.g. the CLI and the admin endpoint advance independently).
+    # Stored as text: an ISO timestamp or an integer id, depending on the table
+    # (see app/services/parquet_export.py for how it and snapshot are used).
+    consumer = Column(String(50), primary_key=True)
+    table_name = Column(String(50), primary_key=True)
+    watermark = Column(Text, nullable=False)
+    # txid_current_snapshot() of the last export; rows visible in it are skipped next time
+    snapshot = Column(Text, nullable=True)
+    row_count = Column(Integer, nullable=False, default=0)
+    exported_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+
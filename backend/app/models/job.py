@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.database import Base
+
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+
+    # Heavy reports and exports queued by the API and run by
+    # scripts/job_worker.py. Report jobs keep their payload in result; export
+    # jobs write a file under JOB_RESULT_DIR and keep its path.
+    job_id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), nullable=False)
+    params = Column(JSONB, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, succeeded, failed
+    progress = Column(Integer, nullable=False, default=0)  # percent
+    progress_message = Column(String(255), nullable=True)
+    result = Column(JSONB, nullable=True)
+    result_path = Column(Text, nullable=True)
+    result_media_type = Column(String(100), nullable=True)
+    result_filename = Column(String(255), nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    worker_id = Column(String(100), nullable=True)
+    created_by = Column(String(100), nullable=True)  # username of the requester
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -24,5 +24,18 @@ class PartInventory(Base):
     # Relationships
     service_parts = relationship("ServicePart", back_populates="part")
 
+class StockMovement(Base):
+    __tablename__ = "stock_movements"
 
+    # Append-only stock ledger: every change to parts_inventory.stock_quantity
+    # is recorded here with the resulting quantity.
+    movement_id = Column(Integer, primary_key=True, index=True)
+    part_id = Column(Integer, ForeignKey("parts_inventory.part_id"), nullable=False, index=True)
+    service_id = Column(Integer, ForeignKey("services.service_id", ondelete="SET NULL"), nullable=True, index=True)
+    movement_type = Column(String(20), nullable=False)  # SERVICE_USAGE, ADJUSTMENT
+    quantity_change = Column(Integer, nullable=False)  # Negative when stock leaves
+    quantity_after = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
+    # Relationships
+    part = relationship("PartInventory")
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, Numeric, Date, DateTime, Time, ForeignKey, Enum, CheckConstraint, Boolean, Computed
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Numeric, Date, DateTime, Time, ForeignKey, Enum, CheckConstraint, Boolean, Computed
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 import enum
 from app.database import Base
 
@@ -55,6 +55,14 @@ class ServiceChecklist(Base):
     service_type = relationship("ServiceType", back_populates="checklists")
     service_parts = relationship("ServicePart", back_populates="checklist_item")
 
+class ChecklistPartMatch(Base):
+    __tablename__ = "checklist_part_matches"
+
+    # Precomputed checklist item -> candidate part pairs (item name contained in
+    # part name or category). Maintained by app.services.checklist_matching.
+    checklist_id = Column(Integer, ForeignKey("service_checklists.checklist_id", ondelete="CASCADE"), primary_key=True)
+    part_id = Column(Integer, ForeignKey("parts_inventory.part_id", ondelete="CASCADE"), primary_key=True, index=True)
+
 class Appointment(Base):
     __tablename__ = "appointments"
 
@@ -98,6 +106,7 @@ class Service(Base):
     grand_total = Column(Numeric(10, 2), default=0.00)
     payment_status = Column(String(20), default="Pending")
     payment_method = Column(String(20), nullable=True)
+    amount_paid = Column(Numeric(10, 2), default=0.00)  # Running total of service_payments
     service_advisor_id = Column(Integer, ForeignKey("employees.employee_id"), nullable=True)
     mechanic_notes = Column(Text, nullable=True)
     customer_feedback = Column(Text, nullable=True)
@@ -106,14 +115,17 @@ class Service(Base):
     service_note = Column(Text, nullable=True)  # e.g., "1st Service completed"
     reference_number = Column(String(50), nullable=True, index=True)  # e.g., "0006601"
     branch = Column(String(100), nullable=True)  # e.g., "YEKA BRANCH"
+    branch_id = Column(Integer, ForeignKey("branches.branch_id"), nullable=True)  # Set from branch on flush
     serviced_by_name = Column(String(100), nullable=True)  # Mechanic name
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())  # Also set by trigger for raw SQL
     # Relationships
     appointment = relationship("Appointment", back_populates="service")
     vehicle = relationship("Vehicle", back_populates="services")
     service_type = relationship("ServiceType", back_populates="services")
     advisor = relationship("Employee", foreign_keys=[service_advisor_id])
     service_parts = relationship("ServicePart", back_populates="service", cascade="all, delete-orphan")
+    payments = relationship("ServicePayment", back_populates="service", order_by="ServicePayment.payment_id")
     loyalty_history = relationship("LoyaltyServiceHistory", back_populates="service")
 
 class ServicePart(Base):
@@ -135,5 +147,54 @@ class ServicePart(Base):
     part = relationship("PartInventory", back_populates="service_parts")
     checklist_item = relationship("ServiceChecklist", back_populates="service_parts")
 
+class ServicePayment(Base):
+    __tablename__ = "service_payments"
+
+    # Append-only payments ledger; corrections are negative entries.
+    # running_paid is the service's amount_paid after this entry.
+    payment_id = Column(Integer, primary_key=True, index=True)
+    service_id = Column(Integer, ForeignKey("services.service_id", ondelete="CASCADE"), nullable=False)
+    amount = Column(Numeric(10, 2), nullable=False)
+    payment_method = Column(String(20), nullable=True)
+    paid_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    running_paid = Column(Numeric(10, 2), nullable=False)
+    reference_number = Column(String(50), nullable=True)
+    notes = Column(Text, nullable=True)
+    recorded_by = Column(String(100), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    service = relationship("Service", back_populates="payments")
+
+class DailyServiceRollup(Base):
+    __tablename__ = "daily_service_rollup"
+
+    # Per-day service totals by branch, service type, payment status and
+    # payment method. Maintained incrementally by app.services.service_rollup;
+    # services with no branch are stored under branch_id 0 and those with no
+    # method under '' so the key stays unique.
+    service_date = Column(Date, primary_key=True)
+    branch_id = Column(Integer, primary_key=True, default=0)
+    service_type_id = Column(Integer, primary_key=True)
+    payment_status = Column(String(20), primary_key=True)
+    payment_method = Column(String(20), primary_key=True, default="")
+    service_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2), nullable=False, default=0)
+    labor_hours = Column(Numeric(12, 2), nullable=False, default=0)
+    labor_cost = Column(Numeric(14, 2), nullable=False, default=0)
+    parts_cost = Column(Numeric(14, 2), nullable=False, default=0)
+    tax_amount = Column(Numeric(14, 2), nullable=False, default=0)
+    discount_amount = Column(Numeric(14, 2), nullable=False, default=0)
+    amount_paid = Column(Numeric(14, 2), nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+class ReportDateChange(Base):
+    __tablename__ = "report_date_changes"
 
+    # Service dates written by each committed transaction, from any process.
+    # app.services.report_cache polls this to invalidate cached reports for
+    # writes it did not make itself; txid orders the rows by transaction.
+    change_id = Column(BigInteger, primary_key=True)
+    service_date = Column(Date, nullable=False)
+    txid = Column(BigInteger, nullable=False, server_default=text("txid_current()"), index=True)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
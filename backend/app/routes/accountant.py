@@ -1,14 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, select, tuple_
 from typing import List, Optional
-from datetime import date
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from app.database import get_db
-from app.models.service import Service
+import csv
+import io
+import json
+from app.database import get_db, SessionLocal
+from app.models.service import Service, ServiceType, DailyServiceRollup
 from app.models.vehicle import Vehicle
 from app.models.customer import Customer
 from app.auth import get_current_accountant
+from app.services.report_cache import cached_report
+from app.services.branches import rollup_branch_filter
+from app.services.jobs import enqueue_job, describe_job
+from app.services.payment_updates import bulk_update_payment_status, PAYMENT_STATUSES, PAYMENT_METHODS, MAX_BULK_UPDATES
+from app.services.payment_ledger import record_payment, change_payment_status, get_service_ledger, get_collections, PaymentError
+from app.services.statement_reconciliation import reconcile_statement, StatementError
+from app.services.receivables import receivables_aging, customer_receivables, AGING_BUCKETS
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -30,6 +41,21 @@ class PaymentUpdateRequest(BaseModel):
     payment_status: str
     payment_method: Optional[str] = None
 
+class LedgerPaymentRequest(BaseModel):
+    amount: Decimal
+    payment_method: Optional[str] = None
+    paid_at: Optional[datetime] = None
+    reference_number: Optional[str] = None
+    notes: Optional[str] = None
+
+class BulkPaymentUpdateItem(BaseModel):
+    service_id: int
+    payment_status: str
+    payment_method: Optional[str] = None
+
+class BulkPaymentUpdateRequest(BaseModel):
+    updates: List[BulkPaymentUpdateItem]
+
 @router.get("/pending-approval")
 def get_pending_accountants(
     db: Session = Depends(get_db)
@@ -52,42 +78,331 @@ def get_pending_accountants(
         ]
     }
 
+# Totals are estimated from the planner's row estimate; only when that is
+# below this are they counted exactly
+EXACT_COUNT_BELOW = 10000
+
+def _parse_cursor(cursor: str):
+    try:
+        cursor_date, cursor_id = cursor.split("_")
+        return date.fromisoformat(cursor_date), int(cursor_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _estimated_count(db: Session, stmt) -> tuple:
+    """
+    (total, is_exact) for stmt's rows: the planner's estimate from EXPLAIN,
+    replaced by an exact count when the estimate is small.
+    """
+    compiled = stmt.compile(dialect=db.get_bind().dialect)
+    plan = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+    if estimate >= EXACT_COUNT_BELOW:
+        return estimate, False
+    return db.execute(select(func.count()).select_from(stmt.subquery())).scalar(), True
+
 @router.get("/payments")
 def get_payments(
     payment_status: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 100,
+    branch_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     current_user = Depends(get_current_accountant),
     db: Session = Depends(get_db)
 ):
-    """Get all services with payment information"""
-    query = db.query(Service).join(Vehicle).join(Customer)
+    """
+    Get services with payment information, newest first. Pages are keyed on
+    (service_date, service_id): pass the previous page's next_cursor to get
+    the following page.
+    """
+    # Projection of exactly the response columns, joined in one query
+    stmt = select(
+        Service.service_id,
+        Service.service_date,
+        Customer.first_name,
+        Customer.last_name,
+        Customer.email,
+        Vehicle.make,
+        Vehicle.model,
+        Vehicle.license_plate,
+        ServiceType.type_name,
+        Service.grand_total,
+        Service.payment_status,
+        Service.payment_method,
+        Service.reference_number,
+        Service.created_at,
+    ).join(
+        Vehicle, Vehicle.vehicle_id == Service.vehicle_id
+    ).join(
+        Customer, Customer.customer_id == Vehicle.customer_id
+    ).outerjoin(
+        ServiceType, ServiceType.service_type_id == Service.service_type_id
+    )
     
     if payment_status:
-        query = query.filter(Service.payment_status == payment_status)
+        stmt = stmt.where(Service.payment_status == payment_status)
+    if branch_id is not None:
+        stmt = stmt.where(Service.branch_id == branch_id)
+    
+    # Total for the UI is computed on the first page only
+    total = None
+    total_is_exact = None
+    if not cursor:
+        total, total_is_exact = _estimated_count(db, stmt)
+    else:
+        stmt = stmt.where(tuple_(Service.service_date, Service.service_id) < _parse_cursor(cursor))
+    
+    rows = db.execute(
+        stmt.order_by(Service.service_date.desc(), Service.service_id.desc()).limit(limit)
+    ).all()
+    
+    result = [
+        {
+            "service_id": row.service_id,
+            "service_date": row.service_date,
+            "customer_name": f"{row.first_name} {row.last_name}",
+            "customer_email": row.email or "",
+            "vehicle_info": f"{row.make} {row.model} ({row.license_plate})",
+            "service_type": row.type_name or "",
+            "grand_total": float(row.grand_total),
+            "payment_status": row.payment_status,
+            "payment_method": row.payment_method,
+            "reference_number": row.reference_number,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+        }
+        for row in rows
+    ]
+    
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = f"{rows[-1].service_date.isoformat()}_{rows[-1].service_id}"
     
-    services = query.order_by(Service.service_date.desc()).offset(skip).limit(limit).all()
+    return {
+        "data": result,
+        "count": len(result),
+        "next_cursor": next_cursor,
+        "total": total,
+        "total_is_exact": total_is_exact,
+    }
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_BATCH_SIZE = 2000
+EXPORT_COLUMNS = [
+    "service_id",
+    "service_date",
+    "customer_name",
+    "customer_email",
+    "vehicle_info",
+    "service_type",
+    "branch",
+    "grand_total",
+    "payment_status",
+    "payment_method",
+    "reference_number",
+    "created_at",
+]
+
+def _export_statement(start_date, end_date, payment_status, branch_id=None):
+    stmt = select(
+        Service.service_id,
+        Service.service_date,
+        Customer.first_name,
+        Customer.last_name,
+        Customer.email,
+        Vehicle.make,
+        Vehicle.model,
+        Vehicle.license_plate,
+        ServiceType.type_name,
+        Service.branch,
+        Service.grand_total,
+        Service.payment_status,
+        Service.payment_method,
+        Service.reference_number,
+        Service.created_at,
+    ).join(
+        Vehicle, Vehicle.vehicle_id == Service.vehicle_id
+    ).join(
+        Customer, Customer.customer_id == Vehicle.customer_id
+    ).outerjoin(
+        ServiceType, ServiceType.service_type_id == Service.service_type_id
+    )
+    
+    if start_date:
+        stmt = stmt.where(Service.service_date >= start_date)
+    if end_date:
+        stmt = stmt.where(Service.service_date <= end_date)
+    if payment_status:
+        stmt = stmt.where(Service.payment_status == payment_status)
+    if branch_id is not None:
+        stmt = stmt.where(Service.branch_id == branch_id)
     
-    result = []
-    for service in services:
-        vehicle = service.vehicle
-        customer = vehicle.customer if vehicle else None
+    return stmt.order_by(Service.service_date, Service.service_id)
+
+def _export_record(row) -> dict:
+    return {
+        "service_id": row.service_id,
+        "service_date": row.service_date.isoformat(),
+        "customer_name": f"{row.first_name} {row.last_name}",
+        "customer_email": row.email,
+        "vehicle_info": f"{row.make} {row.model} ({row.license_plate})",
+        "service_type": row.type_name or "",
+        "branch": row.branch or "",
+        "grand_total": str(row.grand_total),
+        "payment_status": row.payment_status,
+        "payment_method": row.payment_method,
+        "reference_number": row.reference_number,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+def _stream_export(stmt, export_format: str):
+    """
+    Yield the export one batch at a time. Rows come from a server-side cursor
+    (yield_per), so memory stays constant however large the range is. Uses its
+    own session because the request's session is closed once the route returns.
+    """
+    db = SessionLocal()
+    try:
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+            writer.writeheader()
+            yield buffer.getvalue()
         
-        result.append({
-            "service_id": service.service_id,
-            "service_date": service.service_date,
-            "customer_name": f"{customer.first_name} {customer.last_name}" if customer else "Unknown",
-            "customer_email": customer.email if customer else "",
-            "vehicle_info": f"{vehicle.make} {vehicle.model} ({vehicle.license_plate})" if vehicle else "Unknown",
-            "service_type": service.service_type.type_name if service.service_type else "",
-            "grand_total": float(service.grand_total),
-            "payment_status": service.payment_status,
-            "payment_method": service.payment_method,
-            "reference_number": service.reference_number,
-            "created_at": service.created_at.isoformat() if service.created_at else None,
-        })
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for rows in result.partitions():
+            if export_format == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(_export_record(row) for row in rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(json.dumps(_export_record(row)) + "\n" for row in rows)
+    finally:
+        db.close()
+
+@router.get("/payments/export")
+def export_payments(
+    export_format: str = Query("csv", alias="format"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    payment_status: Optional[str] = None,
+    branch_id: Optional[int] = None,
+    current_user = Depends(get_current_accountant)
+):
+    """Stream services with payment information as CSV or NDJSON"""
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid format. Must be one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    
+    stmt = _export_statement(start_date, end_date, payment_status, branch_id)
+    filename = f"payments_{start_date or 'all'}_{end_date or 'all'}.{export_format}"
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    
+    return StreamingResponse(
+        _stream_export(stmt, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/payments/export/jobs", status_code=status.HTTP_202_ACCEPTED)
+def queue_payments_export(
+    export_format: str = Query("csv", alias="format"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    payment_status: Optional[str] = None,
+    branch_id: Optional[int] = None,
+    current_user = Depends(get_current_accountant),
+    db: Session = Depends(get_db)
+):
+    """
+    Build the payments export in the background. Returns a job to poll at
+    /api/jobs/{job_id}; the file is downloaded from /api/jobs/{job_id}/result.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid format. Must be one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    
+    job = enqueue_job(
+        db,
+        "payments_export",
+        {
+            "format": export_format,
+            "start_date": start_date,
+            "end_date": end_date,
+            "payment_status": payment_status,
+            "branch_id": branch_id,
+        },
+        created_by=current_user.username
+    )
+    return describe_job(job)
+
+@router.post("/payments/bulk")
+def bulk_update_payments(
+    request: BulkPaymentUpdateRequest,
+    current_user = Depends(get_current_accountant),
+    db: Session = Depends(get_db)
+):
+    """
+    Update the payment status (and optionally method) of many services in one
+    transaction. Invalid or unknown rows are reported per row; the rest are
+    applied.
+    """
+    if not request.updates:
+        raise HTTPException(status_code=400, detail="No updates given")
+    if len(request.updates) > MAX_BULK_UPDATES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_UPDATES} updates per request")
+    
+    results = bulk_update_payment_status(
+        db, [update.dict() for update in request.updates], recorded_by=current_user.username
+    )
+    db.commit()
+    
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    
+    return {
+        "message": f"Updated {counts.get('updated', 0)} of {len(results)} services",
+        "counts": counts,
+        "results": results
+    }
+
+@router.post("/payments/reconcile")
+def reconcile_payments(
+    file: UploadFile = File(...),
+    payment_method: str = Query("Bank Transfer"),
+    dry_run: bool = Query(False, description="Match only; record nothing"),
+    current_user = Depends(get_current_accountant),
+    db: Session = Depends(get_db)
+):
+    """
+    Reconcile a CSV bank / mobile-money statement: match each credit line to
+    an open service by reference, or by exact balance and date, and record
+    the matches as ledger payments in one transaction. Unmatched lines are
+    returned with the reason.
+    """
+    statement = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        result = reconcile_statement(
+            db,
+            statement,
+            payment_method=payment_method,
+            apply=not dry_run,
+            recorded_by=current_user.username
+        )
+    except (StatementError, UnicodeDecodeError) as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
     
-    return {"data": result, "count": len(result)}
+    return {
+        "message": f"Matched {result['matched_count']} of {result['line_count']} statement lines",
+        **result
+    }
 
 @router.put("/payments/{service_id}")
 def update_payment_status(
@@ -102,16 +417,25 @@ def update_payment_status(
         raise HTTPException(status_code=404, detail="Service not found")
     
     # Validate payment status
-    valid_statuses = ["Pending", "Partial", "Paid", "Free Service"]
-    if payment_update.payment_status not in valid_statuses:
+    if payment_update.payment_status not in PAYMENT_STATUSES:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid payment status. Must be one of: {', '.join(valid_statuses)}"
+            detail=f"Invalid payment status. Must be one of: {', '.join(PAYMENT_STATUSES)}"
+        )
+    if payment_update.payment_method and payment_update.payment_method not in PAYMENT_METHODS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid payment method. Must be one of: {', '.join(PAYMENT_METHODS)}"
         )
     
-    service.payment_status = payment_update.payment_status
-    if payment_update.payment_method:
-        service.payment_method = payment_update.payment_method
+    # Settling or reversing goes through the ledger, which derives the status
+    try:
+        change_payment_status(
+            db, service, payment_update.payment_status, payment_update.payment_method, current_user.username
+        )
+    except PaymentError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     
     db.commit()
     db.refresh(service)
@@ -123,30 +447,146 @@ def update_payment_status(
         "payment_method": service.payment_method
     }
 
+@router.get("/payments/{service_id}/ledger")
+def get_payment_ledger(
+    service_id: int,
+    current_user = Depends(get_current_accountant),
+    db: Session = Depends(get_db)
+):
+    """Get a service's payment ledger with running paid totals and balance"""
+    ledger = get_service_ledger(db, service_id)
+    if ledger is None:
+        raise HTTPException(status_code=404, detail="Service not found")
+    return ledger
+
+@router.post("/payments/{service_id}/ledger")
+def record_ledger_payment(
+    service_id: int,
+    payment: LedgerPaymentRequest,
+    current_user = Depends(get_current_accountant),
+    db: Session = Depends(get_db)
+):
+    """
+    Record a (partial) payment for a service; a negative amount reverses an
+    earlier one. The service's paid total and payment status follow.
+    """
+    try:
+        entry = record_payment(
+            db,
+            service_id,
+            payment.amount,
+            payment_method=payment.payment_method,
+            paid_at=payment.paid_at,
+            reference_number=payment.reference_number,
+            notes=payment.notes,
+            recorded_by=current_user.username
+        )
+    except PaymentError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    
+    return {
+        "message": "Payment recorded successfully",
+        "payment_id": entry.payment_id,
+        **get_service_ledger(db, service_id)
+    }
+
+@router.get("/collections")
+def get_collections_summary(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user = Depends(get_current_accountant),
+    db: Session = Depends(get_db)
+):
+    """Money received per day and payment method, by payment date (defaults to the last 30 days)"""
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=30)
+    return get_collections(db, start_date, end_date)
+
 @router.get("/payments/summary")
 def get_payment_summary(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    branch_id: Optional[int] = None,
     current_user = Depends(get_current_accountant),
     db: Session = Depends(get_db)
 ):
     """Get payment summary statistics"""
-    query = db.query(Service)
+    return cached_report(
+        "accountant/payments/summary",
+        {"start_date": start_date, "end_date": end_date, "branch_id": branch_id},
+        start_date, end_date,
+        lambda: _build_payment_summary(db, start_date, end_date, branch_id)
+    )
+
+def _build_payment_summary(
+    db: Session,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    branch_id: Optional[int] = None
+) -> dict:
+    # One aggregate over the daily rollup (not raw services), grouped by
+    # status and method; the handful of groups is folded in Python
+    query = db.query(
+        DailyServiceRollup.payment_status,
+        DailyServiceRollup.payment_method,
+        func.sum(DailyServiceRollup.service_count).label("service_count"),
+        func.sum(DailyServiceRollup.revenue).label("amount"),
+        func.sum(DailyServiceRollup.amount_paid).label("amount_paid"),
+    )
     
     if start_date:
-        query = query.filter(Service.service_date >= start_date)
+        query = query.filter(DailyServiceRollup.service_date >= start_date)
     if end_date:
-        query = query.filter(Service.service_date <= end_date)
+        query = query.filter(DailyServiceRollup.service_date <= end_date)
+    if branch_id is not None:
+        query = query.filter(rollup_branch_filter(branch_id))
+    
+    rows = query.group_by(
+        DailyServiceRollup.payment_status, DailyServiceRollup.payment_method
+    ).having(func.sum(DailyServiceRollup.service_count) != 0).all()
+    
+    by_status = {}
+    by_method = {}
+    for row in rows:
+        status_totals = by_status.setdefault(row.payment_status, {"count": 0, "amount": 0.0, "amount_paid": 0.0})
+        status_totals["count"] += int(row.service_count)
+        status_totals["amount"] += float(row.amount)
+        status_totals["amount_paid"] += float(row.amount_paid)
+        
+        method_totals = by_method.setdefault(row.payment_method, {
+            "payment_method": row.payment_method or None,
+            "service_count": 0,
+            "amount": 0.0,
+            "paid_amount": 0.0,
+            "partial_amount": 0.0,
+            "pending_amount": 0.0,
+        })
+        method_totals["service_count"] += int(row.service_count)
+        method_totals["amount"] += float(row.amount)
+        status_key = f"{row.payment_status.lower()}_amount"
+        if status_key in method_totals:
+            method_totals[status_key] += float(row.amount)
+    
+    def amount(status):
+        return by_status[status]["amount"] if status in by_status else 0.0
     
-    services = query.all()
+    def count(status):
+        return by_status[status]["count"] if status in by_status else 0
     
-    total_revenue = sum(float(s.grand_total) for s in services if s.payment_status == "Paid")
-    pending_amount = sum(float(s.grand_total) for s in services if s.payment_status == "Pending")
-    partial_amount = sum(float(s.grand_total) for s in services if s.payment_status == "Partial")
+    def paid(status):
+        return by_status[status]["amount_paid"] if status in by_status else 0.0
     
-    paid_count = len([s for s in services if s.payment_status == "Paid"])
-    pending_count = len([s for s in services if s.payment_status == "Pending"])
-    partial_count = len([s for s in services if s.payment_status == "Partial"])
+    total_revenue = amount("Paid")
+    pending_amount = amount("Pending")
+    partial_amount = amount("Partial")
+    
+    paid_count = count("Paid")
+    pending_count = count("Pending")
+    partial_count = count("Partial")
     
     return {
         "total_revenue": total_revenue,
@@ -155,6 +595,61 @@ def get_payment_summary(
         "paid_count": paid_count,
         "pending_count": pending_count,
         "partial_count": partial_count,
-        "total_services": len(services)
+        "total_services": sum(totals["count"] for totals in by_status.values()),
+        # From the payments ledger: money received, and what is still owed
+        "collected_amount": sum(totals["amount_paid"] for totals in by_status.values()),
+        "outstanding_amount": pending_amount + partial_amount - paid("Pending") - paid("Partial"),
+        "by_payment_method": sorted(by_method.values(), key=lambda totals: -totals["amount"])
     }
 
+@router.get("/receivables/aging")
+def get_receivables_aging(
+    as_of: Optional[date] = None,
+    branch_id: Optional[int] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    current_user = Depends(get_current_accountant),
+    db: Session = Depends(get_db)
+):
+    """
+    Outstanding (Pending/Partial) amounts aged 0-30, 31-60, 61-90 and 90+ days
+    by service date, in total and per customer (largest balance first).
+    """
+    return receivables_aging(db, as_of or date.today(), branch_id, skip=skip, limit=limit)
+
+@router.get("/receivables/aging/customers/{customer_id}")
+def get_customer_receivables(
+    customer_id: int,
+    as_of: Optional[date] = None,
+    bucket: Optional[str] = None,
+    branch_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    current_user = Depends(get_current_accountant),
+    db: Session = Depends(get_db)
+):
+    """
+    Drill down into one customer's outstanding services, oldest first,
+    optionally for one aging bucket. Pass next_cursor to get the next page.
+    """
+    if bucket and bucket not in AGING_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid bucket. Must be one of: {', '.join(AGING_BUCKETS)}"
+        )
+    
+    services = customer_receivables(
+        db,
+        customer_id,
+        as_of or date.today(),
+        bucket=bucket,
+        branch_id=branch_id,
+        cursor=_parse_cursor(cursor) if cursor else None,
+        limit=limit
+    )
+    
+    next_cursor = None
+    if len(services) == limit:
+        next_cursor = f"{services[-1]['service_date']}_{services[-1]['service_id']}"
+    
+    return {"data": services, "count": len(services), "next_cursor": next_cursor}
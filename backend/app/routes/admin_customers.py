@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy import and_, insert
 from typing import List
 from app.database import get_db
-from app.models.customer import Customer
+from app.models.customer import Customer, CustomerSummary
 from app.models.vehicle import Vehicle
 from app.models.service import Service, ServicePart
 from app.models.part import PartInventory
-from app.models.service import ServiceType, ServiceChecklist
+from app.models.service import ServiceType, ServiceChecklist, ChecklistPartMatch
 from app.models.loyalty import CustomerLoyalty, LoyaltyProgram
 from app.auth import get_current_admin
 from app.schemas.service import ServiceCreate
+from app.services.customer_summary import get_customer_summary
+from app.services.inventory import get_inspection_part_id, decrement_stock
 from decimal import Decimal
 from datetime import date, timedelta
 
@@ -21,37 +24,32 @@ def get_customer_full_details(
     current_user = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
-    """Get full customer details with vehicles and services (Admin only)"""
-    customer = db.query(Customer).filter(Customer.customer_id == customer_id).first()
-    if not customer:
+    """Get full customer details with vehicles, totals and loyalty (Admin only)"""
+    # Customer and its summary read model in one primary-key read
+    row = db.query(Customer, CustomerSummary).outerjoin(
+        CustomerSummary, CustomerSummary.customer_id == Customer.customer_id
+    ).filter(Customer.customer_id == customer_id).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Customer not found")
+    customer, summary = row
+    if summary is None:
+        summary = get_customer_summary(db, customer_id)
     
     # Get vehicles
     vehicles = db.query(Vehicle).filter(Vehicle.customer_id == customer_id).all()
     
-    # Get all services
-    vehicle_ids = [v.vehicle_id for v in vehicles]
-    services = db.query(Service).filter(Service.vehicle_id.in_(vehicle_ids)).all()
-    
-    # Calculate totals
-    total_payments = sum(float(s.grand_total) for s in services if s.payment_status == "Paid")
-    
-    # Get loyalty information
-    loyalty = db.query(CustomerLoyalty).filter(
-        CustomerLoyalty.customer_id == customer_id
-    ).join(LoyaltyProgram).filter(LoyaltyProgram.is_active == True).first()
-    
     loyalty_info = None
-    if loyalty:
+    if summary.loyalty_id is not None:
+        services_required = summary.loyalty_services_required or 3
         loyalty_info = {
-            "loyalty_id": loyalty.loyalty_id,
-            "consecutive_count": loyalty.consecutive_count or 0,
-            "total_services": loyalty.total_services or 0,
-            "free_services_earned": loyalty.free_services_earned or 0,
-            "free_services_used": loyalty.free_services_used or 0,
-            "free_service_available": loyalty.free_service_available == True,
-            "services_required": loyalty.program.services_required if loyalty.program else 3,
-            "services_needed": max(0, (loyalty.program.services_required if loyalty.program else 3) - (loyalty.consecutive_count or 0)),
+            "loyalty_id": summary.loyalty_id,
+            "consecutive_count": summary.loyalty_consecutive_count,
+            "total_services": summary.loyalty_total_services,
+            "free_services_earned": summary.loyalty_free_services_earned,
+            "free_services_used": summary.loyalty_free_services_used,
+            "free_service_available": summary.free_service_available == True,
+            "services_required": services_required,
+            "services_needed": max(0, services_required - summary.loyalty_consecutive_count),
         }
     
     return {
@@ -78,21 +76,51 @@ def get_customer_full_details(
             }
             for v in vehicles
         ],
-        "services": [
-            {
-                "service_id": s.service_id,
-                "service_date": s.service_date,
-                "service_type": s.service_type.type_name if s.service_type else "",
-                "grand_total": float(s.grand_total),
-                "payment_status": s.payment_status,
-            }
-            for s in services
-        ],
-        "total_payments": total_payments,
-        "total_services": len(services),
+        "total_payments": float(summary.lifetime_paid),
+        "total_services": summary.service_count,
+        "outstanding_amount": float(summary.outstanding_amount),
+        "last_service_date": summary.last_service_date,
+        "next_service_due": summary.next_service_due,
         "loyalty": loyalty_info,
     }
 
+@router.get("/{customer_id}/services")
+def get_customer_services(
+    customer_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    current_user = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get a page of a customer's services, newest first (Admin only)"""
+    # Service list as a flat projection (service type joined, no per-row lazy loads)
+    services = db.query(
+        Service.service_id,
+        Service.service_date,
+        Service.grand_total,
+        Service.payment_status,
+        ServiceType.type_name,
+    ).join(
+        Vehicle, Vehicle.vehicle_id == Service.vehicle_id
+    ).outerjoin(
+        ServiceType, ServiceType.service_type_id == Service.service_type_id
+    ).filter(
+        Vehicle.customer_id == customer_id
+    ).order_by(
+        Service.service_date.desc(), Service.service_id.desc()
+    ).offset(skip).limit(limit).all()
+    
+    return [
+        {
+            "service_id": s.service_id,
+            "service_date": s.service_date,
+            "service_type": s.type_name or "",
+            "grand_total": float(s.grand_total),
+            "payment_status": s.payment_status,
+        }
+        for s in services
+    ]
+
 @router.get("/{customer_id}/service/{service_id}")
 def get_service_details(
     customer_id: int,
@@ -247,88 +275,88 @@ def add_service_for_customer(
     db.add(db_service)
     db.flush()
     
-    # Get or create a special "Inspection" part for checklist items without parts
-    inspection_part = db.query(PartInventory).filter(
-        PartInventory.part_code == "INSPECTION"
-    ).first()
-    if not inspection_part:
-        # Create inspection part if it doesn't exist
-        inspection_part = PartInventory(
-            part_code="INSPECTION",
-            part_name="Inspection Service",
-            description="Generic inspection service for checklist items",
-            category="Other",
-            unit_price=Decimal("0.00"),
-            cost_price=Decimal("0.00"),
-            stock_quantity=999999,
-            min_stock_level=0,
-            is_active=True
-        )
-        db.add(inspection_part)
-        db.flush()
+    # Generic "Inspection" part for checklist items without parts (id cached per process)
+    inspection_part_id = get_inspection_part_id(db)
+    
+    # Fetch every referenced part in one query
+    requested_parts = service_data.parts or []
+    part_ids = {part_data.part_id for part_data in requested_parts}
+    parts_by_id = {}
+    if part_ids:
+        parts_by_id = {
+            part_id: unit_price
+            for part_id, unit_price in db.query(PartInventory.part_id, PartInventory.unit_price).filter(
+                PartInventory.part_id.in_(part_ids)
+            )
+        }
     
     # Track which checklist items have been handled through parts
     handled_checklist_items = set()
+    service_part_rows = []
+    stock_decrements = {}
     
     # Add parts (both replaced and non-replaced)
     total_parts_cost = Decimal("0.00")
-    if service_data.parts:
-        for part_data in service_data.parts:
-            part = db.query(PartInventory).filter(PartInventory.part_id == part_data.part_id).first()
-            if not part:
-                continue
-            
-            unit_price = Decimal(str(part.unit_price))
-            total_price = unit_price * Decimal(str(part_data.quantity))
-            
-            # Only add to cost if replaced
-            if part_data.was_replaced:
-                total_parts_cost += total_price
-            
-            service_part = ServicePart(
-                service_id=db_service.service_id,
-                part_id=part_data.part_id,
-                quantity=part_data.quantity,
-                unit_price=unit_price,
-                # total_price is a generated column, don't set it
-                was_replaced=part_data.was_replaced,
-                replacement_reason=part_data.replacement_reason if part_data.was_replaced else None,
-                checklist_item_id=part_data.checklist_item_id
-            )
-            db.add(service_part)
-            
-            # Track that this checklist item has been handled
-            if part_data.checklist_item_id:
-                handled_checklist_items.add(part_data.checklist_item_id)
-            
-            # Update inventory only if replaced
-            if part_data.was_replaced:
-                part.stock_quantity -= part_data.quantity
+    for part_data in requested_parts:
+        if part_data.part_id not in parts_by_id:
+            continue
+        
+        unit_price = Decimal(str(parts_by_id[part_data.part_id]))
+        total_price = unit_price * Decimal(str(part_data.quantity))
+        
+        # Only add to cost if replaced
+        if part_data.was_replaced:
+            total_parts_cost += total_price
+        
+        service_part_rows.append({
+            "service_id": db_service.service_id,
+            "part_id": part_data.part_id,
+            "quantity": part_data.quantity,
+            "unit_price": unit_price,
+            # total_price is a generated column, don't set it
+            "was_replaced": part_data.was_replaced,
+            "replacement_reason": part_data.replacement_reason if part_data.was_replaced else None,
+            "checklist_item_id": part_data.checklist_item_id,
+        })
+        
+        # Track that this checklist item has been handled
+        if part_data.checklist_item_id:
+            handled_checklist_items.add(part_data.checklist_item_id)
+        
+        # Update inventory only if replaced
+        if part_data.was_replaced:
+            stock_decrements[part_data.part_id] = stock_decrements.get(part_data.part_id, 0) + part_data.quantity
     
     # Handle checklist_status - create ServicePart entries for checked/changed items without parts
-    if service_data.checklist_status:
-        for checklist_status in service_data.checklist_status:
-            # Skip if already handled through parts
-            if checklist_status.checklist_item_id in handled_checklist_items:
-                continue
-            
-            # Only create entry if checked or changed
-            if checklist_status.checked or checklist_status.changed:
-                service_part = ServicePart(
-                    service_id=db_service.service_id,
-                    part_id=inspection_part.part_id,
-                    quantity=1,
-                    unit_price=Decimal("0.00"),
-                    # total_price is a generated column, don't set it
-                    was_replaced=checklist_status.changed,  # Changed = replaced, Checked = not replaced
-                    checklist_item_id=checklist_status.checklist_item_id
-                )
-                db.add(service_part)
+    for checklist_status in service_data.checklist_status or []:
+        # Skip if already handled through parts
+        if checklist_status.checklist_item_id in handled_checklist_items:
+            continue
+        
+        # Only create entry if checked or changed
+        if checklist_status.checked or checklist_status.changed:
+            service_part_rows.append({
+                "service_id": db_service.service_id,
+                "part_id": inspection_part_id,
+                "quantity": 1,
+                "unit_price": Decimal("0.00"),
+                "was_replaced": checklist_status.changed,  # Changed = replaced, Checked = not replaced
+                "replacement_reason": None,
+                "checklist_item_id": checklist_status.checklist_item_id,
+            })
+    
+    # Bulk insert service parts and apply stock changes in one statement each
+    if service_part_rows:
+        db.execute(insert(ServicePart), service_part_rows)
+    decrement_stock(db, stock_decrements, service_id=db_service.service_id)
     
     # Check loyalty and apply 4th service benefit (free labor, only material cost)
-    loyalty = db.query(CustomerLoyalty).filter(
-        CustomerLoyalty.customer_id == customer_id
-    ).join(LoyaltyProgram).filter(LoyaltyProgram.is_active == True).first()
+    loyalty = db.query(CustomerLoyalty).join(LoyaltyProgram).options(
+        contains_eager(CustomerLoyalty.program)
+    ).filter(
+        CustomerLoyalty.customer_id == customer_id,
+        LoyaltyProgram.is_active == True
+    ).first()
     
     # Get or create loyalty record
     if not loyalty:
@@ -336,7 +364,8 @@ def add_service_for_customer(
         if program:
             loyalty = CustomerLoyalty(
                 customer_id=customer_id,
-                program_id=program.program_id
+                program_id=program.program_id,
+                program=program
             )
             db.add(loyalty)
             db.flush()
@@ -401,39 +430,43 @@ def get_service_checklist(
     db: Session = Depends(get_db)
 ):
     """Get checklist items for a service type with available parts"""
-    checklist_items = db.query(ServiceChecklist).filter(
+    # Checklist items with their precomputed candidate parts in one indexed query
+    rows = db.query(ServiceChecklist, PartInventory).outerjoin(
+        ChecklistPartMatch, ChecklistPartMatch.checklist_id == ServiceChecklist.checklist_id
+    ).outerjoin(
+        PartInventory, and_(
+            PartInventory.part_id == ChecklistPartMatch.part_id,
+            PartInventory.is_active == True
+        )
+    ).filter(
         ServiceChecklist.service_type_id == service_type_id
-    ).order_by(ServiceChecklist.sort_order).all()
-    
-    # Get all parts for reference
-    all_parts = db.query(PartInventory).filter(PartInventory.is_active == True).all()
+    ).order_by(ServiceChecklist.sort_order, ServiceChecklist.checklist_id, PartInventory.part_id).all()
     
     result = []
-    for item in checklist_items:
-        # Find related parts (by name matching or category)
-        related_parts = [
-            {
+    items_by_id = {}
+    for item, p in rows:
+        entry = items_by_id.get(item.checklist_id)
+        if entry is None:
+            entry = {
+                "checklist_id": item.checklist_id,
+                "item_name": item.item_name,
+                "item_description": item.item_description,
+                "is_mandatory": item.is_mandatory,
+                "estimated_duration_minutes": item.estimated_duration_minutes,
+                "sort_order": item.sort_order,
+                "related_parts": [],
+            }
+            items_by_id[item.checklist_id] = entry
+            result.append(entry)
+        
+        if p is not None:
+            entry["related_parts"].append({
                 "part_id": p.part_id,
                 "part_code": p.part_code,
                 "part_name": p.part_name,
                 "category": p.category,
                 "unit_price": float(p.unit_price),
                 "stock_quantity": p.stock_quantity,
-            }
-            for p in all_parts
-            if item.item_name.lower() in p.part_name.lower() or 
-               (p.category and item.item_name.lower() in p.category.lower())
-        ]
-        
-        result.append({
-            "checklist_id": item.checklist_id,
-            "item_name": item.item_name,
-            "item_description": item.item_description,
-            "is_mandatory": item.is_mandatory,
-            "estimated_duration_minutes": item.estimated_duration_minutes,
-            "sort_order": item.sort_order,
-            "related_parts": related_parts,
-        })
+            })
     
     return result
-
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models.branch import Branch
+
+router = APIRouter()
+
+@router.get("/")
+def get_branches(db: Session = Depends(get_db)):
+    """List branches; pass branch_id to reports, dashboard and payments to filter by branch"""
+    branches = db.query(Branch).filter(Branch.is_active == True).order_by(Branch.branch_name).all()
+    return [
+        {"branch_id": b.branch_id, "branch_name": b.branch_name}
+        for b in branches
+    ]
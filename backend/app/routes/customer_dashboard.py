@@ -1,24 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session, joinedload, contains_eager
 from typing import List
 from app.database import get_db
-from app.auth import get_current_customer
+from app.auth import get_current_customer, get_current_admin
 from app.models.customer import Customer
 from app.models.vehicle import Vehicle
 from app.models.service import Service, ServicePart, ServiceChecklist, Appointment, ServiceType
 from app.models.part import PartInventory
+from app.models.loyalty import CustomerLoyalty, LoyaltyProgram
 from app.schemas.vehicle import VehicleCreate
+from app.services.customer_stats import get_vehicle_service_rollup
+from app.services.customer_versions import conditional_customer_response, get_conditional_stats
 from decimal import Decimal
+from datetime import date
 
 router = APIRouter()
 
-@router.get("/vehicles")
-def get_my_vehicles(
-    current_user = Depends(get_current_customer),
-    db: Session = Depends(get_db)
-):
-    """Get all vehicles for the logged-in customer (including those added by admin)"""
-    customer_id = current_user.customer_id
+def build_vehicles_payload(db: Session, customer_id: int) -> list:
+    """Vehicles payload for the customer portal"""
     vehicles = db.query(Vehicle).filter(Vehicle.customer_id == customer_id).order_by(Vehicle.created_at.desc()).all()
     
     return [
@@ -39,6 +38,19 @@ def get_my_vehicles(
         for v in vehicles
     ]
 
+@router.get("/vehicles")
+def get_my_vehicles(
+    request: Request,
+    current_user = Depends(get_current_customer),
+    db: Session = Depends(get_db)
+):
+    """Get all vehicles for the logged-in customer (including those added by admin)"""
+    customer_id = current_user.customer_id
+    return conditional_customer_response(
+        request, db, "vehicles", customer_id,
+        lambda: build_vehicles_payload(db, customer_id)
+    )
+
 @router.post("/vehicles", response_model=dict)
 def create_my_vehicle(
     vehicle_data: VehicleCreate,
@@ -91,38 +103,57 @@ def create_my_vehicle(
         "last_service_mileage": float(db_vehicle.last_service_mileage),
     }
 
-@router.get("/services")
-def get_my_services(
-    current_user = Depends(get_current_customer),
-    db: Session = Depends(get_db)
-):
-    """Get all services for the logged-in customer"""
-    customer_id = current_user.customer_id
-    
+def build_services_payload(db: Session, customer_id: int, vehicles: list = None, limit: int = None) -> list:
+    """
+    Services payload (with parts and checklist status) for the customer portal.
+    Pass vehicles to reuse an already loaded vehicle set and limit to return
+    only the most recent services.
+    """
     # Get all vehicles for this customer
-    vehicles = db.query(Vehicle).filter(Vehicle.customer_id == customer_id).all()
-    vehicle_ids = [v.vehicle_id for v in vehicles]
+    if vehicles is None:
+        vehicles = db.query(Vehicle).filter(Vehicle.customer_id == customer_id).all()
+    vehicles_by_id = {v.vehicle_id: v for v in vehicles}
+    if not vehicles_by_id:
+        return []
     
-    # Get all services for these vehicles
-    services = db.query(Service).filter(
-        Service.vehicle_id.in_(vehicle_ids)
-    ).order_by(Service.service_date.desc()).all()
+    # Get services for these vehicles, newest first
+    query = db.query(Service).options(joinedload(Service.service_type)).filter(
+        Service.vehicle_id.in_(vehicles_by_id.keys())
+    ).order_by(Service.service_date.desc(), Service.service_id.desc())
+    if limit:
+        query = query.limit(limit)
+    services = query.all()
+    if not services:
+        return []
+    
+    # Service parts with their part details for all listed services in one query
+    parts_by_service = {}
+    part_rows = db.query(ServicePart, PartInventory.part_name, PartInventory.part_code).outerjoin(
+        PartInventory, PartInventory.part_id == ServicePart.part_id
+    ).filter(
+        ServicePart.service_id.in_([s.service_id for s in services])
+    ).order_by(ServicePart.service_part_id).all()
+    for sp, part_name, part_code in part_rows:
+        parts_by_service.setdefault(sp.service_id, []).append((sp, part_name, part_code))
+    
+    # Checklist items for all involved service types in one query
+    checklists_by_type = {}
+    service_type_ids = {s.service_type_id for s in services if s.service_type_id}
+    if service_type_ids:
+        for item in db.query(ServiceChecklist).filter(
+            ServiceChecklist.service_type_id.in_(service_type_ids)
+        ).order_by(ServiceChecklist.sort_order).all():
+            checklists_by_type.setdefault(item.service_type_id, []).append(item)
     
     result = []
     for service in services:
-        # Get service parts
-        service_parts = db.query(ServicePart).filter(
-            ServicePart.service_id == service.service_id
-        ).all()
-        
         parts_list = []
         checklist_status = {}  # Track which checklist items were checked/changed
         
-        for sp in service_parts:
-            part = db.query(PartInventory).filter(PartInventory.part_id == sp.part_id).first()
+        for sp, part_name, part_code in parts_by_service.get(service.service_id, []):
             parts_list.append({
-                "part_name": part.part_name if part else "Unknown",
-                "part_code": part.part_code if part else "",
+                "part_name": part_name if part_name is not None else "Unknown",
+                "part_code": part_code if part_code is not None else "",
                 "quantity": sp.quantity,
                 "was_replaced": sp.was_replaced,
                 "unit_price": float(sp.unit_price),
@@ -139,23 +170,18 @@ def get_my_services(
         
         # Get all checklist items for this service type
         checklist_items = []
-        if service.service_type_id:
-            all_checklist = db.query(ServiceChecklist).filter(
-                ServiceChecklist.service_type_id == service.service_type_id
-            ).order_by(ServiceChecklist.sort_order).all()
-            
-            for item in all_checklist:
-                status = checklist_status.get(item.checklist_id, {"checked": False, "changed": False})
-                checklist_items.append({
-                    "checklist_id": item.checklist_id,
-                    "item_name": item.item_name,
-                    "item_description": item.item_description,
-                    "checked": status["checked"],
-                    "changed": status["changed"],
-                })
+        for item in checklists_by_type.get(service.service_type_id, []):
+            status = checklist_status.get(item.checklist_id, {"checked": False, "changed": False})
+            checklist_items.append({
+                "checklist_id": item.checklist_id,
+                "item_name": item.item_name,
+                "item_description": item.item_description,
+                "checked": status["checked"],
+                "changed": status["changed"],
+            })
         
         # Get vehicle info
-        vehicle = next((v for v in vehicles if v.vehicle_id == service.vehicle_id), None)
+        vehicle = vehicles_by_id.get(service.vehicle_id)
         
         result.append({
             "service_id": service.service_id,
@@ -188,27 +214,31 @@ def get_my_services(
     
     return result
 
-@router.get("/summary")
-def get_customer_summary(
+@router.get("/services")
+def get_my_services(
+    request: Request,
     current_user = Depends(get_current_customer),
     db: Session = Depends(get_db)
 ):
-    """Get customer summary: total payments, next service, etc."""
+    """Get all services for the logged-in customer"""
     customer_id = current_user.customer_id
-    
+    return conditional_customer_response(
+        request, db, "services", customer_id,
+        lambda: build_services_payload(db, customer_id)
+    )
+
+def build_summary_payload(db: Session, customer_id: int, vehicles: list = None) -> dict:
+    """Summary payload: total payments, next service, etc."""
     # Get customer info
     customer = db.query(Customer).filter(Customer.customer_id == customer_id).first()
     
-    # Get all vehicles
-    vehicles = db.query(Vehicle).filter(Vehicle.customer_id == customer_id).all()
-    vehicle_ids = [v.vehicle_id for v in vehicles]
-    
-    # Get all services
-    services = db.query(Service).filter(Service.vehicle_id.in_(vehicle_ids)).all()
+    # Vehicles with per-vehicle service count and paid total in one grouped query
+    if vehicles is None:
+        vehicles = get_vehicle_service_rollup(db, customer_id)
     
-    # Calculate totals
-    total_payments = sum(float(s.grand_total) for s in services if s.payment_status == "Paid")
-    total_services = len(services)
+    # Calculate totals from the per-vehicle aggregates
+    total_payments = float(sum(Decimal(str(v.paid_total)) for v in vehicles))
+    total_services = sum(v.service_count for v in vehicles)
     
     # Get next service dates
     next_services = []
@@ -235,31 +265,55 @@ def get_customer_summary(
         "next_services": next_services,
     }
 
-@router.get("/appointments")
-def get_my_appointments(
+@router.get("/summary")
+def get_customer_summary(
+    request: Request,
     current_user = Depends(get_current_customer),
     db: Session = Depends(get_db)
 ):
-    """Get all appointments for the logged-in customer's vehicles"""
+    """Get customer summary: total payments, next service, etc."""
     customer_id = current_user.customer_id
-    
+    return conditional_customer_response(
+        request, db, "summary", customer_id,
+        lambda: build_summary_payload(db, customer_id)
+    )
+
+def build_appointments_payload(
+    db: Session,
+    customer_id: int,
+    vehicles: list = None,
+    upcoming_only: bool = False,
+    limit: int = None
+) -> list:
+    """Appointments payload for the customer's vehicles"""
     # Get all vehicles for this customer
-    vehicles = db.query(Vehicle).filter(Vehicle.customer_id == customer_id).all()
-    vehicle_ids = [v.vehicle_id for v in vehicles]
+    if vehicles is None:
+        vehicles = db.query(Vehicle).filter(Vehicle.customer_id == customer_id).all()
+    vehicles_by_id = {v.vehicle_id: v for v in vehicles}
     
-    if not vehicle_ids:
+    if not vehicles_by_id:
         return []
     
-    # Get all appointments for these vehicles, eagerly loading relationships
-    appointments = db.query(Appointment).options(
-        joinedload(Appointment.vehicle),
+    # Get appointments for these vehicles, eagerly loading the service type
+    query = db.query(Appointment).options(
         joinedload(Appointment.service_type)
     ).filter(
-        Appointment.vehicle_id.in_(vehicle_ids)
-    ).order_by(Appointment.scheduled_date.desc(), Appointment.scheduled_time).all()
+        Appointment.vehicle_id.in_(vehicles_by_id.keys())
+    )
+    if upcoming_only:
+        query = query.filter(
+            Appointment.scheduled_date >= date.today(),
+            Appointment.status.in_(["Scheduled", "In Progress"])
+        ).order_by(Appointment.scheduled_date, Appointment.scheduled_time)
+    else:
+        query = query.order_by(Appointment.scheduled_date.desc(), Appointment.scheduled_time)
+    if limit:
+        query = query.limit(limit)
+    appointments = query.all()
     
     result = []
     for apt in appointments:
+        vehicle = vehicles_by_id.get(apt.vehicle_id)
         result.append({
             "appointment_id": apt.appointment_id,
             "vehicle_id": apt.vehicle_id,
@@ -275,12 +329,12 @@ def get_my_appointments(
             "created_at": apt.created_at,
             "updated_at": apt.updated_at,
             "vehicle": {
-                "vehicle_id": apt.vehicle.vehicle_id,
-                "license_plate": apt.vehicle.license_plate,
-                "make": apt.vehicle.make,
-                "model": apt.vehicle.model,
-                "year": apt.vehicle.year,
-            } if apt.vehicle else None,
+                "vehicle_id": vehicle.vehicle_id,
+                "license_plate": vehicle.license_plate,
+                "make": vehicle.make,
+                "model": vehicle.model,
+                "year": vehicle.year,
+            } if vehicle else None,
             "service_type": {
                 "service_type_id": apt.service_type.service_type_id,
                 "type_name": apt.service_type.type_name,
@@ -288,3 +342,112 @@ def get_my_appointments(
         })
     return result
 
+def build_loyalty_payload(db: Session, customer_id: int) -> dict:
+    """Read-only loyalty progress for the customer (None without an active program)"""
+    loyalty = db.query(CustomerLoyalty).join(LoyaltyProgram).options(
+        contains_eager(CustomerLoyalty.program)
+    ).filter(
+        CustomerLoyalty.customer_id == customer_id,
+        LoyaltyProgram.is_active == True
+    ).first()
+    
+    if loyalty:
+        program = loyalty.program
+    else:
+        program = db.query(LoyaltyProgram).filter(LoyaltyProgram.is_active == True).first()
+        if not program:
+            return None
+    
+    consecutive_count = (loyalty.consecutive_count or 0) if loyalty else 0
+    services_required = program.services_required or 3
+    free_service_available = bool(loyalty and loyalty.free_service_available == True)
+    free_service_expiry = loyalty.free_service_expiry if loyalty else None
+    eligible = free_service_available and (free_service_expiry is None or free_service_expiry >= date.today())
+    
+    return {
+        "program_name": program.program_name,
+        "consecutive_count": consecutive_count,
+        "services_required": services_required,
+        "services_needed": max(0, services_required - consecutive_count),
+        "free_service_available": free_service_available,
+        "free_service_expiry": free_service_expiry,
+        "free_services_earned": (loyalty.free_services_earned or 0) if loyalty else 0,
+        "eligibility_status": "ELIGIBLE" if eligible else "NOT_ELIGIBLE",
+    }
+
+HOME_UPCOMING_APPOINTMENTS = 5
+
+def build_home_payload(db: Session, customer_id: int, recent_services: int) -> dict:
+    """
+    Everything the customer dashboard needs for first paint. The vehicle set
+    (with per-vehicle service aggregates) is loaded once and shared by the
+    sections, which are built one after another on the request session, so
+    they read the same snapshot the ETag version describes.
+
+    The sections are deliberately not loaded concurrently: that would need a
+    session (and pooled connection) per section, each reading its own
+    snapshot, so a write landing mid-request could pair a new service list
+    with an old summary under one ETag. Each section is a customer-bounded
+    indexed read, so running them in parallel saves little.
+    """
+    vehicles = get_vehicle_service_rollup(db, customer_id)
+    
+    summary = build_summary_payload(db, customer_id, vehicles=vehicles)
+    
+    return {
+        "summary": summary,
+        "vehicles": [
+            {
+                "vehicle_id": v.vehicle_id,
+                "license_plate": v.license_plate,
+                "make": v.make,
+                "model": v.model,
+                "year": v.year,
+                "current_mileage": float(v.current_mileage),
+                "next_service_mileage": float(v.next_service_mileage),
+                "service_count": v.service_count,
+            }
+            for v in vehicles
+        ],
+        "recent_services": build_services_payload(
+            db, customer_id, vehicles=vehicles, limit=recent_services
+        ) if vehicles else [],
+        "upcoming_appointments": build_appointments_payload(
+            db, customer_id, vehicles=vehicles, upcoming_only=True, limit=HOME_UPCOMING_APPOINTMENTS
+        ) if vehicles else [],
+        "loyalty": build_loyalty_payload(db, customer_id),
+    }
+
+@router.get("/home")
+def get_customer_home(
+    request: Request,
+    recent_services: int = Query(5, ge=1, le=50),
+    current_user = Depends(get_current_customer),
+    db: Session = Depends(get_db)
+):
+    """Composite dashboard payload (summary, vehicles, recent services, upcoming appointments, loyalty) in one round trip"""
+    customer_id = current_user.customer_id
+    return conditional_customer_response(
+        request, db, f"home-{recent_services}", customer_id,
+        lambda: build_home_payload(db, customer_id, recent_services)
+    )
+
+@router.get("/appointments")
+def get_my_appointments(
+    request: Request,
+    current_user = Depends(get_current_customer),
+    db: Session = Depends(get_db)
+):
+    """Get all appointments for the logged-in customer's vehicles"""
+    customer_id = current_user.customer_id
+    return conditional_customer_response(
+        request, db, "appointments", customer_id,
+        lambda: build_appointments_payload(db, customer_id)
+    )
+
+@router.get("/conditional-stats")
+def get_customer_conditional_stats(
+    current_user = Depends(get_current_admin)
+):
+    """Conditional GET (ETag/304) statistics for the customer portal endpoints (Admin only)"""
+    return get_conditional_stats()
@@ -2,19 +2,30 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import date
+from typing import Optional
 from app.database import get_db
 from app.models.service import Appointment
-from app.models.service import Service
+from app.models.service import Service, DailyServiceRollup
 from app.models.vehicle import Vehicle
 from app.models.part import PartInventory
 from app.models.notification import Notification
+from app.services.report_cache import cached_report
+from app.services.branches import rollup_branch_filter
 
 router = APIRouter()
 
 @router.get("/")
-def get_dashboard_stats(db: Session = Depends(get_db)):
+def get_dashboard_stats(branch_id: Optional[int] = None, db: Session = Depends(get_db)):
     today = date.today()
-    
+    return cached_report(
+        "dashboard", {"today": today, "branch_id": branch_id}, today, today,
+        lambda: _build_dashboard_stats(db, today, branch_id)
+    )
+
+def _build_dashboard_stats(db: Session, today: date, branch_id: Optional[int] = None) -> dict:
+    # Appointments, notifications and stock are shared across branches;
+    # revenue and customers served follow branch_id when given
+
     # Today's appointments
     today_appointments = db.query(Appointment).filter(
         Appointment.scheduled_date == today
@@ -25,15 +36,21 @@ def get_dashboard_stats(db: Session = Depends(get_db)):
         Appointment.status == "Completed"
     ).count()
     
-    # Today's revenue
-    today_revenue = db.query(func.sum(Service.grand_total)).filter(
-        Service.service_date == today
-    ).scalar() or 0
+    # Today's revenue (from the daily rollup)
+    revenue_query = db.query(func.sum(DailyServiceRollup.revenue)).filter(
+        DailyServiceRollup.service_date == today
+    )
+    if branch_id is not None:
+        revenue_query = revenue_query.filter(rollup_branch_filter(branch_id))
+    today_revenue = revenue_query.scalar() or 0
     
     # Customers served today
-    customers_served = db.query(func.count(func.distinct(Vehicle.customer_id))).join(Service).filter(
+    served_query = db.query(func.count(func.distinct(Vehicle.customer_id))).join(Service).filter(
         Service.service_date == today
-    ).scalar() or 0
+    )
+    if branch_id is not None:
+        served_query = served_query.filter(Service.branch_id == branch_id)
+    customers_served = served_query.scalar() or 0
     
     # Notifications sent today
     notifications_sent = db.query(Notification).filter(
@@ -0,0 +1,91 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+from sqlalchemy.orm import Session
+from typing import Optional
+import os
+import tempfile
+import pyarrow.parquet as pq
+from app.database import get_db
+from app.auth import get_current_admin
+from app.services.parquet_export import export_table, ExportError, EXPORT_TABLES, arrow_schema
+from app.services.jobs import enqueue_job, describe_job
+
+router = APIRouter()
+
+@router.get("/tables")
+def get_export_tables(current_user = Depends(get_current_admin)):
+    """List tables available for bulk Parquet export (Admin only)"""
+    return {
+        "tables": [
+            {"table": name, "watermark_column": column.key}
+            for name, (_, column) in EXPORT_TABLES.items()
+        ]
+    }
+
+@router.get("/{table_name}.parquet")
+def export_table_parquet(
+    table_name: str,
+    since: Optional[str] = None,
+    consumer: Optional[str] = None,
+    current_user = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Download a table as Parquet (Admin only). Pass since= (the
+    X-Export-Watermark of the previous download) for an incremental export,
+    or consumer= to have the server keep and advance the watermark.
+    """
+    fd, path = tempfile.mkstemp(suffix=".parquet")
+    os.close(fd)
+    try:
+        result = export_table(db, table_name, path, consumer=consumer, since=since)
+        if not result["rows"]:
+            # Nothing new: still return a valid (empty) file with the schema
+            model, _ = EXPORT_TABLES[table_name]
+            pq.write_table(arrow_schema(model.__table__).empty_table(), path)
+        db.commit()
+    except ExportError as e:
+        os.remove(path)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        os.remove(path)
+        raise
+    
+    headers = {"X-Export-Rows": str(result["rows"])}
+    if result["watermark_to"] is not None:
+        headers["X-Export-Watermark"] = result["watermark_to"]
+    
+    return FileResponse(
+        path,
+        media_type="application/vnd.apache.parquet",
+        filename=f"{table_name}.parquet",
+        headers=headers,
+        background=BackgroundTask(os.remove, path)
+    )
+
+@router.post("/{table_name}/jobs", status_code=status.HTTP_202_ACCEPTED)
+def queue_table_export(
+    table_name: str,
+    since: Optional[str] = None,
+    consumer: Optional[str] = None,
+    current_user = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Export a table to Parquet in the background (Admin only). Returns a job to
+    poll at /api/jobs/{job_id}; the file is downloaded from its result.
+    """
+    if table_name not in EXPORT_TABLES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown table: {table_name}. Must be one of: {', '.join(EXPORT_TABLES)}"
+        )
+    
+    job = enqueue_job(
+        db,
+        "parquet_export",
+        {"table_name": table_name, "since": since, "consumer": consumer},
+        created_by=current_user.username
+    )
+    return describe_job(job)
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+import os
+from app.database import get_db
+from app.models.job import BackgroundJob
+from app.auth import get_current_user
+from app.services.jobs import describe_job
+
+router = APIRouter()
+
+def _get_job(db: Session, job_id: int, current_user) -> BackgroundJob:
+    job = db.get(BackgroundJob, job_id)
+    # Jobs are private to whoever queued them; admins can see all
+    if not job or (job.created_by != current_user.username and current_user.role != "Admin"):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/")
+def get_my_jobs(
+    limit: int = 50,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List the current user's most recent jobs"""
+    jobs = db.query(BackgroundJob).filter(
+        BackgroundJob.created_by == current_user.username
+    ).order_by(BackgroundJob.created_at.desc()).limit(min(limit, 200)).all()
+    return [describe_job(job) for job in jobs]
+
+@router.get("/{job_id}")
+def get_job_status(
+    job_id: int,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Poll a job's status and progress"""
+    return describe_job(_get_job(db, job_id, current_user))
+
+@router.get("/{job_id}/result")
+def get_job_result(
+    job_id: int,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Download a finished job's result: the file for exports, JSON for reports"""
+    job = _get_job(db, job_id, current_user)
+    if job.status == "failed":
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status} ({job.progress}%)")
+    
+    if job.result_path:
+        if not os.path.exists(job.result_path):
+            raise HTTPException(status_code=410, detail="Job result file has expired")
+        return FileResponse(job.result_path, media_type=job.result_media_type, filename=job.result_filename)
+    return job.result
@@ -4,6 +4,8 @@ from typing import List
 from app.database import get_db
 from app.models.part import PartInventory
 from app.schemas.part import PartCreate, PartUpdate, PartResponse
+from app.services.checklist_matching import refresh_part_matches
+from app.services.inventory import record_stock_adjustment
 
 router = APIRouter()
 
@@ -16,6 +18,8 @@ def create_part(part: PartCreate, db: Session = Depends(get_db)):
     
     db_part = PartInventory(**part.dict())
     db.add(db_part)
+    db.flush()
+    refresh_part_matches(db, db_part.part_id)
     db.commit()
     db.refresh(db_part)
     return db_part
@@ -77,10 +81,20 @@ def update_part(
     if not part:
         raise HTTPException(status_code=404, detail="Part not found")
     
+    quantity_before = part.stock_quantity
     update_data = part_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(part, field, value)
     
+    # Manual stock edits go through the stock ledger
+    if "stock_quantity" in update_data:
+        record_stock_adjustment(db, part, quantity_before)
+    
+    # Name/category drive checklist matching
+    if "part_name" in update_data or "category" in update_data:
+        db.flush()
+        refresh_part_matches(db, part.part_id)
+    
     db.commit()
     db.refresh(part)
     return part
@@ -1,112 +1,336 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, or_, select, true
 from datetime import date, timedelta
+from typing import List, Optional
 from app.database import get_db
 from app.models.service import Service
 from app.models.vehicle import Vehicle
 from app.models.customer import Customer
-from app.models.service import Appointment
+from app.models.service import Appointment, ServiceType
+from app.services.grouped_reports import run_grouped_report, ReportError, DIMENSIONS, DIMENSION_ALIASES, METRICS
+from app.services.revenue_analytics import compute_revenue_trends, MAX_RANGE_DAYS, YEAR_LAG_DAYS
+from app.services.report_cache import cached_report, get_report_cache_stats
+from app.services.jobs import enqueue_job, describe_job
+from app.auth import get_current_admin, get_current_user
 
 router = APIRouter()
 
+def _service_totals(db: Session, start_date: date, end_date: date, branch_id: Optional[int] = None):
+    """
+    Aggregate the services in [start_date, end_date) in one query. The
+    half-open range on service_date can use idx_service_date (or
+    idx_services_branch_date for one branch); sums stay NUMERIC (Decimal)
+    until the response is built.
+    """
+    query = db.query(
+        func.count(Service.service_id).label("total_services"),
+        func.count(func.distinct(Vehicle.customer_id)).label("unique_customers"),
+        func.coalesce(func.sum(Service.grand_total), 0).label("total_revenue"),
+        func.coalesce(func.sum(Service.total_labor_hours), 0).label("total_labor_hours"),
+        func.coalesce(func.sum(Service.total_labor_cost), 0).label("labor_revenue"),
+        func.coalesce(func.sum(Service.total_parts_cost), 0).label("parts_revenue"),
+        func.coalesce(func.sum(Service.tax_amount), 0).label("tax_collected"),
+        func.coalesce(func.sum(Service.discount_amount), 0).label("discounts_given"),
+        func.coalesce(func.round(func.avg(Service.grand_total), 2), 0).label("avg_ticket_size"),
+    ).join(
+        Vehicle, Vehicle.vehicle_id == Service.vehicle_id
+    ).filter(
+        Service.service_date >= start_date,
+        Service.service_date < end_date
+    )
+    if branch_id is not None:
+        query = query.filter(Service.branch_id == branch_id)
+    return query.one()
+
 @router.get("/daily")
-def get_daily_report(report_date: date = None, db: Session = Depends(get_db)):
+def get_daily_report(report_date: date = None, branch_id: Optional[int] = None, db: Session = Depends(get_db)):
     if not report_date:
         report_date = date.today()
     
-    services = db.query(Service).filter(Service.service_date == report_date).all()
-    
-    total_services = len(services)
-    total_revenue = sum(float(s.grand_total) for s in services)
-    total_labor_hours = sum(float(s.total_labor_hours) for s in services)
-    total_parts_cost = sum(float(s.total_parts_cost) for s in services)
-    total_discounts = sum(float(s.discount_amount) for s in services)
-    unique_customers = len(set(s.vehicle.customer_id for s in services))
+    return cached_report(
+        "reports/daily", {"report_date": report_date, "branch_id": branch_id}, report_date, report_date,
+        lambda: _build_daily_report(db, report_date, branch_id)
+    )
+
+def _build_daily_report(db: Session, report_date: date, branch_id: Optional[int]) -> dict:
+    totals = _service_totals(db, report_date, report_date + timedelta(days=1), branch_id)
     
     return {
         "service_day": str(report_date),
-        "total_services": total_services,
-        "unique_customers": unique_customers,
-        "total_revenue": total_revenue,
-        "avg_service_cost": total_revenue / total_services if total_services > 0 else 0,
-        "total_labor_hours": total_labor_hours,
-        "total_parts_revenue": total_parts_cost,
-        "total_discounts": total_discounts
+        "total_services": totals.total_services,
+        "unique_customers": totals.unique_customers,
+        "total_revenue": float(totals.total_revenue),
+        "avg_service_cost": float(totals.avg_ticket_size),
+        "total_labor_hours": float(totals.total_labor_hours),
+        "total_parts_revenue": float(totals.parts_revenue),
+        "total_discounts": float(totals.discounts_given)
     }
 
 @router.get("/monthly")
-def get_monthly_report(month: int = Query(None, ge=1, le=12), year: int = Query(None), db: Session = Depends(get_db)):
+def get_monthly_report(
+    month: int = Query(None, ge=1, le=12),
+    year: int = Query(None),
+    branch_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
     if not month:
         month = date.today().month
     if not year:
         year = date.today().year
     
-    services = db.query(Service).filter(
-        func.extract('year', Service.service_date) == year,
-        func.extract('month', Service.service_date) == month
-    ).all()
+    # Half-open range [first of month, first of next month)
+    month_start = date(year, month, 1)
+    month_end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
     
-    total_services = len(services)
-    total_revenue = sum(float(s.grand_total) for s in services)
-    labor_revenue = sum(float(s.total_labor_cost) for s in services)
-    parts_revenue = sum(float(s.total_parts_cost) for s in services)
-    tax_collected = sum(float(s.tax_amount) for s in services)
-    discounts_given = sum(float(s.discount_amount) for s in services)
-    unique_customers = len(set(s.vehicle.customer_id for s in services))
+    return cached_report(
+        "reports/monthly", {"month": month, "year": year, "branch_id": branch_id}, month_start, month_end - timedelta(days=1),
+        lambda: _build_monthly_report(db, year, month, month_start, month_end, branch_id)
+    )
+
+def _build_monthly_report(
+    db: Session,
+    year: int,
+    month: int,
+    month_start: date,
+    month_end: date,
+    branch_id: Optional[int]
+) -> dict:
+    totals = _service_totals(db, month_start, month_end, branch_id)
     
     return {
         "year": year,
         "month": month,
-        "total_services": total_services,
-        "total_revenue": total_revenue,
-        "labor_revenue": labor_revenue,
-        "parts_revenue": parts_revenue,
-        "tax_collected": tax_collected,
-        "discounts_given": discounts_given,
-        "avg_ticket_size": total_revenue / total_services if total_services > 0 else 0,
-        "unique_customers": unique_customers
+        "total_services": totals.total_services,
+        "total_revenue": float(totals.total_revenue),
+        "labor_revenue": float(totals.labor_revenue),
+        "parts_revenue": float(totals.parts_revenue),
+        "tax_collected": float(totals.tax_collected),
+        "discounts_given": float(totals.discounts_given),
+        "avg_ticket_size": float(totals.avg_ticket_size),
+        "unique_customers": totals.unique_customers
     }
 
-@router.get("/customers-due")
-def get_customers_due_for_service(days: int = 7, db: Session = Depends(get_db)):
-    from app.models.service import ServiceType
-    
-    # Get vehicles that are due for service
-    vehicles = db.query(Vehicle).join(Customer).filter(Customer.is_active == "TRUE").all()
-    
-    due_vehicles = []
-    for v in vehicles:
-        # Check mileage-based due
-        mileage_due = float(v.next_service_mileage) - float(v.current_mileage) <= 500
-        
-        # Check time-based due
-        last_service = db.query(Service).filter(
-            Service.vehicle_id == v.vehicle_id
-        ).order_by(Service.service_date.desc()).first()
-        
-        time_due = False
-        if last_service:
-            service_type = db.query(ServiceType).filter(
-                ServiceType.service_type_id == last_service.service_type_id
-            ).first()
-            if service_type:
-                next_service_date = last_service.service_date + timedelta(days=service_type.time_interval_months * 30)
-                time_due = next_service_date <= date.today() + timedelta(days=days)
-        
-        if mileage_due or time_due:
-            due_vehicles.append({
-                "customer_id": v.customer_id,
-                "customer_name": f"{v.customer.first_name} {v.customer.last_name}",
-                "email": v.customer.email,
-                "phone": v.customer.phone,
-                "license_plate": v.license_plate,
-                "make": v.make,
-                "model": v.model,
-                "current_mileage": float(v.current_mileage),
-                "next_service_mileage": float(v.next_service_mileage),
-                "mileage_remaining": float(v.next_service_mileage) - float(v.current_mileage)
-            })
-    
-    return due_vehicles
+def _split_names(values: List[str]) -> List[str]:
+    return [name.strip() for value in values for name in value.split(",") if name.strip()]
 
+@router.get("/grouped")
+def get_grouped_report(
+    start_date: date = None,
+    end_date: date = None,
+    group_by: List[str] = Query([]),
+    metrics: List[str] = Query([]),
+    branch_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Ad-hoc aggregate report. group_by and metrics accept repeated or
+    comma-separated values, e.g. ?group_by=month,branch&metrics=revenue.
+    Defaults to the last 30 days.
+    """
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=30)
+    
+    group_by = _split_names(group_by)
+    metrics = _split_names(metrics)
+    
+    try:
+        return cached_report(
+            "reports/grouped",
+            {
+                "start_date": start_date,
+                "end_date": end_date,
+                "group_by": group_by,
+                "metrics": metrics,
+                "branch_id": branch_id,
+            },
+            start_date, end_date,
+            lambda: run_grouped_report(db, start_date, end_date, group_by=group_by, metrics=metrics, branch_id=branch_id)
+        )
+    except ReportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/grouped/jobs", status_code=status.HTTP_202_ACCEPTED)
+def queue_grouped_report(
+    start_date: date,
+    end_date: date,
+    group_by: List[str] = Query([]),
+    metrics: List[str] = Query([]),
+    branch_id: Optional[int] = None,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Run a grouped report in the background (for ranges too large to answer
+    within a request). Returns a job to poll at /api/jobs/{job_id}.
+    """
+    group_by = _split_names(group_by)
+    metrics = _split_names(metrics)
+    unknown = [name for name in group_by if name not in DIMENSIONS and name not in DIMENSION_ALIASES] + [name for name in metrics if name not in METRICS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown dimension or metric: {', '.join(unknown)}")
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    
+    job = enqueue_job(
+        db,
+        "grouped_report",
+        {
+            "start_date": start_date,
+            "end_date": end_date,
+            "group_by": group_by,
+            "metrics": metrics,
+            "branch_id": branch_id,
+        },
+        created_by=current_user.username
+    )
+    return describe_job(job)
+
+@router.get("/trends")
+def get_revenue_trends(
+    start_date: date = None,
+    end_date: date = None,
+    branch_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Daily revenue series with moving averages, week-over-week and
+    year-over-year change, weekday seasonality and a 30-day forecast.
+    Defaults to the last 365 days.
+    """
+    today = date.today()
+    if not end_date:
+        end_date = today
+    if not start_date:
+        start_date = end_date - timedelta(days=364)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    if (end_date - start_date).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_RANGE_DAYS} days")
+    
+    # Cached per day; the series reads up to a year of history before start_date
+    return cached_report(
+        "reports/trends",
+        {"start_date": start_date, "end_date": end_date, "branch_id": branch_id, "as_of": today},
+        start_date - timedelta(days=YEAR_LAG_DAYS + 27), end_date,
+        lambda: compute_revenue_trends(db, start_date, end_date, branch_id)
+    )
+
+@router.post("/trends/jobs", status_code=status.HTTP_202_ACCEPTED)
+def queue_revenue_trends(
+    start_date: date,
+    end_date: date,
+    branch_id: Optional[int] = None,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Compute revenue trends in the background. Returns a job to poll at /api/jobs/{job_id}."""
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    if (end_date - start_date).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_RANGE_DAYS} days")
+    
+    job = enqueue_job(
+        db,
+        "revenue_trends",
+        {"start_date": start_date, "end_date": end_date, "branch_id": branch_id},
+        created_by=current_user.username
+    )
+    return describe_job(job)
+
+@router.get("/cache-stats")
+def get_report_cache_statistics(current_user = Depends(get_current_admin)):
+    """Report cache hit rates and entry count (Admin only)"""
+    return get_report_cache_stats()
+
+@router.post("/cache/prewarm")
+def prewarm_report_cache_endpoint(
+    current_user = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Compute and cache today's and this month's reports (Admin only)"""
+    return {"warmed": prewarm_report_cache(db)}
+
+def prewarm_report_cache(db: Session) -> list:
+    """Fill the cache for the current day and month; returns the warmed endpoints."""
+    from app.routes.dashboard import get_dashboard_stats
+    from app.routes.accountant import get_payment_summary
+    
+    today = date.today()
+    get_daily_report(report_date=today, db=db)
+    get_monthly_report(month=today.month, year=today.year, db=db)
+    get_dashboard_stats(db=db)
+    get_payment_summary(start_date=today.replace(day=1), end_date=today, current_user=None, db=db)
+    return ["reports/daily", "reports/monthly", "dashboard", "accountant/payments/summary"]
+
+@router.get("/customers-due")
+def get_customers_due_for_service(
+    days: int = 7,
+    branch_id: Optional[int] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    # Latest service per vehicle: one backward probe of idx_services_vehicle_date
+    last_service = select(
+        Service.service_date,
+        Service.service_type_id,
+        Service.branch_id
+    ).where(
+        Service.vehicle_id == Vehicle.vehicle_id
+    ).order_by(
+        Service.service_date.desc(),
+        Service.service_id.desc()
+    ).limit(1).lateral("last_service")
+    
+    mileage_remaining = Vehicle.next_service_mileage - Vehicle.current_mileage
+    
+    # Mileage-based due, or time-based due (last service + interval months * 30 days)
+    mileage_due = mileage_remaining <= 500
+    time_due = last_service.c.service_date + ServiceType.time_interval_months * 30 <= date.today() + timedelta(days=days)
+    
+    query = db.query(
+        Vehicle.customer_id,
+        Customer.first_name,
+        Customer.last_name,
+        Customer.email,
+        Customer.phone,
+        Vehicle.license_plate,
+        Vehicle.make,
+        Vehicle.model,
+        Vehicle.current_mileage,
+        Vehicle.next_service_mileage,
+    ).join(
+        Customer, Customer.customer_id == Vehicle.customer_id
+    ).outerjoin(
+        last_service, true()
+    ).outerjoin(
+        ServiceType, ServiceType.service_type_id == last_service.c.service_type_id
+    ).filter(
+        Customer.is_active == True,
+        or_(mileage_due, time_due)
+    )
+    
+    # Vehicles belong to the branch that serviced them last
+    if branch_id is not None:
+        query = query.filter(last_service.c.branch_id == branch_id)
+    
+    rows = query.order_by(Vehicle.vehicle_id).offset(skip).limit(limit).all()
+    
+    return [
+        {
+            "customer_id": r.customer_id,
+            "customer_name": f"{r.first_name} {r.last_name}",
+            "email": r.email,
+            "phone": r.phone,
+            "license_plate": r.license_plate,
+            "make": r.make,
+            "model": r.model,
+            "current_mileage": float(r.current_mileage),
+            "next_service_mileage": float(r.next_service_mileage),
+            "mileage_remaining": float(r.next_service_mileage) - float(r.current_mileage)
+        }
+        for r in rows
+    ]
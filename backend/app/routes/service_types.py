@@ -11,6 +11,7 @@ from app.schemas.service_type import (
     ServiceTypeWithChecklist
 )
 from app.auth import get_current_admin
+from app.services.checklist_matching import refresh_checklist_item_matches
 
 router = APIRouter()
 
@@ -84,6 +85,8 @@ def create_checklist_item(
         **item_data.dict()
     )
     db.add(checklist_item)
+    db.flush()
+    refresh_checklist_item_matches(db, checklist_item.checklist_id)
     db.commit()
     db.refresh(checklist_item)
     return checklist_item
@@ -116,6 +119,10 @@ def update_checklist_item(
     for field, value in update_data.items():
         setattr(checklist_item, field, value)
     
+    if "item_name" in update_data:
+        db.flush()
+        refresh_checklist_item_matches(db, checklist_id)
+    
     db.commit()
     db.refresh(checklist_item)
     return checklist_item
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from sqlalchemy import func, insert
 from datetime import date, timedelta
 from typing import List
 from decimal import Decimal
@@ -10,6 +10,8 @@ from app.models.vehicle import Vehicle
 from app.models.part import PartInventory
 from app.schemas.service import ServiceCreate, ServiceUpdate, ServiceResponse
 from app.auth import get_current_admin
+from app.services.inventory import decrement_stock
+from app.services.payment_ledger import change_payment_status, PaymentError
 
 router = APIRouter()
 
@@ -52,33 +54,47 @@ def create_service(
     db.add(db_service)
     db.flush()
     
-    # Add parts if provided
-    total_parts_cost = Decimal("0.00")
-    if service_data.parts:
-        for part_data in service_data.parts:
-            part = db.query(PartInventory).filter(PartInventory.part_id == part_data.part_id).first()
-            if not part:
-                continue
-            
-            unit_price = Decimal(str(part.unit_price))
-            total_price = unit_price * Decimal(str(part_data.quantity))
-            total_parts_cost += total_price
-            
-            service_part = ServicePart(
-                service_id=db_service.service_id,
-                part_id=part_data.part_id,
-                quantity=part_data.quantity,
-                unit_price=unit_price,
-                # total_price is a generated column, don't set it
-                was_replaced=part_data.was_replaced,
-                replacement_reason=part_data.replacement_reason,
-                checklist_item_id=part_data.checklist_item_id
+    # Add parts if provided (one fetch for all referenced parts, one bulk insert)
+    requested_parts = service_data.parts or []
+    part_ids = {part_data.part_id for part_data in requested_parts}
+    parts_by_id = {}
+    if part_ids:
+        parts_by_id = {
+            part_id: unit_price
+            for part_id, unit_price in db.query(PartInventory.part_id, PartInventory.unit_price).filter(
+                PartInventory.part_id.in_(part_ids)
             )
-            db.add(service_part)
-            
-            # Update inventory if replaced
-            if part_data.was_replaced:
-                part.stock_quantity -= part_data.quantity
+        }
+    
+    total_parts_cost = Decimal("0.00")
+    service_part_rows = []
+    stock_decrements = {}
+    for part_data in requested_parts:
+        if part_data.part_id not in parts_by_id:
+            continue
+        
+        unit_price = Decimal(str(parts_by_id[part_data.part_id]))
+        total_price = unit_price * Decimal(str(part_data.quantity))
+        total_parts_cost += total_price
+        
+        service_part_rows.append({
+            "service_id": db_service.service_id,
+            "part_id": part_data.part_id,
+            "quantity": part_data.quantity,
+            "unit_price": unit_price,
+            # total_price is a generated column, don't set it
+            "was_replaced": part_data.was_replaced,
+            "replacement_reason": part_data.replacement_reason,
+            "checklist_item_id": part_data.checklist_item_id,
+        })
+        
+        # Update inventory if replaced
+        if part_data.was_replaced:
+            stock_decrements[part_data.part_id] = stock_decrements.get(part_data.part_id, 0) + part_data.quantity
+    
+    if service_part_rows:
+        db.execute(insert(ServicePart), service_part_rows)
+    decrement_stock(db, stock_decrements, service_id=db_service.service_id)
     
     # Calculate totals
     tax_rate = Decimal("15.00")
@@ -182,8 +198,16 @@ def update_service(
         raise HTTPException(status_code=404, detail="Service not found")
     
     update_data = service_update.dict(exclude_unset=True)
+    payment_status = update_data.pop("payment_status", None)
     for field, value in update_data.items():
         setattr(service, field, value)
+    # Status changes go through the ledger, after any total changes above
+    if payment_status and payment_status != service.payment_status:
+        try:
+            change_payment_status(db, service, payment_status, update_data.get("payment_method"))
+        except PaymentError as e:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
     
     db.commit()
     db.refresh(service)
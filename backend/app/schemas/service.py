@@ -56,6 +56,7 @@ class ServiceResponse(BaseModel):
     grand_total: Decimal
     payment_status: str
     payment_method: Optional[str] = None
+    amount_paid: Optional[Decimal] = None
     mechanic_notes: Optional[str] = None
     customer_feedback: Optional[str] = None
     rating: Optional[int] = None
@@ -1,6 +1,36 @@
 # Services module for business logic
 from app.services.email_service import email_service
 from app.services.notification_service import check_and_send_service_reminders
+from app.services.customer_stats import get_vehicle_service_rollup
+from app.services.customer_versions import bump_customer_versions, get_customer_version
+from app.services.customer_summary import refresh_customer_summaries, refresh_program_summaries, rebuild_customer_summaries, get_customer_summary
+from app.services.service_rollup import apply_rollup_changes, rebuild_daily_rollup
+from app.services.report_cache import cached_report, mark_report_dates_changed, get_report_cache_stats
+from app.services.branches import normalize_branch_name, get_or_create_branch_id
+from app.services.jobs import enqueue_job, run_job, claim_next_job
+from app.services.inventory import get_inspection_part_id, decrement_stock, record_stock_adjustment
 
-__all__ = ['email_service', 'check_and_send_service_reminders']
-
+__all__ = [
+    'email_service',
+    'check_and_send_service_reminders',
+    'get_vehicle_service_rollup',
+    'bump_customer_versions',
+    'get_customer_version',
+    'refresh_customer_summaries',
+    'refresh_program_summaries',
+    'rebuild_customer_summaries',
+    'get_customer_summary',
+    'apply_rollup_changes',
+    'rebuild_daily_rollup',
+    'cached_report',
+    'mark_report_dates_changed',
+    'get_report_cache_stats',
+    'normalize_branch_name',
+    'get_or_create_branch_id',
+    'enqueue_job',
+    'run_job',
+    'claim_next_job',
+    'get_inspection_part_id',
+    'decrement_stock',
+    'record_stock_adjustment',
+]
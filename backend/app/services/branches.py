@@ -0,0 +1,56 @@
+from typing import Optional
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from app.database import SessionLocal
+from app.models.branch import Branch
+from app.models.service import Service, DailyServiceRollup
+
+# Canonical branch name -> branch_id. Only ids of rows that already existed
+# (committed by someone) are cached, never ids inserted by a transaction
+# that might still roll back.
+_branch_ids = {}
+
+def normalize_branch_name(name: Optional[str]) -> Optional[str]:
+    """Collapse whitespace and upper-case a branch name; blank names become None."""
+    if name is None:
+        return None
+    normalized = " ".join(name.split()).upper()
+    return normalized or None
+
+def get_or_create_branch_id(db: Session, name: Optional[str]) -> Optional[int]:
+    """Resolve a branch name to its branch_id, adding it to the lookup table on first use."""
+    name = normalize_branch_name(name)
+    if name is None:
+        return None
+    if name in _branch_ids:
+        return _branch_ids[name]
+
+    connection = db.connection()
+    created_id = connection.execute(
+        pg_insert(Branch).values(branch_name=name).on_conflict_do_nothing(
+            index_elements=[Branch.branch_name]
+        ).returning(Branch.branch_id)
+    ).scalar()
+    if created_id is not None:
+        return created_id
+
+    branch_id = connection.execute(
+        select(Branch.branch_id).where(Branch.branch_name == name)
+    ).scalar()
+    _branch_ids[name] = branch_id
+    return branch_id
+
+@event.listens_for(SessionLocal, "before_flush")
+def _assign_branch_ids(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Service):
+            continue
+        if obj in session.new or get_history(obj, "branch").has_changes():
+            obj.branch = normalize_branch_name(obj.branch)
+            obj.branch_id = get_or_create_branch_id(session, obj.branch)
+
+def rollup_branch_filter(branch_id: int):
+    """Filter daily_service_rollup rows down to one branch."""
+    return DailyServiceRollup.branch_id == branch_id
@@ -0,0 +1,54 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# A part is a candidate for a checklist item when the item name appears in the
+# part name or category (case-insensitive). LIKE wildcards in the item name are
+# escaped so names are matched literally. ILIKE on part_name can use the
+# trigram index created by migration_add_checklist_part_matches.sql.
+_ITEM_PATTERN = r"'%' || replace(replace(replace(c.item_name, '\', '\\'), '%', '\%'), '_', '\_') || '%'"
+
+_MATCH_PREDICATE = f"""(
+    p.part_name ILIKE {_ITEM_PATTERN}
+    OR CAST(p.category AS TEXT) ILIKE {_ITEM_PATTERN}
+)"""
+
+_INSERT_MATCHES = f"""
+    INSERT INTO checklist_part_matches (checklist_id, part_id)
+    SELECT c.checklist_id, p.part_id
+    FROM service_checklists c
+    JOIN parts_inventory p ON {_MATCH_PREDICATE}
+"""
+
+def refresh_checklist_item_matches(db: Session, checklist_id: int) -> None:
+    """Recompute candidate parts for one checklist item (call after flush)."""
+    db.execute(
+        text("DELETE FROM checklist_part_matches WHERE checklist_id = :checklist_id"),
+        {"checklist_id": checklist_id}
+    )
+    db.execute(
+        text(_INSERT_MATCHES + " WHERE c.checklist_id = :checklist_id"),
+        {"checklist_id": checklist_id}
+    )
+
+def refresh_part_matches(db: Session, part_id: int) -> None:
+    """Recompute the checklist items a part is a candidate for (call after flush)."""
+    db.execute(
+        text("DELETE FROM checklist_part_matches WHERE part_id = :part_id"),
+        {"part_id": part_id}
+    )
+    db.execute(
+        text(_INSERT_MATCHES + " WHERE p.part_id = :part_id"),
+        {"part_id": part_id}
+    )
+
+def rebuild_checklist_part_matches(db: Session) -> int:
+    """
+    Rebuild the whole checklist -> parts mapping in one set-based statement.
+    Used for backfill and after bulk seeding. Does not commit.
+
+    Returns:
+        Number of match rows written
+    """
+    db.execute(text("DELETE FROM checklist_part_matches"))
+    result = db.execute(text(_INSERT_MATCHES))
+    return result.rowcount
@@ -0,0 +1,26 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.vehicle import Vehicle
+from app.models.service import Service
+
+def get_vehicle_service_rollup(db: Session, customer_id: int) -> list:
+    """
+    Project a customer's vehicles together with per-vehicle service count and
+    paid total. One grouped query; the result size depends only on the number
+    of vehicles, never on the length of the service history.
+    """
+    return db.query(
+        Vehicle.vehicle_id,
+        Vehicle.license_plate,
+        Vehicle.make,
+        Vehicle.model,
+        Vehicle.year,
+        Vehicle.current_mileage,
+        Vehicle.next_service_mileage,
+        func.count(Service.service_id).label("service_count"),
+        func.coalesce(func.sum(Service.amount_paid), 0).label("paid_total"),
+    ).outerjoin(
+        Service, Service.vehicle_id == Vehicle.vehicle_id
+    ).filter(
+        Vehicle.customer_id == customer_id
+    ).group_by(Vehicle.vehicle_id).order_by(Vehicle.vehicle_id).all()
@@ -0,0 +1,187 @@
+from typing import Iterable, Optional
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.customer import CustomerSummary
+from app.models.loyalty import LoyaltyProgram
+from app.services.customer_versions import collect_affected_ids
+
+# Recomputes customer_summaries rows for the customers selected by {where}.
+# Each aggregate is a LATERAL subquery bounded by one customer's vehicles, so
+# refreshing a customer costs the size of their own history, never the table.
+# Lifetime paid is the payments ledger total; outstanding is the unpaid
+# balance of services that are neither paid nor free.
+_UPSERT_SUMMARIES = """
+    INSERT INTO customer_summaries (
+        customer_id, vehicle_count, service_count, lifetime_paid, outstanding_amount,
+        last_service_date, next_service_due, loyalty_id, loyalty_consecutive_count,
+        loyalty_total_services, loyalty_free_services_earned, loyalty_free_services_used,
+        loyalty_services_required, free_service_available, updated_at
+    )
+    SELECT
+        c.customer_id,
+        v.vehicle_count,
+        s.service_count,
+        COALESCE(s.lifetime_paid, 0),
+        COALESCE(s.outstanding_amount, 0),
+        s.last_service_date,
+        n.next_service_due,
+        l.loyalty_id,
+        COALESCE(l.consecutive_count, 0),
+        COALESCE(l.total_services, 0),
+        COALESCE(l.free_services_earned, 0),
+        COALESCE(l.free_services_used, 0),
+        l.services_required,
+        COALESCE(l.free_service_available, FALSE),
+        CURRENT_TIMESTAMP
+    FROM customers c
+    CROSS JOIN LATERAL (
+        SELECT COUNT(*) AS vehicle_count
+        FROM vehicles
+        WHERE customer_id = c.customer_id
+    ) v
+    CROSS JOIN LATERAL (
+        SELECT
+            COUNT(sv.service_id) AS service_count,
+            SUM(sv.amount_paid) AS lifetime_paid,
+            SUM(sv.grand_total - COALESCE(sv.amount_paid, 0)) FILTER (
+                WHERE sv.payment_status IN ('Pending', 'Partial')
+            ) AS outstanding_amount,
+            MAX(sv.service_date) AS last_service_date
+        FROM services sv
+        JOIN vehicles vh ON vh.vehicle_id = sv.vehicle_id
+        WHERE vh.customer_id = c.customer_id
+    ) s
+    CROSS JOIN LATERAL (
+        SELECT MIN(latest.next_service_date) AS next_service_due
+        FROM (
+            SELECT DISTINCT ON (sv.vehicle_id) sv.next_service_date
+            FROM services sv
+            JOIN vehicles vh ON vh.vehicle_id = sv.vehicle_id
+            WHERE vh.customer_id = c.customer_id
+            ORDER BY sv.vehicle_id, sv.service_date DESC, sv.service_id DESC
+        ) latest
+    ) n
+    LEFT JOIN LATERAL (
+        SELECT cl.loyalty_id, cl.consecutive_count, cl.total_services,
+               cl.free_services_earned, cl.free_services_used,
+               cl.free_service_available, lp.services_required
+        FROM customer_loyalty cl
+        JOIN loyalty_programs lp ON lp.program_id = cl.program_id AND lp.is_active = TRUE
+        WHERE cl.customer_id = c.customer_id
+        ORDER BY cl.loyalty_id
+        LIMIT 1
+    ) l ON TRUE
+    WHERE {where}
+    ORDER BY c.customer_id
+    ON CONFLICT (customer_id) DO UPDATE SET
+        vehicle_count = EXCLUDED.vehicle_count,
+        service_count = EXCLUDED.service_count,
+        lifetime_paid = EXCLUDED.lifetime_paid,
+        outstanding_amount = EXCLUDED.outstanding_amount,
+        last_service_date = EXCLUDED.last_service_date,
+        next_service_due = EXCLUDED.next_service_due,
+        loyalty_id = EXCLUDED.loyalty_id,
+        loyalty_consecutive_count = EXCLUDED.loyalty_consecutive_count,
+        loyalty_total_services = EXCLUDED.loyalty_total_services,
+        loyalty_free_services_earned = EXCLUDED.loyalty_free_services_earned,
+        loyalty_free_services_used = EXCLUDED.loyalty_free_services_used,
+        loyalty_services_required = EXCLUDED.loyalty_services_required,
+        free_service_available = EXCLUDED.free_service_available,
+        updated_at = EXCLUDED.updated_at
+"""
+
+_AFFECTED_CUSTOMERS = """(
+    c.customer_id = ANY(CAST(:customer_ids AS INTEGER[]))
+    OR c.customer_id IN (
+        SELECT customer_id FROM vehicles WHERE vehicle_id = ANY(CAST(:vehicle_ids AS INTEGER[]))
+    )
+)"""
+
+# Customers enrolled in a loyalty program whose rules or status changed
+_PROGRAM_CUSTOMERS = """
+    c.customer_id IN (
+        SELECT customer_id FROM customer_loyalty
+        WHERE program_id = ANY(CAST(:program_ids AS INTEGER[]))
+    )
+"""
+
+def refresh_customer_summaries(
+    db: Session,
+    customer_ids: Iterable[int] = (),
+    vehicle_ids: Iterable[int] = ()
+) -> None:
+    """
+    Recompute the summary row of every customer given directly or owning one
+    of the given vehicles, in the caller's transaction.
+
+    Call this after raw SQL writes that bypass the ORM; ORM writes are picked
+    up automatically by the after_flush hook below.
+    """
+    customer_ids = sorted({cid for cid in customer_ids if cid is not None})
+    vehicle_ids = sorted({vid for vid in vehicle_ids if vid is not None})
+    if not customer_ids and not vehicle_ids:
+        return
+
+    db.connection().execute(
+        text(_UPSERT_SUMMARIES.format(where=_AFFECTED_CUSTOMERS)),
+        {"customer_ids": customer_ids, "vehicle_ids": vehicle_ids}
+    )
+
+def refresh_program_summaries(db: Session, program_ids: Iterable[int]) -> None:
+    """
+    Recompute the summary row of every customer enrolled in one of the given
+    loyalty programs (services_required or is_active changed), in the
+    caller's transaction.
+    """
+    program_ids = sorted({pid for pid in program_ids if pid is not None})
+    if not program_ids:
+        return
+
+    db.connection().execute(
+        text(_UPSERT_SUMMARIES.format(where=_PROGRAM_CUSTOMERS)),
+        {"program_ids": program_ids}
+    )
+
+@event.listens_for(SessionLocal, "after_flush")
+def _refresh_summaries_after_flush(session, flush_context):
+    customer_ids, vehicle_ids = collect_affected_ids(session)
+    refresh_customer_summaries(session, customer_ids, vehicle_ids)
+    program_ids = {
+        obj.program_id for obj in session.dirty
+        if isinstance(obj, LoyaltyProgram) and session.is_modified(obj, include_collections=False)
+    }
+    refresh_program_summaries(session, program_ids)
+
+def rebuild_customer_summaries(db: Session, batch_size: int = 5000) -> int:
+    """
+    Backfill or repair the read model for all customers, one customer_id range
+    per statement so a large table is not rewritten under a single snapshot.
+    Commits after each batch.
+
+    Returns:
+        Number of summary rows written
+    """
+    max_id = db.execute(text("SELECT COALESCE(MAX(customer_id), 0) FROM customers")).scalar()
+    written = 0
+    for low in range(1, max_id + 1, batch_size):
+        result = db.execute(
+            text(_UPSERT_SUMMARIES.format(where="c.customer_id BETWEEN :low AND :high")),
+            {"low": low, "high": low + batch_size - 1}
+        )
+        written += result.rowcount
+        db.commit()
+    return written
+
+def get_customer_summary(db: Session, customer_id: int) -> Optional[CustomerSummary]:
+    """
+    Primary-key read of a customer's summary row. Customers with no row yet
+    (created before the read model was backfilled) are summarized on demand,
+    and that row is committed so the next read finds it.
+    """
+    summary = db.get(CustomerSummary, customer_id)
+    if summary is None:
+        refresh_customer_summaries(db, customer_ids=[customer_id])
+        db.commit()
+        summary = db.get(CustomerSummary, customer_id)
+    return summary
@@ -0,0 +1,168 @@
+import threading
+from typing import Callable, Iterable
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import event, func, literal, select, union
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from app.database import SessionLocal
+from app.models.customer import Customer, CustomerDataVersion
+from app.models.vehicle import Vehicle
+from app.models.service import Service, Appointment
+from app.models.loyalty import CustomerLoyalty
+
+def bump_customer_versions(
+    db: Session,
+    customer_ids: Iterable[int] = (),
+    vehicle_ids: Iterable[int] = ()
+) -> None:
+    """
+    Increment the data version of every customer given directly or owning one
+    of the given vehicles. Runs as one INSERT ... ON CONFLICT statement in the
+    caller's transaction; rows are touched in customer_id order.
+
+    Call this after raw SQL writes that bypass the ORM; ORM writes are picked
+    up automatically by the after_flush hook below.
+    """
+    customer_ids = {cid for cid in customer_ids if cid is not None}
+    vehicle_ids = {vid for vid in vehicle_ids if vid is not None}
+    if not customer_ids and not vehicle_ids:
+        return
+
+    sources = []
+    if customer_ids:
+        sources.append(select(Customer.customer_id).where(Customer.customer_id.in_(customer_ids)))
+    if vehicle_ids:
+        sources.append(select(Vehicle.customer_id).where(Vehicle.vehicle_id.in_(vehicle_ids)))
+    affected = (union(*sources) if len(sources) > 1 else sources[0]).subquery()
+
+    stmt = pg_insert(CustomerDataVersion).from_select(
+        ["customer_id", "version"],
+        select(affected.c.customer_id, literal(1)).order_by(affected.c.customer_id)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CustomerDataVersion.customer_id],
+        set_={
+            "version": CustomerDataVersion.version + 1,
+            "updated_at": func.now(),
+        }
+    )
+    db.connection().execute(stmt)
+
+def _collect(instances, customer_ids: set, vehicle_ids: set) -> None:
+    for obj in instances:
+        if isinstance(obj, (Vehicle, CustomerLoyalty, Customer)):
+            customer_ids.add(obj.customer_id)
+            # A vehicle moved between customers invalidates both
+            customer_ids.update(get_history(obj, "customer_id").deleted or ())
+        elif isinstance(obj, (Service, Appointment)):
+            vehicle_ids.add(obj.vehicle_id)
+            vehicle_ids.update(get_history(obj, "vehicle_id").deleted or ())
+
+def collect_affected_ids(session: Session) -> tuple:
+    """
+    Customer and vehicle ids touched by the flush in progress (new, deleted and
+    modified vehicles, services, appointments, loyalty and customer rows).
+    Only valid inside an after_flush hook.
+    """
+    customer_ids = set()
+    vehicle_ids = set()
+    _collect(session.new, customer_ids, vehicle_ids)
+    _collect(session.deleted, customer_ids, vehicle_ids)
+    _collect(
+        (obj for obj in session.dirty if session.is_modified(obj, include_collections=False)),
+        customer_ids, vehicle_ids
+    )
+    return customer_ids, vehicle_ids
+
+@event.listens_for(SessionLocal, "after_flush")
+def _bump_versions_after_flush(session, flush_context):
+    customer_ids, vehicle_ids = collect_affected_ids(session)
+    bump_customer_versions(session, customer_ids, vehicle_ids)
+
+def get_customer_version(db: Session, customer_id: int) -> int:
+    """Current data version for a customer (primary-key read, 0 if never written)."""
+    version = db.query(CustomerDataVersion.version).filter(
+        CustomerDataVersion.customer_id == customer_id
+    ).scalar()
+    return version or 0
+
+# --- Conditional GET -------------------------------------------------------
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _count_statements(orm_execute_state):
+    info = orm_execute_state.session.info
+    info["statement_count"] = info.get("statement_count", 0) + 1
+
+_stats_lock = threading.Lock()
+_conditional_stats = {}
+
+def _record(endpoint: str, not_modified: bool, body_bytes: int = 0, statements: int = 0) -> None:
+    with _stats_lock:
+        stats = _conditional_stats.setdefault(endpoint, {
+            "not_modified": 0,
+            "full_responses": 0,
+            "bytes_sent": 0,
+            "statements_executed": 0,
+        })
+        if not_modified:
+            stats["not_modified"] += 1
+        else:
+            stats["full_responses"] += 1
+            stats["bytes_sent"] += body_bytes
+            stats["statements_executed"] += statements
+
+def get_conditional_stats() -> dict:
+    """
+    Per-endpoint conditional GET statistics since process start. Savings are
+    estimated from the average full response: every 304 avoided one payload
+    of avg_response_bytes and avg_statements payload queries.
+    """
+    with _stats_lock:
+        snapshot = {endpoint: dict(stats) for endpoint, stats in _conditional_stats.items()}
+
+    for stats in snapshot.values():
+        full = stats["full_responses"]
+        total = full + stats["not_modified"]
+        avg_bytes = stats["bytes_sent"] / full if full else 0
+        avg_statements = stats["statements_executed"] / full if full else 0
+        stats["hit_rate"] = stats["not_modified"] / total if total else 0
+        stats["avg_response_bytes"] = avg_bytes
+        stats["avg_statements"] = avg_statements
+        stats["estimated_bytes_saved"] = int(avg_bytes * stats["not_modified"])
+        stats["estimated_statements_saved"] = int(avg_statements * stats["not_modified"])
+    return snapshot
+
+def conditional_customer_response(
+    request: Request,
+    db: Session,
+    endpoint: str,
+    customer_id: int,
+    build: Callable[[], object]
+) -> Response:
+    """
+    Serve a customer portal payload with an ETag derived from the customer's
+    data version. When the client's If-None-Match matches, answer 304 without
+    calling build(); otherwise build, serialize once and attach the ETag.
+    """
+    version = get_customer_version(db, customer_id)
+    etag = f'W/"{endpoint}-{customer_id}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        _record(endpoint, not_modified=True)
+        return Response(status_code=304, headers=headers)
+
+    statements_before = db.info.get("statement_count", 0)
+    payload = build()
+    response = JSONResponse(content=jsonable_encoder(payload), headers=headers)
+    _record(
+        endpoint,
+        not_modified=False,
+        body_bytes=len(response.body),
+        statements=db.info.get("statement_count", 0) - statements_before
+    )
+    return response
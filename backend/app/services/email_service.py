@@ -1,12 +1,73 @@
 import smtplib
 import os
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from typing import List, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
+class _SMTP(smtplib.SMTP):
+    """smtplib.SMTP that records whether the current message reached DATA."""
+
+    data_started = False
+
+    def mail(self, *args, **kwargs):
+        self.data_started = False
+        return super().mail(*args, **kwargs)
+
+    def data(self, msg):
+        self.data_started = True
+        return super().data(msg)
+
+class _PooledConnection:
+    """
+    One authenticated SMTP connection reused across a batch. Reconnects after
+    max_messages sends, and retries a message once on a new connection when
+    the old one failed before DATA (e.g. the server closed it while idle).
+    """
+
+    def __init__(self, service: "EmailService", max_messages: int):
+        self.service = service
+        self.max_messages = max_messages
+        self.server = None
+        self.sent = 0
+
+    def close(self) -> None:
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.server = None
+
+    def send(self, msg: MIMEMultipart) -> None:
+        if self.server is not None and self.sent >= self.max_messages:
+            self.close()
+        for attempt in range(2):
+            if self.server is None:
+                self.server = self.service._connect()
+                self.sent = 0
+            try:
+                self.server.send_message(msg)
+                self.sent += 1
+                return
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+                # The message was refused, the connection is still good
+                try:
+                    self.server.rset()
+                except (smtplib.SMTPException, OSError):
+                    self.close()
+                raise
+            except (smtplib.SMTPException, OSError):
+                # Once DATA has started the server may have accepted the
+                # message; resending could deliver it twice
+                delivered_maybe = self.server.data_started
+                self.close()
+                if attempt or delivered_maybe:
+                    raise
+
 class EmailService:
     def __init__(self):
         self.smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
@@ -15,6 +76,49 @@ class EmailService:
         self.smtp_password = os.getenv("SMTP_PASSWORD", "")
         self.from_email = os.getenv("FROM_EMAIL", self.smtp_username)
         self.enabled = os.getenv("EMAIL_ENABLED", "true").lower() == "true"
+        self.use_tls = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+        self.smtp_timeout = float(os.getenv("SMTP_TIMEOUT", "30"))
+        # Batch sends: parallel connections, and messages per connection
+        # before it is reopened
+        self.batch_connections = int(os.getenv("SMTP_BATCH_CONNECTIONS", "2"))
+        self.max_messages_per_connection = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+
+    def _connect(self) -> smtplib.SMTP:
+        server = _SMTP(self.smtp_server, self.smtp_port, timeout=self.smtp_timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            server.login(self.smtp_username, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _build_message(self, to_email: str, subject: str, body: str, html_body: Optional[str] = None) -> MIMEMultipart:
+        msg = MIMEMultipart("alternative")
+        msg["From"] = self.from_email
+        msg["To"] = to_email
+        msg["Subject"] = subject
+
+        # Add plain text part
+        text_part = MIMEText(body, "plain")
+        msg.attach(text_part)
+
+        # Add HTML part if provided
+        if html_body:
+            html_part = MIMEText(html_body, "html")
+            msg.attach(html_part)
+        return msg
+
+    def _can_send(self, description: str) -> bool:
+        if not self.enabled:
+            print(f"[Email Service] Email notifications are disabled. Would send {description}")
+            return False
+
+        if not self.smtp_username or not self.smtp_password:
+            print(f"[Email Service] SMTP credentials not configured. Cannot send {description}")
+            return False
+        return True
 
     def send_email(
         self,
@@ -35,35 +139,18 @@ class EmailService:
         Returns:
             True if email was sent successfully, False otherwise
         """
-        if not self.enabled:
-            print(f"[Email Service] Email notifications are disabled. Would send to {to_email}: {subject}")
-            return False
-
-        if not self.smtp_username or not self.smtp_password:
-            print(f"[Email Service] SMTP credentials not configured. Cannot send email to {to_email}")
+        if not self._can_send(f"email to {to_email}: {subject}"):
             return False
 
         try:
-            # Create message
-            msg = MIMEMultipart("alternative")
-            msg["From"] = self.from_email
-            msg["To"] = to_email
-            msg["Subject"] = subject
-
-            # Add plain text part
-            text_part = MIMEText(body, "plain")
-            msg.attach(text_part)
-
-            # Add HTML part if provided
-            if html_body:
-                html_part = MIMEText(html_body, "html")
-                msg.attach(html_part)
+            msg = self._build_message(to_email, subject, body, html_body)
 
             # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
+            server = self._connect()
+            try:
                 server.send_message(msg)
+            finally:
+                server.quit()
 
             print(f"[Email Service] Email sent successfully to {to_email}")
             return True
@@ -72,7 +159,68 @@ class EmailService:
             print(f"[Email Service] Failed to send email to {to_email}: {str(e)}")
             return False
 
-    def send_service_reminder(
+    def send_batch(
+        self,
+        messages: List[dict],
+        connections: Optional[int] = None,
+        max_messages_per_connection: Optional[int] = None
+    ) -> List[bool]:
+        """
+        Send many emails over a few reused, authenticated SMTP connections
+        instead of one connection, STARTTLS and login per email.
+        
+        The messages are split across up to `connections` parallel
+        connections. Each connection is reopened after
+        `max_messages_per_connection` messages (servers cap messages per
+        session), and once per message after a dropped connection.
+        
+        Args:
+            messages: Dicts with to_email, subject, body and optional html_body
+            connections: Parallel connections (default: SMTP_BATCH_CONNECTIONS)
+            max_messages_per_connection: Messages before reconnecting
+                (default: SMTP_MAX_MESSAGES_PER_CONNECTION)
+            
+        Returns:
+            One True/False per message, in input order
+        """
+        results = [False] * len(messages)
+        if not messages or not self._can_send(f"{len(messages)} emails"):
+            return results
+
+        connections = max(1, min(connections or self.batch_connections, len(messages)))
+        max_messages = max_messages_per_connection or self.max_messages_per_connection
+
+        def worker(indexes: range) -> None:
+            connection = _PooledConnection(self, max_messages)
+            try:
+                for index in indexes:
+                    message = messages[index]
+                    try:
+                        connection.send(self._build_message(
+                            message["to_email"], message["subject"], message["body"], message.get("html_body")
+                        ))
+                        results[index] = True
+                    except Exception as e:
+                        print(f"[Email Service] Failed to send email to {message['to_email']}: {str(e)}")
+            finally:
+                connection.close()
+
+        if connections == 1:
+            worker(range(len(messages)))
+        else:
+            threads = [
+                threading.Thread(target=worker, args=(range(start, len(messages), connections),))
+                for start in range(connections)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        print(f"[Email Service] Batch sent {sum(results)} of {len(messages)} emails over {connections} connection(s)")
+        return results
+
+    def service_reminder_message(
         self,
         customer_name: str,
         customer_email: str,
@@ -82,9 +230,9 @@ class EmailService:
         current_mileage: float,
         next_service_mileage: float,
         mileage_remaining: float
-    ) -> bool:
+    ) -> dict:
         """
-        Send a service reminder email to a customer.
+        Build a service reminder email for a customer.
         
         Args:
             customer_name: Customer's full name
@@ -97,7 +245,8 @@ class EmailService:
             mileage_remaining: Remaining kilometers until service
             
         Returns:
-            True if email was sent successfully, False otherwise
+            Message dict (to_email, subject, body, html_body) for send_email
+            or send_batch
         """
         subject = f"Service Reminder: {vehicle_make} {vehicle_model} ({license_plate})"
 
@@ -251,7 +400,35 @@ Car Service Management Team
 </html>
 """
 
-        return self.send_email(customer_email, subject, body, html_body)
+        return {
+            "to_email": customer_email,
+            "subject": subject,
+            "body": body,
+            "html_body": html_body,
+        }
+
+    def send_service_reminder(
+        self,
+        customer_name: str,
+        customer_email: str,
+        vehicle_make: str,
+        vehicle_model: str,
+        license_plate: str,
+        current_mileage: float,
+        next_service_mileage: float,
+        mileage_remaining: float
+    ) -> bool:
+        """
+        Send a service reminder email to a customer.
+        
+        Returns:
+            True if email was sent successfully, False otherwise
+        """
+        message = self.service_reminder_message(
+            customer_name, customer_email, vehicle_make, vehicle_model,
+            license_plate, current_mileage, next_service_mileage, mileage_remaining
+        )
+        return self.send_email(**message)
 
 
 # Singleton instance
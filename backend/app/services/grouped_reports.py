@@ -0,0 +1,164 @@
+from datetime import date
+from typing import List, Optional
+from sqlalchemy import Date, Integer, String, cast, func, literal_column, select
+from sqlalchemy.orm import Session
+from app.models.service import Service, ServiceType, DailyServiceRollup
+from app.models.branch import Branch
+from app.models.vehicle import Vehicle
+from app.services.branches import rollup_branch_filter
+
+# Reports refuse to return more groups than this; narrow the range or drop a
+# dimension instead of shipping an unbounded result to the browser.
+MAX_GROUPS = 5000
+
+DEFAULT_METRICS = ["service_count", "revenue"]
+
+class ReportError(ValueError):
+    """Invalid report request (unknown dimension/metric, too many groups)."""
+
+def _truncate(unit: str, date_column):
+    # Unit rendered inline so the SELECT and GROUP BY expressions are identical
+    return cast(func.date_trunc(literal_column(f"'{unit}'"), date_column), Date)
+
+def _payment_status(column):
+    # Same expression on both sources: the rollup stores a service without a
+    # status under 'Pending', so the services path reports it that way too
+    return func.coalesce(cast(column, String), "Pending")
+
+# Dimension -> (services expression, rollup expression); the rollup expression
+# is None for dimensions the rollup does not carry.
+_DIMENSIONS = {
+    "day": (Service.service_date, DailyServiceRollup.service_date),
+    "week": (_truncate("week", Service.service_date), _truncate("week", DailyServiceRollup.service_date)),
+    "month": (_truncate("month", Service.service_date), _truncate("month", DailyServiceRollup.service_date)),
+    "branch": (func.coalesce(Service.branch, ""), func.coalesce(Branch.branch_name, "")),
+    "service_type": (ServiceType.type_name, ServiceType.type_name),
+    "payment_status": (_payment_status(Service.payment_status), _payment_status(DailyServiceRollup.payment_status)),
+    "payment_method": (func.coalesce(cast(Service.payment_method, String), ""), DailyServiceRollup.payment_method),
+    "serviced_by_name": (Service.serviced_by_name, None),
+    "vehicle_make": (Vehicle.make, None),
+}
+
+def _ratio(numerator, denominator):
+    return func.round(numerator / func.nullif(denominator, 0), 2)
+
+_METRICS = {
+    "service_count": (func.count(Service.service_id), cast(func.sum(DailyServiceRollup.service_count), Integer)),
+    "revenue": (func.sum(Service.grand_total), func.sum(DailyServiceRollup.revenue)),
+    "labor_hours": (func.sum(Service.total_labor_hours), func.sum(DailyServiceRollup.labor_hours)),
+    "labor_cost": (func.sum(Service.total_labor_cost), func.sum(DailyServiceRollup.labor_cost)),
+    "parts_cost": (func.sum(Service.total_parts_cost), func.sum(DailyServiceRollup.parts_cost)),
+    "tax": (func.sum(Service.tax_amount), func.sum(DailyServiceRollup.tax_amount)),
+    "discount": (func.sum(Service.discount_amount), func.sum(DailyServiceRollup.discount_amount)),
+    "amount_paid": (func.sum(Service.amount_paid), func.sum(DailyServiceRollup.amount_paid)),
+    "avg_ticket": (
+        _ratio(func.sum(Service.grand_total), func.count(Service.service_id)),
+        _ratio(func.sum(DailyServiceRollup.revenue), func.sum(DailyServiceRollup.service_count)),
+    ),
+    "unique_customers": (func.count(func.distinct(Vehicle.customer_id)), None),
+    "unique_vehicles": (func.count(func.distinct(Service.vehicle_id)), None),
+}
+
+# Earlier dimension names still accepted
+DIMENSION_ALIASES = {"serviced_by": "serviced_by_name"}
+
+DIMENSIONS = list(_DIMENSIONS)
+METRICS = list(_METRICS)
+
+def _check(names: List[str], known: dict, kind: str) -> None:
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise ReportError(f"Unknown {kind}: {', '.join(unknown)}. Must be one of: {', '.join(known)}")
+    if len(set(names)) != len(names):
+        raise ReportError(f"Duplicate {kind} in request")
+
+def _number(value):
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value
+    return float(value)
+
+def run_grouped_report(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    group_by: List[str],
+    metrics: List[str],
+    branch_id: Optional[int] = None
+) -> dict:
+    """
+    Aggregate services in [start_date, end_date] (optionally one branch) by
+    the requested dimensions in a single query. Reads daily_service_rollup whenever every dimension
+    and metric can be answered from it, otherwise the services table (joining
+    vehicles only when a vehicle dimension or distinct count needs it).
+
+    Raises:
+        ReportError: unknown dimension/metric, or more than MAX_GROUPS groups
+    """
+    metrics = metrics or DEFAULT_METRICS
+    group_by = [DIMENSION_ALIASES.get(d, d) for d in group_by]
+    _check(group_by, _DIMENSIONS, "group_by dimension")
+    _check(metrics, _METRICS, "metric")
+    if start_date > end_date:
+        raise ReportError("start_date must be on or before end_date")
+
+    use_rollup = all(_DIMENSIONS[d][1] is not None for d in group_by) and all(
+        _METRICS[m][1] is not None for m in metrics
+    )
+    source = 1 if use_rollup else 0
+
+    dimension_columns = [_DIMENSIONS[d][source].label(d) for d in group_by]
+    metric_columns = [_METRICS[m][source].label(m) for m in metrics]
+    stmt = select(*dimension_columns, *metric_columns)
+
+    if use_rollup:
+        stmt = stmt.select_from(DailyServiceRollup).where(
+            DailyServiceRollup.service_date >= start_date,
+            DailyServiceRollup.service_date <= end_date,
+            # Keys emptied by payment status changes keep a zero row
+            DailyServiceRollup.service_count != 0
+        )
+        if branch_id is not None:
+            stmt = stmt.where(rollup_branch_filter(branch_id))
+        if "branch" in group_by:
+            stmt = stmt.outerjoin(Branch, Branch.branch_id == DailyServiceRollup.branch_id)
+        if "service_type" in group_by:
+            stmt = stmt.join(ServiceType, ServiceType.service_type_id == DailyServiceRollup.service_type_id)
+    else:
+        stmt = stmt.select_from(Service).where(
+            Service.service_date >= start_date,
+            Service.service_date <= end_date
+        )
+        if branch_id is not None:
+            stmt = stmt.where(Service.branch_id == branch_id)
+        if "vehicle_make" in group_by or "unique_customers" in metrics:
+            stmt = stmt.join(Vehicle, Vehicle.vehicle_id == Service.vehicle_id)
+        if "service_type" in group_by:
+            stmt = stmt.join(ServiceType, ServiceType.service_type_id == Service.service_type_id)
+
+    if group_by:
+        dimensions = [_DIMENSIONS[d][source] for d in group_by]
+        stmt = stmt.group_by(*dimensions).order_by(*dimensions)
+    stmt = stmt.limit(MAX_GROUPS + 1)
+
+    rows = db.execute(stmt).all()
+    if len(rows) > MAX_GROUPS:
+        raise ReportError(
+            f"Report has more than {MAX_GROUPS} groups; narrow the date range or use fewer dimensions"
+        )
+
+    return {
+        "start_date": str(start_date),
+        "end_date": str(end_date),
+        "group_by": group_by,
+        "metrics": metrics,
+        "source": "rollup" if use_rollup else "services",
+        "rows": [
+            {
+                **{d: getattr(row, d) for d in group_by},
+                **{m: _number(getattr(row, m)) for m in metrics},
+            }
+            for row in rows
+        ],
+    }
@@ -0,0 +1,102 @@
+from decimal import Decimal
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+from app.models.part import PartInventory, StockMovement
+from app.services.checklist_matching import refresh_part_matches
+
+INSPECTION_PART_CODE = "INSPECTION"
+
+# part_id of the shared inspection placeholder part, resolved once per process.
+# Only ids read back from the database are cached, so a rolled-back insert
+# never leaves a dangling id behind.
+_inspection_part_id = None
+
+def get_inspection_part_id(db: Session) -> int:
+    """
+    Get the part_id of the generic "Inspection" part used for checklist items
+    that were checked without a real part, creating it on first use.
+    """
+    global _inspection_part_id
+    if _inspection_part_id is not None:
+        return _inspection_part_id
+
+    part_id = db.query(PartInventory.part_id).filter(
+        PartInventory.part_code == INSPECTION_PART_CODE
+    ).scalar()
+    if part_id is not None:
+        _inspection_part_id = part_id
+        return part_id
+
+    inspection_part = PartInventory(
+        part_code=INSPECTION_PART_CODE,
+        part_name="Inspection Service",
+        description="Generic inspection service for checklist items",
+        category="Other",
+        unit_price=Decimal("0.00"),
+        cost_price=Decimal("0.00"),
+        stock_quantity=999999,
+        min_stock_level=0,
+        is_active=True
+    )
+    db.add(inspection_part)
+    db.flush()
+    refresh_part_matches(db, inspection_part.part_id)
+    return inspection_part.part_id
+
+def decrement_stock(db: Session, quantities: dict, service_id: int = None) -> None:
+    """
+    Take parts out of stock for a service and record each change in the
+    stock_movements ledger.
+
+    Rows are locked in part_id order before the update so concurrent services
+    touching the same parts serialize instead of deadlocking, then all parts
+    are decremented by one UPDATE ... FROM (VALUES ...) whose RETURNING rows
+    feed the ledger insert in the same statement.
+
+    Args:
+        db: Database session
+        quantities: Mapping of part_id -> quantity to take out of stock
+        service_id: Service the parts were used for (recorded in the ledger)
+    """
+    items = sorted((part_id, qty) for part_id, qty in quantities.items() if qty)
+    if not items:
+        return
+
+    params = {"service_id": service_id}
+    rows = []
+    for i, (part_id, qty) in enumerate(items):
+        params[f"part_id_{i}"] = part_id
+        params[f"quantity_{i}"] = qty
+        rows.append(f"(:part_id_{i}, :quantity_{i})")
+
+    db.execute(
+        select(PartInventory.part_id).where(
+            PartInventory.part_id.in_([part_id for part_id, _ in items])
+        ).order_by(PartInventory.part_id).with_for_update()
+    )
+
+    db.execute(text(f"""
+        WITH updated AS (
+            UPDATE parts_inventory AS p
+            SET stock_quantity = p.stock_quantity - v.quantity,
+                updated_at = CURRENT_TIMESTAMP
+            FROM (VALUES {", ".join(rows)}) AS v(part_id, quantity)
+            WHERE p.part_id = v.part_id
+            RETURNING p.part_id, v.quantity, p.stock_quantity
+        )
+        INSERT INTO stock_movements (part_id, service_id, movement_type, quantity_change, quantity_after)
+        SELECT part_id, :service_id, 'SERVICE_USAGE', -quantity, stock_quantity
+        FROM updated
+    """), params)
+
+def record_stock_adjustment(db: Session, part: PartInventory, quantity_before: int) -> None:
+    """Record a manual stock change (e.g. from the parts screen) in the ledger."""
+    change = (part.stock_quantity or 0) - (quantity_before or 0)
+    if change == 0:
+        return
+    db.add(StockMovement(
+        part_id=part.part_id,
+        movement_type="ADJUSTMENT",
+        quantity_change=change,
+        quantity_after=part.stock_quantity
+    ))
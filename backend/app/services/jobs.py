@@ -0,0 +1,318 @@
+import csv
+import json
+import os
+import threading
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+import pyarrow.parquet as pq
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.job import BackgroundJob
+from app.services.grouped_reports import run_grouped_report
+from app.services.revenue_analytics import compute_revenue_trends
+from app.services.parquet_export import export_table, EXPORT_TABLES, arrow_schema
+
+# Heavy reports and exports run here, in scripts/job_worker.py, instead of
+# inside the HTTP request. The API enqueues a background_jobs row and returns
+# its id; a worker claims it with FOR UPDATE SKIP LOCKED, reports progress on
+# the row and stores the result (JSON on the row, or a file for exports).
+
+JOB_RESULT_DIR = os.getenv("JOB_RESULT_DIR", "job_results")
+# Per-statement limit inside a job, instead of the API's 30s statement_timeout
+JOB_STATEMENT_TIMEOUT = os.getenv("JOB_STATEMENT_TIMEOUT", "30min")
+HEARTBEAT_INTERVAL = 30
+# A running job without a heartbeat for this long lost its worker; it is
+# requeued, or failed once it has been tried MAX_ATTEMPTS times
+STALE_AFTER = timedelta(minutes=5)
+MAX_ATTEMPTS = 3
+# Finished jobs (and their result files) are purged after this long
+JOB_RETENTION = timedelta(days=7)
+
+class JobError(ValueError):
+    """Unknown job type or invalid job parameters."""
+
+_HANDLERS = {}
+
+def job_handler(job_type: str):
+    """Register a function(db, params, context) -> dict as the handler for job_type."""
+    def register(handler):
+        _HANDLERS[job_type] = handler
+        return handler
+    return register
+
+def _owned_by(job_id: int, worker_id: str) -> list:
+    # The job is still this worker's claim: not requeued as stale and handed
+    # to another worker meanwhile
+    return [
+        BackgroundJob.job_id == job_id,
+        BackgroundJob.status == "running",
+        BackgroundJob.worker_id == worker_id,
+    ]
+
+def _update_running_job(job_id: int, worker_id: str, **values) -> None:
+    # Own short transaction, so progress is visible while the job's work
+    # transaction is still open
+    db = SessionLocal()
+    try:
+        db.execute(update(BackgroundJob).where(*_owned_by(job_id, worker_id)).values(**values))
+        db.commit()
+    finally:
+        db.close()
+
+class JobContext:
+    """Handed to job handlers for progress reporting and result files."""
+
+    def __init__(self, job_id: int, worker_id: str):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.file = None
+        self._last_progress = None
+
+    def progress(self, percent: Optional[int], message: Optional[str] = None) -> None:
+        """Record progress (percent None keeps the current value)."""
+        values = {"progress_message": message, "heartbeat_at": func.now()}
+        if percent is not None:
+            values["progress"] = max(0, min(100, int(percent)))
+        if (values.get("progress"), message) == self._last_progress:
+            return
+        self._last_progress = (values.get("progress"), message)
+        _update_running_job(self.job_id, self.worker_id, **values)
+
+    def result_path(self, extension: str) -> str:
+        os.makedirs(JOB_RESULT_DIR, exist_ok=True)
+        # Unique per run: a requeued job may be running on two workers at once
+        return os.path.join(JOB_RESULT_DIR, f"job_{self.job_id}_{uuid.uuid4().hex[:8]}.{extension}")
+
+    def attach_file(self, path: str, media_type: str, filename: str) -> None:
+        """Make path the job's downloadable result."""
+        self.file = (path, media_type, filename)
+
+def _json_params(params: dict) -> dict:
+    return {name: value.isoformat() if isinstance(value, date) else value for name, value in params.items()}
+
+def _date(value: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(value) if value else None
+
+def enqueue_job(db: Session, job_type: str, params: dict, created_by: Optional[str] = None) -> BackgroundJob:
+    """Queue a job and commit; the caller returns job.job_id to the client."""
+    if job_type not in _HANDLERS:
+        raise JobError(f"Unknown job type: {job_type}. Must be one of: {', '.join(_HANDLERS)}")
+    job = BackgroundJob(job_type=job_type, params=_json_params(params), created_by=created_by)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def describe_job(job: BackgroundJob) -> dict:
+    return {
+        "job_id": job.job_id,
+        "job_type": job.job_type,
+        "params": job.params,
+        "status": job.status,
+        "progress": job.progress,
+        "progress_message": job.progress_message,
+        "error": job.error,
+        "has_file": job.result_path is not None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+def requeue_stale_jobs(db: Session) -> int:
+    """Requeue (or fail, after MAX_ATTEMPTS) running jobs whose worker stopped heartbeating."""
+    stale = [
+        BackgroundJob.status == "running",
+        BackgroundJob.heartbeat_at < func.now() - STALE_AFTER,
+    ]
+    failed = db.execute(
+        update(BackgroundJob).where(*stale, BackgroundJob.attempts >= MAX_ATTEMPTS).values(
+            status="failed",
+            error=f"Worker stopped responding ({MAX_ATTEMPTS} attempts)",
+            finished_at=func.now()
+        )
+    ).rowcount
+    requeued = db.execute(
+        update(BackgroundJob).where(*stale).values(status="queued", worker_id=None)
+    ).rowcount
+    db.commit()
+    return failed + requeued
+
+def claim_next_job(db: Session, worker_id: str) -> Optional[int]:
+    """
+    Atomically claim the oldest queued job for worker_id. SKIP LOCKED lets
+    concurrent workers pass over a row another worker is claiming instead of
+    waiting on it, so each job is claimed exactly once.
+    """
+    next_job = select(BackgroundJob.job_id).where(
+        BackgroundJob.status == "queued"
+    ).order_by(
+        BackgroundJob.created_at, BackgroundJob.job_id
+    ).limit(1).with_for_update(skip_locked=True).scalar_subquery()
+
+    job_id = db.execute(
+        update(BackgroundJob).where(BackgroundJob.job_id == next_job).values(
+            status="running",
+            worker_id=worker_id,
+            attempts=BackgroundJob.attempts + 1,
+            progress=0,
+            progress_message=None,
+            started_at=func.now(),
+            heartbeat_at=func.now()
+        ).returning(BackgroundJob.job_id)
+    ).scalar()
+    db.commit()
+    return job_id
+
+def _heartbeat(job_id: int, worker_id: str, stop: threading.Event) -> None:
+    while not stop.wait(HEARTBEAT_INTERVAL):
+        try:
+            _update_running_job(job_id, worker_id, heartbeat_at=func.now())
+        except Exception as e:
+            print(f"[Jobs] Heartbeat failed for job {job_id}: {str(e)}")
+
+def _discard_file(context: JobContext) -> None:
+    if context.file and os.path.exists(context.file[0]):
+        os.remove(context.file[0])
+
+def run_job(job_id: int, worker_id: str) -> str:
+    """
+    Run a job claimed by worker_id. The handler's writes and the job's final
+    status commit in one transaction; a failing handler is rolled back and
+    the job marked failed. If the job is no longer this worker's running
+    claim (requeued as stale meanwhile), everything is rolled back and
+    "lost" returned. Returns the final status.
+    """
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job_id, worker_id, stop), daemon=True)
+    heartbeat.start()
+    context = JobContext(job_id, worker_id)
+    db = SessionLocal()
+    try:
+        job = db.get(BackgroundJob, job_id)
+        try:
+            handler = _HANDLERS.get(job.job_type)
+            if handler is None:
+                raise JobError(f"Unknown job type: {job.job_type}")
+            db.execute(
+                text("SELECT set_config('statement_timeout', :timeout, true)"),
+                {"timeout": JOB_STATEMENT_TIMEOUT}
+            )
+            result = handler(db, dict(job.params), context)
+        except Exception as e:
+            db.rollback()
+            _discard_file(context)
+            failed = db.execute(
+                update(BackgroundJob).where(*_owned_by(job_id, worker_id)).values(
+                    status="failed", error=str(e) or type(e).__name__, finished_at=func.now()
+                )
+            ).rowcount
+            db.commit()
+            return "failed" if failed else "lost"
+
+        values = {
+            "status": "succeeded",
+            "progress": 100,
+            "progress_message": None,
+            "result": jsonable_encoder(result),
+            "finished_at": func.now(),
+        }
+        if context.file:
+            values["result_path"], values["result_media_type"], values["result_filename"] = context.file
+        if not db.execute(update(BackgroundJob).where(*_owned_by(job_id, worker_id)).values(**values)).rowcount:
+            # Another worker owns the job now; its run is the one that counts
+            db.rollback()
+            _discard_file(context)
+            return "lost"
+        db.commit()
+        return "succeeded"
+    finally:
+        stop.set()
+        db.close()
+
+def purge_expired_jobs(db: Session) -> int:
+    """Delete finished jobs older than JOB_RETENTION together with their result files."""
+    expired = [
+        BackgroundJob.status.in_(["succeeded", "failed"]),
+        BackgroundJob.finished_at < datetime.now(timezone.utc) - JOB_RETENTION,
+    ]
+    paths = db.execute(
+        select(BackgroundJob.result_path).where(*expired, BackgroundJob.result_path.isnot(None))
+    ).scalars().all()
+    deleted = db.execute(delete(BackgroundJob).where(*expired)).rowcount
+    db.commit()
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+    return deleted
+
+@job_handler("grouped_report")
+def _grouped_report_job(db: Session, params: dict, context: JobContext) -> dict:
+    context.progress(None, "Aggregating services")
+    return run_grouped_report(
+        db,
+        _date(params["start_date"]),
+        _date(params["end_date"]),
+        group_by=params.get("group_by", []),
+        metrics=params.get("metrics", []),
+        branch_id=params.get("branch_id")
+    )
+
+@job_handler("revenue_trends")
+def _revenue_trends_job(db: Session, params: dict, context: JobContext) -> dict:
+    context.progress(None, "Computing revenue trends")
+    return compute_revenue_trends(db, _date(params["start_date"]), _date(params["end_date"]), params.get("branch_id"))
+
+@job_handler("payments_export")
+def _payments_export_job(db: Session, params: dict, context: JobContext) -> dict:
+    from app.routes.accountant import _export_statement, _export_record, EXPORT_COLUMNS, EXPORT_BATCH_SIZE
+
+    export_format = params.get("format", "csv")
+    stmt = _export_statement(
+        _date(params.get("start_date")),
+        _date(params.get("end_date")),
+        params.get("payment_status"),
+        params.get("branch_id")
+    )
+    total = db.execute(select(func.count()).select_from(stmt.order_by(None).subquery())).scalar()
+
+    path = context.result_path(export_format)
+    context.attach_file(
+        path,
+        "text/csv" if export_format == "csv" else "application/x-ndjson",
+        f"payments_{params.get('start_date') or 'all'}_{params.get('end_date') or 'all'}.{export_format}"
+    )
+    written = 0
+    with open(path, "w", newline="") as output:
+        writer = csv.DictWriter(output, fieldnames=EXPORT_COLUMNS)
+        if export_format == "csv":
+            writer.writeheader()
+        for rows in db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE)).partitions():
+            if export_format == "csv":
+                writer.writerows(_export_record(row) for row in rows)
+            else:
+                output.writelines(json.dumps(_export_record(row)) + "\n" for row in rows)
+            written += len(rows)
+            context.progress(written * 100 // total if total else 100, f"{written} of {total} rows")
+    return {"rows": written}
+
+@job_handler("parquet_export")
+def _parquet_export_job(db: Session, params: dict, context: JobContext) -> dict:
+    table_name = params["table_name"]
+    path = context.result_path("parquet")
+    context.attach_file(path, "application/vnd.apache.parquet", f"{table_name}.parquet")
+    result = export_table(
+        db,
+        table_name,
+        path,
+        consumer=params.get("consumer"),
+        since=params.get("since"),
+        on_batch=lambda rows: context.progress(None, f"{rows} rows written")
+    )
+    if not result["rows"]:
+        # Nothing new: still a valid (empty) file with the schema
+        model, _ = EXPORT_TABLES[table_name]
+        pq.write_table(arrow_schema(model.__table__).empty_table(), path)
+    return result
@@ -1,4 +1,5 @@
 from datetime import date, datetime, timedelta
+from sqlalchemy import and_, func, or_, select, true
 from sqlalchemy.orm import Session
 from typing import List
 from app.models.customer import Customer
@@ -7,17 +8,130 @@ from app.models.service import Service, ServiceType
 from app.models.notification import Notification
 from app.services.email_service import email_service
 
+# Vehicles are fetched and notified this many at a time, each chunk in its
+# own transaction
+REMINDER_CHUNK_SIZE = 500
+# A vehicle reminded within this window is not reminded again
+REMINDER_COOLDOWN = timedelta(days=7)
+
+def _due_vehicles_query(today: date, days_before: int, mileage_threshold: float):
+    """
+    One set-based query for every vehicle that needs a reminder: active
+    customer, due by mileage or by time (last service + interval months * 30
+    days within days_before), and no Service Reminder in REMINDER_COOLDOWN.
+
+    The latest service per vehicle comes from a LATERAL probe of
+    idx_services_vehicle_date and the notification check is an anti-join
+    (NOT EXISTS) on idx_notifications_vehicle_type_created.
+    """
+    last_service = select(
+        Service.service_date,
+        Service.service_type_id
+    ).where(
+        Service.vehicle_id == Vehicle.vehicle_id
+    ).order_by(
+        Service.service_date.desc(),
+        Service.service_id.desc()
+    ).limit(1).lateral("last_service")
+
+    mileage_remaining = Vehicle.next_service_mileage - Vehicle.current_mileage
+    next_service_date = last_service.c.service_date + ServiceType.time_interval_months * 30
+    mileage_due = mileage_remaining <= mileage_threshold
+    time_due = and_(
+        ServiceType.time_interval_months.isnot(None),
+        next_service_date >= today,
+        next_service_date <= today + timedelta(days=days_before)
+    )
+    recently_notified = select(Notification.notification_id).where(
+        Notification.customer_id == Vehicle.customer_id,
+        Notification.vehicle_id == Vehicle.vehicle_id,
+        Notification.notification_type == "Service Reminder",
+        Notification.created_at >= datetime.now() - REMINDER_COOLDOWN
+    ).exists()
+
+    return select(
+        Vehicle.vehicle_id,
+        Vehicle.customer_id,
+        Vehicle.make,
+        Vehicle.model,
+        Vehicle.license_plate,
+        Vehicle.current_mileage,
+        Vehicle.next_service_mileage,
+        Customer.first_name,
+        Customer.last_name,
+        Customer.email,
+    ).join(
+        Customer, Customer.customer_id == Vehicle.customer_id
+    ).outerjoin(
+        last_service, true()
+    ).outerjoin(
+        ServiceType, ServiceType.service_type_id == last_service.c.service_type_id
+    ).where(
+        Customer.is_active == True,
+        or_(mileage_due, time_due),
+        ~recently_notified
+    ).order_by(Vehicle.vehicle_id)
+
+def _notify_chunk(db: Session, vehicles: list, stats: dict) -> None:
+    notifications = []
+    messages = []
+    for vehicle in vehicles:
+        mileage_remaining = float(vehicle.next_service_mileage) - float(vehicle.current_mileage)
+
+        # Create notification record
+        notification = Notification(
+            customer_id=vehicle.customer_id,
+            vehicle_id=vehicle.vehicle_id,
+            notification_type="Service Reminder",
+            channel="Email",
+            subject=f"Service Reminder: {vehicle.make} {vehicle.model} ({vehicle.license_plate})",
+            message=f"Your vehicle {vehicle.make} {vehicle.model} ({vehicle.license_plate}) is due for service. Current mileage: {vehicle.current_mileage:,.0f} km, Next service: {vehicle.next_service_mileage:,.0f} km.",
+            status="Pending",
+            scheduled_for=datetime.now()
+        )
+        db.add(notification)
+        notifications.append(notification)
+        stats["notifications_created"] += 1
+
+        messages.append(email_service.service_reminder_message(
+            customer_name=f"{vehicle.first_name} {vehicle.last_name}",
+            customer_email=vehicle.email,
+            vehicle_make=vehicle.make,
+            vehicle_model=vehicle.model,
+            license_plate=vehicle.license_plate,
+            current_mileage=float(vehicle.current_mileage),
+            next_service_mileage=float(vehicle.next_service_mileage),
+            mileage_remaining=mileage_remaining
+        ))
+
+    # Send the chunk's emails over reused SMTP connections
+    for notification, email_sent in zip(notifications, email_service.send_batch(messages)):
+        if email_sent:
+            notification.status = "Sent"
+            notification.sent_at = datetime.now()
+            stats["emails_sent"] += 1
+        else:
+            notification.status = "Failed"
+            stats["emails_failed"] += 1
+
 def check_and_send_service_reminders(db: Session, days_before: int = 3, mileage_threshold: float = 500) -> dict:
     """
     Check for vehicles due for service and send email notifications.
     
+    The due vehicles (not reminded in the last 7 days) come from one
+    set-based query, read in keyset chunks of REMINDER_CHUNK_SIZE by
+    vehicle_id; each chunk's notifications are committed before the next
+    chunk is fetched, so no transaction stays open for the whole run. A
+    chunk's emails go out through email_service.send_batch.
+    
     Args:
         db: Database session
         days_before: Number of days before service to send reminder (default: 3)
         mileage_threshold: Mileage threshold in km to consider service due (default: 500)
         
     Returns:
-        Dictionary with statistics about notifications sent
+        Dictionary with statistics about notifications sent; "due" counts
+        the vehicles reminded in this run
     """
     stats = {
         "checked": 0,
@@ -28,92 +142,28 @@ def check_and_send_service_reminders(db: Session, days_before: int = 3, mileage_
     }
 
     try:
-        # Get all active customers with vehicles
-        customers = db.query(Customer).filter(Customer.is_active == True).all()
-        
-        for customer in customers:
-            # Get all vehicles for this customer
-            vehicles = db.query(Vehicle).filter(Vehicle.customer_id == customer.customer_id).all()
-            
-            for vehicle in vehicles:
-                stats["checked"] += 1
-                
-                # Check if vehicle is due for service
-                is_due = False
-                mileage_remaining = float(vehicle.next_service_mileage) - float(vehicle.current_mileage)
-                
-                # Check mileage-based due
-                if mileage_remaining <= mileage_threshold:
-                    is_due = True
-                
-                # Check time-based due
-                last_service = db.query(Service).filter(
-                    Service.vehicle_id == vehicle.vehicle_id
-                ).order_by(Service.service_date.desc()).first()
-                
-                if last_service and last_service.service_type_id:
-                    service_type = db.query(ServiceType).filter(
-                        ServiceType.service_type_id == last_service.service_type_id
-                    ).first()
-                    
-                    if service_type and service_type.time_interval_months:
-                        # Calculate next service date based on last service
-                        next_service_date = last_service.service_date + timedelta(
-                            days=service_type.time_interval_months * 30
-                        )
-                        days_until_service = (next_service_date - date.today()).days
-                        
-                        if days_until_service <= days_before and days_until_service >= 0:
-                            is_due = True
-                
-                if is_due:
-                    stats["due"] += 1
-                    
-                    # Check if we already sent a notification recently (within last 7 days)
-                    recent_notification = db.query(Notification).filter(
-                        Notification.customer_id == customer.customer_id,
-                        Notification.vehicle_id == vehicle.vehicle_id,
-                        Notification.notification_type == "Service Reminder",
-                        Notification.created_at >= datetime.now() - timedelta(days=7)
-                    ).first()
-                    
-                    if not recent_notification:
-                        # Create notification record
-                        notification = Notification(
-                            customer_id=customer.customer_id,
-                            vehicle_id=vehicle.vehicle_id,
-                            notification_type="Service Reminder",
-                            channel="Email",
-                            subject=f"Service Reminder: {vehicle.make} {vehicle.model} ({vehicle.license_plate})",
-                            message=f"Your vehicle {vehicle.make} {vehicle.model} ({vehicle.license_plate}) is due for service. Current mileage: {vehicle.current_mileage:,.0f} km, Next service: {vehicle.next_service_mileage:,.0f} km.",
-                            status="Pending",
-                            scheduled_for=datetime.now()
-                        )
-                        db.add(notification)
-                        stats["notifications_created"] += 1
-                        
-                        # Send email
-                        customer_name = f"{customer.first_name} {customer.last_name}"
-                        email_sent = email_service.send_service_reminder(
-                            customer_name=customer_name,
-                            customer_email=customer.email,
-                            vehicle_make=vehicle.make,
-                            vehicle_model=vehicle.model,
-                            license_plate=vehicle.license_plate,
-                            current_mileage=float(vehicle.current_mileage),
-                            next_service_mileage=float(vehicle.next_service_mileage),
-                            mileage_remaining=mileage_remaining
-                        )
-                        
-                        if email_sent:
-                            notification.status = "Sent"
-                            notification.sent_at = datetime.now()
-                            stats["emails_sent"] += 1
-                        else:
-                            notification.status = "Failed"
-                            stats["emails_failed"] += 1
-        
-        db.commit()
+        stats["checked"] = db.execute(
+            select(func.count(Vehicle.vehicle_id)).join(
+                Customer, Customer.customer_id == Vehicle.customer_id
+            ).where(Customer.is_active == True)
+        ).scalar()
+
+        due_vehicles = _due_vehicles_query(date.today(), days_before, mileage_threshold)
+        last_vehicle_id = 0
+        while True:
+            chunk = db.execute(
+                due_vehicles.where(Vehicle.vehicle_id > last_vehicle_id).limit(REMINDER_CHUNK_SIZE)
+            ).all()
+            if not chunk:
+                break
+
+            stats["due"] += len(chunk)
+            _notify_chunk(db, chunk, stats)
+
+            db.commit()
+            last_vehicle_id = chunk[-1].vehicle_id
+            if len(chunk) < REMINDER_CHUNK_SIZE:
+                break
         
     except Exception as e:
         db.rollback()
@@ -0,0 +1,228 @@
+import os
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Boolean, Date, DateTime, Integer, Numeric, String, Text, Time, cast, func, literal, literal_column, select, text
+from sqlalchemy.types import UserDefinedType
+from sqlalchemy.orm import Session
+from app.models.service import Service, ServicePart, ServicePayment, Appointment
+from app.models.proforma import Proforma, ProformaItem
+from app.models.export import ExportWatermark
+
+DEFAULT_ROW_GROUP_SIZE = 50000
+
+# Incremental exports are cut at a transaction snapshot (txid_current_snapshot)
+# taken when the export starts: only rows whose writing transaction is visible
+# in it are exported, and a consumer's next export skips rows that were
+# already visible in the snapshot it stored, so no row version is exported
+# twice. Rows committed later are picked up next time through the rescan
+# below the watermark:
+# - timestamp watermarks (created_at/updated_at are the writing transaction's
+#   start time) restart at the start of the oldest transaction still open at
+#   the snapshot, read from pg_stat_activity; writers must use the exporter's
+#   database role (or it needs pg_read_all_stats) for their start to be seen;
+# - serial ids are allocated before commit, so id watermarks rescan this many
+#   ids below the highest one exported; a row committed after more ids than
+#   that were used by others is missed.
+ID_RESCAN_WINDOW = 1000
+
+_SNAPSHOT_STATE = """
+    SELECT
+        CAST(txid_current_snapshot() AS TEXT),
+        LEAST(statement_timestamp(), (
+            SELECT MIN(xact_start) FROM pg_stat_activity
+            WHERE datname = current_database() AND pid <> pg_backend_pid()
+        ))
+"""
+
+def _row_xid(table, reference: int):
+    # 64-bit id of the transaction that wrote the row version, from its
+    # 32-bit xmin and the snapshot's xmax (live xids are within 2^31 of it)
+    return literal_column(
+        f"({reference} - (({reference} % 4294967296) - CAST(CAST({table.name}.xmin AS TEXT) AS BIGINT)"
+        " + 4294967296) % 4294967296)"
+    )
+
+def _visible_in(xid, snapshot: str):
+    return func.txid_visible_in_snapshot(xid, cast(literal(snapshot), TXID_SNAPSHOT))
+
+# Exportable table -> (model, watermark column). Tables without a timestamp
+# use their serial primary key as the watermark. services uses updated_at, so
+# payment and total changes are exported again.
+EXPORT_TABLES = {
+    "services": (Service, Service.updated_at),
+    "service_parts": (ServicePart, ServicePart.service_part_id),
+    "service_payments": (ServicePayment, ServicePayment.payment_id),
+    "appointments": (Appointment, Appointment.updated_at),
+    "proformas": (Proforma, Proforma.updated_at),
+    "proforma_items": (ProformaItem, ProformaItem.proforma_item_id),
+}
+
+class _TxidSnapshot(UserDefinedType):
+    cache_ok = True
+
+    def get_col_spec(self):
+        return "txid_snapshot"
+
+TXID_SNAPSHOT = _TxidSnapshot()
+
+class ExportError(ValueError):
+    """Unknown table or invalid watermark."""
+
+def _arrow_type(column) -> pa.DataType:
+    sa_type = column.type
+    if isinstance(sa_type, Numeric):
+        return pa.decimal128(sa_type.precision or 38, sa_type.scale or 0)
+    if isinstance(sa_type, Boolean):
+        return pa.bool_()
+    if isinstance(sa_type, Integer):
+        return pa.int64()
+    if isinstance(sa_type, DateTime):
+        return pa.timestamp("us", tz="UTC") if sa_type.timezone else pa.timestamp("us")
+    if isinstance(sa_type, Date):
+        return pa.date32()
+    if isinstance(sa_type, Time):
+        return pa.time64("us")
+    if isinstance(sa_type, (String, Text)):
+        return pa.string()
+    return pa.string()
+
+def arrow_schema(table) -> pa.Schema:
+    return pa.schema([pa.field(c.name, _arrow_type(c), nullable=True) for c in table.columns])
+
+def _parse_watermark(watermark_column, value: str):
+    if isinstance(watermark_column.type, DateTime):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            raise ExportError(f"Invalid timestamp watermark: {value}")
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    try:
+        return int(value)
+    except ValueError:
+        raise ExportError(f"Invalid id watermark: {value}")
+
+def _format_watermark(value) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+def export_table(
+    db: Session,
+    table_name: str,
+    output_path: str,
+    consumer: Optional[str] = None,
+    since: Optional[str] = None,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    on_batch: Optional[Callable[[int], None]] = None
+) -> dict:
+    """
+    Export one table to a Parquet file, one row group per batch read from a
+    server-side cursor, so memory is bounded by row_group_size. Decimal
+    columns keep their precision and scale.
+
+    Incremental: with a consumer, rows after that consumer's stored watermark
+    are exported and the watermark and snapshot are advanced (not committed;
+    the caller commits once the file is safely written). Rows the previous
+    export already saw are skipped, so each row version is exported once.
+    since overrides the stored watermark; rows from since on are exported
+    again, so since-based consumers upsert on the primary key. Without
+    either, the whole table is exported. on_batch is called with the running
+    row count after each row group.
+
+    Returns:
+        Dictionary with table, rows, path, watermark_from and watermark_to
+    """
+    if table_name not in EXPORT_TABLES:
+        raise ExportError(f"Unknown table: {table_name}. Must be one of: {', '.join(EXPORT_TABLES)}")
+    model, watermark_column = EXPORT_TABLES[table_name]
+    table = model.__table__
+
+    state = None
+    if consumer:
+        state = db.get(ExportWatermark, (consumer, table_name))
+    lower = since if since is not None else (state.watermark if state else None)
+
+    by_time = isinstance(watermark_column.type, DateTime)
+    stmt = select(*table.columns)
+    incremental = consumer is not None or since is not None
+    if incremental:
+        snapshot, oldest_open = db.execute(text(_SNAPSHOT_STATE)).one()
+        xid = _row_xid(table, int(snapshot.split(":")[1]))
+        stmt = stmt.where(_visible_in(xid, snapshot))
+        if since is None and state is not None and state.snapshot:
+            stmt = stmt.where(~_visible_in(xid, state.snapshot))
+    if lower is not None:
+        bound = _parse_watermark(watermark_column, lower)
+        if since is None and not by_time:
+            bound = max(0, bound - ID_RESCAN_WINDOW)
+        # Timestamps restart at an open transaction's start, so >= here
+        stmt = stmt.where(watermark_column >= bound if by_time else watermark_column > bound)
+    stmt = stmt.order_by(watermark_column).execution_options(yield_per=row_group_size)
+
+    schema = arrow_schema(table)
+    watermark_index = list(table.columns.keys()).index(watermark_column.key)
+    row_count = 0
+    upper = None
+    writer = None
+    try:
+        for rows in db.execute(stmt).partitions():
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, schema, compression="snappy")
+            columns = list(zip(*rows))
+            batch = pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            )
+            writer.write_table(batch, row_group_size=row_group_size)
+            row_count += len(rows)
+            upper = rows[-1][watermark_index]
+            if on_batch:
+                on_batch(row_count)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if by_time and incremental:
+        # Transactions open at the snapshot may still commit rows stamped
+        # with their start time; the next export rescans from there
+        upper = oldest_open
+    elif upper is not None and lower is not None and not by_time:
+        # Re-read ids never move the watermark backwards
+        upper = max(upper, _parse_watermark(watermark_column, lower))
+    watermark_to = _format_watermark(upper) if upper is not None else lower
+    if consumer and watermark_to is not None:
+        if state is None:
+            state = ExportWatermark(consumer=consumer, table_name=table_name, watermark=watermark_to)
+            db.add(state)
+        state.watermark = watermark_to
+        state.snapshot = snapshot
+        state.row_count = row_count
+
+    return {
+        "table": table_name,
+        "rows": row_count,
+        "path": output_path if row_count else None,
+        "watermark_from": lower,
+        "watermark_to": watermark_to,
+    }
+
+def export_tables(
+    db: Session,
+    output_dir: str,
+    tables: Optional[Iterable[str]] = None,
+    consumer: Optional[str] = None,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE
+) -> list:
+    """
+    Export several tables into output_dir/<table>/<table>_<UTC timestamp>.parquet,
+    committing each table's watermark after its file is written.
+    """
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    results = []
+    for table_name in tables or EXPORT_TABLES:
+        table_dir = os.path.join(output_dir, table_name)
+        os.makedirs(table_dir, exist_ok=True)
+        output_path = os.path.join(table_dir, f"{table_name}_{stamp}.parquet")
+        results.append(export_table(db, table_name, output_path, consumer=consumer, row_group_size=row_group_size))
+        db.commit()
+    return results
@@ -0,0 +1,217 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Optional
+from sqlalchemy import cast, func, Date
+from sqlalchemy.orm import Session
+from app.models.service import Service, ServicePayment
+
+# Values of the payment_method enum; anything else fails the enum cast
+PAYMENT_METHODS = ["Cash", "Card", "Mobile Payment", "Bank Transfer"]
+
+class PaymentError(ValueError):
+    """Invalid payment (unknown service, zero amount, paid total out of range)."""
+
+def derive_payment_status(amount_paid: Decimal, grand_total: Decimal, current_status: Optional[str]) -> str:
+    """Payment status implied by the paid total; free services stay free."""
+    if current_status == "Free Service":
+        return current_status
+    if amount_paid <= 0:
+        return "Pending"
+    if amount_paid >= (grand_total or 0):
+        return "Paid"
+    return "Partial"
+
+def _lock_service(db: Session, service_id: int) -> Optional[Service]:
+    # Callers often hold the Service already; populate_existing makes its
+    # attributes the ones read under the lock. Pending changes are flushed
+    # first so the reload does not discard them.
+    db.flush()
+    return db.query(Service).filter(
+        Service.service_id == service_id
+    ).with_for_update().populate_existing().first()
+
+def record_payment(
+    db: Session,
+    service_id: int,
+    amount: Decimal,
+    payment_method: Optional[str] = None,
+    paid_at: Optional[datetime] = None,
+    reference_number: Optional[str] = None,
+    notes: Optional[str] = None,
+    recorded_by: Optional[str] = None
+) -> ServicePayment:
+    """
+    Append a ledger entry (negative amounts reverse earlier payments) and move
+    the service's amount_paid and payment_status with it.
+
+    The service row is locked and re-read first (even when the caller already
+    loaded it), so concurrent payments and status changes on one service are
+    applied one after another and each entry's running_paid is exact.
+    The rollup, customer summaries and report cache follow through the usual
+    flush hooks. Does not commit.
+
+    Raises:
+        PaymentError: unknown service, zero amount, unknown payment method,
+            or a paid total that would drop below zero
+    """
+    amount = Decimal(str(amount))
+    if amount == 0:
+        raise PaymentError("Payment amount must not be zero")
+    if payment_method and payment_method not in PAYMENT_METHODS:
+        raise PaymentError(f"Invalid payment method. Must be one of: {', '.join(PAYMENT_METHODS)}")
+
+    service = _lock_service(db, service_id)
+    if not service:
+        raise PaymentError("Service not found")
+
+    running_paid = (service.amount_paid or Decimal("0")) + amount
+    if running_paid < 0:
+        raise PaymentError(f"Reversal exceeds the {service.amount_paid} paid on this service")
+
+    service.amount_paid = running_paid
+    service.payment_status = derive_payment_status(running_paid, service.grand_total, service.payment_status)
+    if payment_method and amount > 0:
+        service.payment_method = payment_method
+
+    payment = ServicePayment(
+        service_id=service_id,
+        amount=amount,
+        payment_method=payment_method,
+        running_paid=running_paid,
+        reference_number=reference_number,
+        notes=notes,
+        recorded_by=recorded_by,
+    )
+    if paid_at:
+        payment.paid_at = paid_at
+    db.add(payment)
+    db.flush()
+    return payment
+
+def change_payment_status(
+    db: Session,
+    service: Service,
+    payment_status: str,
+    payment_method: Optional[str] = None,
+    recorded_by: Optional[str] = None
+) -> None:
+    """
+    Ledger side of setting a payment status by hand, so amount_paid and the
+    ledger stay the source of truth: Paid records the remaining balance as a
+    payment, Pending reverses everything paid so far, and Partial is only
+    accepted when the paid total already is partial. Free Service is taken
+    as given. The row is locked and re-read before the balance is taken.
+    Does not commit.
+
+    Raises:
+        PaymentError: Partial requested for a service that is unpaid or
+            fully paid
+    """
+    service = _lock_service(db, service.service_id)
+    if payment_status == "Free Service":
+        service.payment_status = payment_status
+    else:
+        if service.payment_status == "Free Service":
+            # Leaving Free Service: the status is derived from the ledger again
+            service.payment_status = "Pending"
+        grand_total = service.grand_total or Decimal("0")
+        amount_paid = service.amount_paid or Decimal("0")
+        if payment_status == "Paid" and grand_total > amount_paid:
+            record_payment(
+                db,
+                service.service_id,
+                grand_total - amount_paid,
+                payment_method=payment_method or service.payment_method,
+                notes="Settled on status change",
+                recorded_by=recorded_by
+            )
+        elif payment_status == "Pending" and amount_paid > 0:
+            record_payment(
+                db,
+                service.service_id,
+                -amount_paid,
+                notes="Reversed on status change",
+                recorded_by=recorded_by
+            )
+        elif payment_status == "Partial" and not 0 < amount_paid < grand_total:
+            raise PaymentError(
+                f"Cannot mark as Partial with {amount_paid} paid of {grand_total}; record the payment in the ledger instead"
+            )
+        # A zero total counts as Paid once marked so
+        service.payment_status = "Paid" if payment_status == "Paid" else derive_payment_status(
+            service.amount_paid or Decimal("0"), service.grand_total, service.payment_status
+        )
+
+    if payment_method:
+        service.payment_method = payment_method
+
+def get_service_ledger(db: Session, service_id: int) -> Optional[dict]:
+    """A service's ledger entries in order, with its total, paid amount and balance."""
+    service = db.query(Service).filter(Service.service_id == service_id).first()
+    if not service:
+        return None
+
+    entries = db.query(ServicePayment).filter(
+        ServicePayment.service_id == service_id
+    ).order_by(ServicePayment.payment_id).all()
+
+    grand_total = service.grand_total or Decimal("0")
+    amount_paid = service.amount_paid or Decimal("0")
+    return {
+        "service_id": service.service_id,
+        "grand_total": float(grand_total),
+        "amount_paid": float(amount_paid),
+        "balance": float(grand_total - amount_paid),
+        "payment_status": service.payment_status,
+        "entries": [
+            {
+                "payment_id": entry.payment_id,
+                "amount": float(entry.amount),
+                "payment_method": entry.payment_method,
+                "paid_at": entry.paid_at.isoformat() if entry.paid_at else None,
+                "running_paid": float(entry.running_paid),
+                "balance_after": float(grand_total - entry.running_paid),
+                "reference_number": entry.reference_number,
+                "notes": entry.notes,
+                "recorded_by": entry.recorded_by,
+            }
+            for entry in entries
+        ],
+    }
+
+def get_collections(db: Session, start_date: date, end_date: date) -> dict:
+    """
+    Money actually received between start_date and end_date (by paid_at, not
+    service date), per day and per payment method, from the ledger's paid_at
+    index.
+    """
+    paid_day = cast(ServicePayment.paid_at, Date)
+    rows = db.query(
+        paid_day.label("paid_date"),
+        ServicePayment.payment_method,
+        func.sum(ServicePayment.amount).label("amount"),
+        func.count(ServicePayment.payment_id).label("payment_count"),
+    ).filter(
+        ServicePayment.paid_at >= start_date,
+        ServicePayment.paid_at < end_date + timedelta(days=1)
+    ).group_by(paid_day, ServicePayment.payment_method).order_by(paid_day).all()
+
+    by_day = {}
+    by_method = {}
+    for row in rows:
+        by_day[str(row.paid_date)] = by_day.get(str(row.paid_date), 0.0) + float(row.amount)
+        method = by_method.setdefault(row.payment_method, {
+            "payment_method": row.payment_method,
+            "amount": 0.0,
+            "payment_count": 0,
+        })
+        method["amount"] += float(row.amount)
+        method["payment_count"] += row.payment_count
+
+    return {
+        "start_date": str(start_date),
+        "end_date": str(end_date),
+        "total_collected": sum(by_day.values()),
+        "by_day": [{"date": day, "amount": amount} for day, amount in by_day.items()],
+        "by_payment_method": sorted(by_method.values(), key=lambda method: -method["amount"]),
+    }
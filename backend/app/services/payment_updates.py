@@ -0,0 +1,262 @@
+import json
+from decimal import Decimal
+from typing import List, Optional
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import Session
+from app.models.service import Service, ServicePayment
+from app.services.customer_versions import bump_customer_versions
+from app.services.customer_summary import refresh_customer_summaries
+from app.services.service_rollup import apply_rollup_changes, MEASURES
+from app.services.report_cache import mark_report_dates_changed
+from app.services.payment_ledger import derive_payment_status, PAYMENT_METHODS
+
+PAYMENT_STATUSES = ["Pending", "Partial", "Paid", "Free Service"]
+MAX_BULK_UPDATES = 1000
+
+# Columns the rollup and read models need from each updated service
+_TRACKED_COLUMNS = [
+    "service_id", "vehicle_id", "service_date", "branch_id", "service_type_id",
+    "payment_status", "payment_method", *MEASURES.values(),
+]
+
+# One statement for the whole batch. json_populate_recordset(NULL::services)
+# types each field like the services column it fills, so payment_status is
+# assigned correctly whether the column is VARCHAR or the payment_status enum.
+# amount_paid comes from the ledger entries recorded below (settled on Paid,
+# reversed on Pending).
+_BULK_UPDATE = """
+    UPDATE services AS s
+    SET payment_status = u.payment_status,
+        payment_method = COALESCE(u.payment_method, s.payment_method),
+        amount_paid = u.amount_paid
+    FROM json_populate_recordset(NULL::services, CAST(:updates AS JSON)) AS u
+    WHERE s.service_id = u.service_id
+    RETURNING {returning}
+"""
+
+# Same pattern for ledger batches: the new paid total and status per service
+_BULK_PAYMENT = """
+    UPDATE services AS s
+    SET amount_paid = u.amount_paid,
+        payment_status = u.payment_status,
+        payment_method = COALESCE(u.payment_method, s.payment_method)
+    FROM json_populate_recordset(NULL::services, CAST(:updates AS JSON)) AS u
+    WHERE s.service_id = u.service_id
+    RETURNING {returning}
+"""
+
+def _tracked_values(row) -> dict:
+    values = dict(row._mapping)
+    values["payment_status"] = str(values["payment_status"]) if values["payment_status"] is not None else None
+    return values
+
+def _status_paid_total(before: dict, payment_status: str) -> Optional[Decimal]:
+    # Paid total implied by a manual status change (see
+    # payment_ledger.change_payment_status); None when Partial contradicts it
+    amount_paid = before["amount_paid"] or Decimal("0")
+    grand_total = before["grand_total"] or Decimal("0")
+    if payment_status == "Paid":
+        return max(amount_paid, grand_total)
+    if payment_status == "Pending":
+        return Decimal("0")
+    if payment_status == "Partial" and not 0 < amount_paid < grand_total:
+        return None
+    return amount_paid
+
+def bulk_update_payment_status(db: Session, updates: List[dict], recorded_by: Optional[str] = None) -> List[dict]:
+    """
+    Apply many payment status/method updates (dicts with service_id,
+    payment_status and optional payment_method) in one transaction.
+
+    All rows are validated in one pass and the current rows locked with a
+    single SELECT ... FOR UPDATE; the changed ones are written with one UPDATE.
+    Services moved to Paid get one settling ledger entry for their remaining
+    balance and services moved to Pending one reversing entry, inserted in
+    one statement; Partial is rejected unless the paid total is partial.
+    Because the UPDATE bypasses the ORM flush hooks, the daily rollup,
+    customer versions/summaries and report cache are updated here, once per
+    batch. Does not commit.
+
+    Returns:
+        One result per input row, in input order, with status "updated",
+        "unchanged", "not_found" or "invalid"
+    """
+    results = [{"service_id": update.get("service_id")} for update in updates]
+    pending = {}
+    for result, update in zip(results, updates):
+        if update.get("payment_status") not in PAYMENT_STATUSES:
+            result.update(status="invalid", error=f"Invalid payment status. Must be one of: {', '.join(PAYMENT_STATUSES)}")
+        elif update.get("payment_method") and update["payment_method"] not in PAYMENT_METHODS:
+            result.update(status="invalid", error=f"Invalid payment method. Must be one of: {', '.join(PAYMENT_METHODS)}")
+        elif update["service_id"] in pending:
+            result.update(status="invalid", error="Duplicate service_id in request")
+        else:
+            pending[update["service_id"]] = (result, update)
+
+    if not pending:
+        return results
+
+    current = _lock_tracked(db, pending)
+
+    changes = []
+    for service_id, (result, update) in pending.items():
+        before = current.get(service_id)
+        if before is None:
+            result.update(status="not_found", error="Service not found")
+            continue
+        payment_method = update.get("payment_method") or before["payment_method"]
+        if before["payment_status"] == update["payment_status"] and before["payment_method"] == payment_method:
+            result.update(status="unchanged", payment_status=before["payment_status"], payment_method=payment_method)
+            continue
+        amount_paid = _status_paid_total(before, update["payment_status"])
+        if amount_paid is None:
+            result.update(
+                status="invalid",
+                error=f"Cannot mark as Partial with {before['amount_paid'] or 0} paid of {before['grand_total'] or 0}; record the payment in the ledger instead"
+            )
+            continue
+        changes.append({
+            "service_id": service_id,
+            "payment_status": update["payment_status"],
+            "payment_method": update.get("payment_method") or None,
+            "amount_paid": amount_paid,
+        })
+
+    if not changes:
+        return results
+
+    returning = ", ".join(f"s.{column}" for column in _TRACKED_COLUMNS)
+    updated = [
+        _tracked_values(row)
+        for row in db.execute(
+            text(_BULK_UPDATE.format(returning=returning)),
+            {"updates": json.dumps(changes, default=str)}
+        )
+    ]
+
+    for after in updated:
+        result, _ = pending[after["service_id"]]
+        result.update(status="updated", payment_status=after["payment_status"], payment_method=after["payment_method"])
+
+    entries = []
+    for after in updated:
+        before = current[after["service_id"]]
+        change = (after["amount_paid"] or 0) - (before["amount_paid"] or 0)
+        if change:
+            entries.append({
+                "service_id": after["service_id"],
+                "amount": change,
+                "payment_method": after["payment_method"] if change > 0 else None,
+                "running_paid": after["amount_paid"],
+                "notes": "Settled on status change" if change > 0 else "Reversed on status change",
+                "recorded_by": recorded_by,
+            })
+    if entries:
+        db.execute(insert(ServicePayment), entries)
+
+    _refresh_read_models(db, [current[after["service_id"]] for after in updated], updated)
+    return results
+
+def _lock_tracked(db: Session, service_ids) -> dict:
+    columns = [getattr(Service, column) for column in _TRACKED_COLUMNS]
+    return {
+        row.service_id: _tracked_values(row)
+        for row in db.execute(
+            select(*columns).where(
+                Service.service_id.in_(service_ids)
+            ).order_by(Service.service_id).with_for_update()
+        )
+    }
+
+def _refresh_read_models(db: Session, before: List[dict], after: List[dict]) -> None:
+    # Read models, batched for the whole request
+    apply_rollup_changes(db, removed=before, added=after)
+    vehicle_ids = {values["vehicle_id"] for values in after}
+    bump_customer_versions(db, vehicle_ids=vehicle_ids)
+    refresh_customer_summaries(db, vehicle_ids=vehicle_ids)
+    mark_report_dates_changed(db, {values["service_date"] for values in after})
+
+def bulk_record_payments(
+    db: Session,
+    payments: List[dict],
+    recorded_by: Optional[str] = None,
+    reject_overpayment: bool = False
+) -> List[dict]:
+    """
+    Append many ledger entries (dicts with service_id, amount and optional
+    payment_method, paid_at, reference_number, notes) in one transaction; the
+    batch form of payment_ledger.record_payment.
+
+    The services are locked with one SELECT ... FOR UPDATE and running totals
+    computed in input order (several entries may hit one service); paid
+    totals and statuses are then written with one UPDATE and the entries with
+    one INSERT, and the read models refreshed once. With reject_overpayment,
+    payments beyond the locked balance are refused. Does not commit.
+
+    Returns:
+        One result per input entry, in input order, with status "recorded",
+        "not_found" or "invalid" (zero amount, unknown payment method, paid
+        total below zero, or overpayment when rejected)
+    """
+    results = [{"service_id": payment.get("service_id")} for payment in payments]
+    current = _lock_tracked(db, {payment["service_id"] for payment in payments})
+
+    state = {}
+    entries = []
+    for result, payment in zip(results, payments):
+        before = current.get(payment["service_id"])
+        if before is None:
+            result.update(status="not_found", error="Service not found")
+            continue
+        amount = Decimal(str(payment["amount"]))
+        service = state.setdefault(payment["service_id"], {
+            "service_id": payment["service_id"],
+            "amount_paid": before["amount_paid"] or Decimal("0"),
+            "payment_status": before["payment_status"],
+            "payment_method": None,
+        })
+        running_paid = service["amount_paid"] + amount
+        if amount == 0 or running_paid < 0:
+            result.update(status="invalid", error="Payment amount must not be zero" if amount == 0 else "Reversal exceeds the amount paid")
+            continue
+        if payment.get("payment_method") and payment["payment_method"] not in PAYMENT_METHODS:
+            result.update(status="invalid", error=f"Invalid payment method. Must be one of: {', '.join(PAYMENT_METHODS)}")
+            continue
+        if reject_overpayment and amount > 0 and running_paid > (before["grand_total"] or 0):
+            result.update(status="invalid", error=f"Amount exceeds the {(before['grand_total'] or 0) - service['amount_paid']} balance")
+            continue
+        service["amount_paid"] = running_paid
+        service["payment_status"] = derive_payment_status(running_paid, before["grand_total"], service["payment_status"])
+        if payment.get("payment_method") and amount > 0:
+            service["payment_method"] = payment["payment_method"]
+        entries.append({
+            "service_id": payment["service_id"],
+            "amount": amount,
+            "payment_method": payment.get("payment_method"),
+            "running_paid": running_paid,
+            "reference_number": payment.get("reference_number"),
+            "notes": payment.get("notes"),
+            "recorded_by": recorded_by,
+            **({"paid_at": payment["paid_at"]} if payment.get("paid_at") else {}),
+        })
+        result.update(status="recorded", amount_paid=float(running_paid), payment_status=service["payment_status"])
+
+    if not entries:
+        return results
+
+    returning = ", ".join(f"s.{column}" for column in _TRACKED_COLUMNS)
+    updated = [
+        _tracked_values(row)
+        for row in db.execute(
+            text(_BULK_PAYMENT.format(returning=returning)),
+            {"updates": json.dumps(list(state.values()), default=str)}
+        )
+    ]
+    # Entries with and without paid_at take different column sets
+    for has_paid_at in (False, True):
+        batch = [entry for entry in entries if ("paid_at" in entry) == has_paid_at]
+        if batch:
+            db.execute(insert(ServicePayment), batch)
+
+    _refresh_read_models(db, [current[after["service_id"]] for after in updated], updated)
+    return results
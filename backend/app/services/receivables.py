@@ -0,0 +1,194 @@
+from datetime import date
+from typing import Optional
+from sqlalchemy import Integer, cast, func, literal, select, tuple_
+from sqlalchemy.orm import Session
+from app.models.service import Service, ServiceType
+from app.models.vehicle import Vehicle
+from app.models.customer import Customer
+
+# Services still owed on; must match the predicate of idx_services_unpaid so
+# the planner can use that partial index
+UNPAID_STATUSES = ["Pending", "Partial"]
+
+# Bucket label -> (min age, max age) in days; None = open-ended
+AGING_BUCKETS = {
+    "0-30": (None, 30),
+    "31-60": (31, 60),
+    "61-90": (61, 90),
+    "90+": (91, None),
+}
+
+def _age(as_of: date):
+    return cast(literal(as_of) - Service.service_date, Integer)
+
+def _balance():
+    # Grand total less what the payments ledger has received
+    return func.coalesce(Service.grand_total, 0) - func.coalesce(Service.amount_paid, 0)
+
+def _in_bucket(age, bucket: str):
+    low, high = AGING_BUCKETS[bucket]
+    if low is None:
+        return age <= high
+    if high is None:
+        return age >= low
+    return age.between(low, high)
+
+def _bucket_matches(bucket: str, age_days: int) -> bool:
+    low, high = AGING_BUCKETS[bucket]
+    return (low is None or age_days >= low) and (high is None or age_days <= high)
+
+def _unpaid_filter(as_of: date, branch_id: Optional[int]) -> list:
+    # Services after as_of did not exist yet as of that date
+    criteria = [Service.payment_status.in_(UNPAID_STATUSES), Service.service_date <= as_of]
+    if branch_id is not None:
+        criteria.append(Service.branch_id == branch_id)
+    return criteria
+
+def receivables_aging(
+    db: Session,
+    as_of: date,
+    branch_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 50
+) -> dict:
+    """
+    Outstanding (Pending/Partial) balances, grand total less amount paid,
+    aged by service date as of as_of, per customer (largest balance first, paged) and overall.
+
+    One aggregate query over the unpaid services partial index: customers are
+    grouped in a subquery and the overall totals ride along as window sums,
+    which are evaluated over every group before the page is cut.
+    """
+    age = _age(as_of)
+    amount = _balance()
+    bucket_sums = [
+        func.coalesce(func.sum(amount).filter(_in_bucket(age, bucket)), 0).label(bucket)
+        for bucket in AGING_BUCKETS
+    ]
+    per_customer = select(
+        Vehicle.customer_id,
+        *bucket_sums,
+        func.sum(amount).label("total"),
+        func.count(Service.service_id).label("service_count"),
+        func.min(Service.service_date).label("oldest_service_date"),
+    ).select_from(Service).join(
+        Vehicle, Vehicle.vehicle_id == Service.vehicle_id
+    ).where(
+        *_unpaid_filter(as_of, branch_id)
+    ).group_by(Vehicle.customer_id).subquery()
+
+    rows = db.execute(
+        select(
+            per_customer,
+            Customer.first_name,
+            Customer.last_name,
+            Customer.email,
+            Customer.phone,
+            *[func.sum(per_customer.c[bucket]).over().label(f"all_{bucket}") for bucket in AGING_BUCKETS],
+            func.sum(per_customer.c.total).over().label("all_total"),
+            func.sum(per_customer.c.service_count).over().label("all_service_count"),
+            func.count().over().label("customer_count"),
+        ).outerjoin(
+            Customer, Customer.customer_id == per_customer.c.customer_id
+        ).order_by(
+            per_customer.c.total.desc(), per_customer.c.customer_id
+        ).offset(skip).limit(limit)
+    ).all()
+
+    if rows:
+        first = rows[0]
+        totals = {
+            "buckets": {bucket: float(first._mapping[f"all_{bucket}"]) for bucket in AGING_BUCKETS},
+            "total": float(first.all_total),
+            "service_count": int(first.all_service_count),
+            "customer_count": first.customer_count,
+        }
+    elif skip:
+        # Past the last page: totals come from the first page
+        totals = receivables_aging(db, as_of, branch_id, skip=0, limit=1)["totals"]
+    else:
+        totals = {
+            "buckets": dict.fromkeys(AGING_BUCKETS, 0.0),
+            "total": 0.0,
+            "service_count": 0,
+            "customer_count": 0,
+        }
+
+    return {
+        "as_of": str(as_of),
+        "totals": totals,
+        "customers": [
+            {
+                "customer_id": row.customer_id,
+                "customer_name": f"{row.first_name} {row.last_name}" if row.customer_id else "No customer",
+                "email": row.email,
+                "phone": row.phone,
+                "buckets": {bucket: float(row._mapping[bucket]) for bucket in AGING_BUCKETS},
+                "total": float(row.total),
+                "service_count": row.service_count,
+                "oldest_service_date": str(row.oldest_service_date),
+            }
+            for row in rows
+        ],
+        "skip": skip,
+        "limit": limit,
+    }
+
+def customer_receivables(
+    db: Session,
+    customer_id: int,
+    as_of: date,
+    bucket: Optional[str] = None,
+    branch_id: Optional[int] = None,
+    cursor: Optional[tuple] = None,
+    limit: int = 50
+) -> list:
+    """
+    Drill-down: a customer's outstanding services, oldest first, optionally
+    limited to one aging bucket. Keyset-paged on (service_date, service_id);
+    cursor is the last (service_date, service_id) of the previous page.
+    """
+    age = _age(as_of)
+    stmt = select(
+        Service.service_id,
+        Service.service_date,
+        Service.grand_total,
+        Service.amount_paid,
+        _balance().label("balance"),
+        Service.payment_status,
+        Service.reference_number,
+        Service.branch,
+        Vehicle.license_plate,
+        ServiceType.type_name,
+        age.label("age_days"),
+    ).select_from(Service).join(
+        Vehicle, Vehicle.vehicle_id == Service.vehicle_id
+    ).outerjoin(
+        ServiceType, ServiceType.service_type_id == Service.service_type_id
+    ).where(
+        Vehicle.customer_id == customer_id,
+        *_unpaid_filter(as_of, branch_id)
+    )
+    if bucket:
+        stmt = stmt.where(_in_bucket(age, bucket))
+    if cursor:
+        stmt = stmt.where(tuple_(Service.service_date, Service.service_id) > cursor)
+
+    rows = db.execute(stmt.order_by(Service.service_date, Service.service_id).limit(limit)).all()
+    return [
+        {
+            "service_id": row.service_id,
+            "service_date": str(row.service_date),
+            "age_days": row.age_days,
+            "bucket": next(name for name in AGING_BUCKETS if _bucket_matches(name, row.age_days)),
+            "grand_total": float(row.grand_total or 0),
+            "amount_paid": float(row.amount_paid or 0),
+            "balance": float(row.balance),
+            "payment_status": row.payment_status,
+            "reference_number": row.reference_number,
+            "branch": row.branch,
+            "license_plate": row.license_plate,
+            "service_type": row.type_name or "",
+        }
+        for row in rows
+    ]
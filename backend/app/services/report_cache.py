@@ -0,0 +1,213 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Iterable, Optional
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from app.database import SessionLocal
+from app.models.service import Service, ReportDateChange
+
+# In-process cache for report and summary payloads. The API runs as a single
+# uvicorn worker, so one process-wide cache serves every user.
+#
+# Each entry records the service_date range it was computed from. Service
+# writes committed in this process invalidate only the entries whose range
+# contains one of the dates they touched (up to MAX_ENTRIES, least recently
+# used first out). Every SessionLocal commit that touched services, in any
+# process (scripts/, the job worker), also appends its dates to
+# report_date_changes; the cache polls that table every CHANGE_POLL_INTERVAL
+# seconds and invalidates the same way, so closed past periods are kept until
+# a write lands on them. Ranges that include today still expire after
+# CURRENT_PERIOD_TTL, because endpoints like the dashboard mix in
+# appointments, stock and notifications that are not tracked here.
+MAX_ENTRIES = 2000
+CURRENT_PERIOD_TTL = 60
+CHANGE_POLL_INTERVAL = 5
+# report_date_changes rows older than this are deleted by the poller
+CHANGE_RETENTION = timedelta(days=1)
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # key -> (start_date, end_date, expires_at, value)
+_stats = {}
+# (sequence, dates) of recent invalidations; a result computed while one of
+# these landed on its range is returned but not stored
+_recent_invalidations = deque(maxlen=1000)
+_invalidation_seq = 0
+
+_poll_lock = threading.Lock()
+# Poller position: rows with txid >= xmin may belong to transactions that
+# were still open and are read again next time; seen holds the ones applied
+_poll_state = {"next_poll": 0.0, "next_prune": 0.0, "xmin": None, "seen": set()}
+
+def _cache_key(endpoint: str, params: dict) -> tuple:
+    normalized = []
+    for name, value in sorted(params.items()):
+        if isinstance(value, (list, tuple)):
+            value = tuple(value)
+        normalized.append((name, value))
+    return (endpoint, tuple(normalized))
+
+def _endpoint_stats(endpoint: str) -> dict:
+    return _stats.setdefault(endpoint, {"hits": 0, "misses": 0, "invalidated": 0})
+
+def cached_report(
+    endpoint: str,
+    params: dict,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    compute: Callable[[], dict]
+) -> dict:
+    """
+    Return the cached payload for endpoint + params, computing and storing it
+    on a miss. start_date/end_date bound the service dates the payload reads
+    (None = open-ended).
+    """
+    start_date = start_date or date.min
+    end_date = end_date or date.max
+    key = _cache_key(endpoint, params)
+    _poll_report_date_changes()
+    now = time.monotonic()
+
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[2] > now:
+            _entries.move_to_end(key)
+            _endpoint_stats(endpoint)["hits"] += 1
+            return entry[3]
+        _endpoint_stats(endpoint)["misses"] += 1
+        seq_before = _invalidation_seq
+
+    value = compute()
+
+    expires_at = now + CURRENT_PERIOD_TTL if end_date >= date.today() else float("inf")
+    with _lock:
+        stale = any(
+            seq > seq_before and any(start_date <= d <= end_date for d in dates)
+            for seq, dates in _recent_invalidations
+        )
+        if not stale:
+            _entries[key] = (start_date, end_date, expires_at, value)
+            _entries.move_to_end(key)
+            while len(_entries) > MAX_ENTRIES:
+                _entries.popitem(last=False)
+    return value
+
+def invalidate_report_dates(dates: Iterable[date]) -> int:
+    """Drop every cached entry whose date range contains one of the dates."""
+    global _invalidation_seq
+    dates = {d for d in dates if d is not None}
+    if not dates:
+        return 0
+
+    with _lock:
+        _invalidation_seq += 1
+        _recent_invalidations.append((_invalidation_seq, frozenset(dates)))
+        stale_keys = [
+            key for key, (start_date, end_date, _, _) in _entries.items()
+            if any(start_date <= d <= end_date for d in dates)
+        ]
+        for key in stale_keys:
+            del _entries[key]
+            _endpoint_stats(key[0])["invalidated"] += 1
+    return len(stale_keys)
+
+def _poll_report_date_changes() -> None:
+    # One thread polls at a time; the others carry on with what is cached
+    now = time.monotonic()
+    if now < _poll_state["next_poll"] or not _poll_lock.acquire(blocking=False):
+        return
+    try:
+        _poll_state["next_poll"] = now + CHANGE_POLL_INTERVAL
+        db = SessionLocal()
+        try:
+            # Every transaction below xmin has finished, so its rows are
+            # visible to the select that follows
+            xmin = db.execute(select(func.txid_snapshot_xmin(func.txid_current_snapshot()))).scalar()
+            if _poll_state["xmin"] is not None:
+                rows = db.execute(
+                    select(ReportDateChange.change_id, ReportDateChange.txid, ReportDateChange.service_date)
+                    .where(ReportDateChange.txid >= _poll_state["xmin"])
+                ).all()
+                new_rows = [row for row in rows if row.change_id not in _poll_state["seen"]]
+                invalidate_report_dates(row.service_date for row in new_rows)
+                _poll_state["seen"] = {row.change_id for row in rows if row.txid >= xmin}
+            else:
+                # First poll, or after a failed one: nothing cached so far
+                # is known to be current
+                clear_report_cache()
+            _poll_state["xmin"] = xmin
+
+            if now >= _poll_state["next_prune"]:
+                _poll_state["next_prune"] = now + 3600
+                db.execute(delete(ReportDateChange).where(
+                    ReportDateChange.changed_at < datetime.now(timezone.utc) - CHANGE_RETENTION
+                ))
+            db.commit()
+        finally:
+            db.close()
+    except Exception as e:
+        # Changes may have been missed: start over from an empty cache
+        print(f"⚠️  Report cache change poll failed: {e}")
+        _poll_state.update(xmin=None, seen=set())
+        clear_report_cache()
+    finally:
+        _poll_lock.release()
+
+def mark_report_dates_changed(db: Session, dates: Iterable[date]) -> None:
+    """
+    Record service dates written in this transaction; they are written to
+    report_date_changes on commit and their cache entries are invalidated
+    once it commits. Call this after raw SQL writes to services; ORM writes
+    are picked up by the after_flush hook below.
+    """
+    db.info.setdefault("report_dates", set()).update(d for d in dates if d is not None)
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_report_dates(session, flush_context):
+    dates = set()
+    for obj in session.new:
+        if isinstance(obj, Service):
+            dates.add(obj.service_date)
+    for obj in session.deleted:
+        if isinstance(obj, Service):
+            dates.add(obj.service_date)
+            dates.update(get_history(obj, "service_date").deleted or ())
+    for obj in session.dirty:
+        if isinstance(obj, Service) and session.is_modified(obj, include_collections=False):
+            dates.add(obj.service_date)
+            dates.update(get_history(obj, "service_date").deleted or ())
+    if dates:
+        mark_report_dates_changed(session, dates)
+
+@event.listens_for(SessionLocal, "before_commit")
+def _record_report_dates(session):
+    # Flush first so the last flush's dates are collected too
+    session.flush()
+    dates = session.info.get("report_dates")
+    if dates:
+        session.execute(insert(ReportDateChange), [{"service_date": d} for d in dates])
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_after_commit(session):
+    invalidate_report_dates(session.info.pop("report_dates", ()))
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("report_dates", None)
+
+def clear_report_cache() -> None:
+    with _lock:
+        _entries.clear()
+
+def get_report_cache_stats() -> dict:
+    """Per-endpoint hits, misses, invalidations and hit rate since process start."""
+    with _lock:
+        snapshot = {endpoint: dict(stats) for endpoint, stats in _stats.items()}
+        entry_count = len(_entries)
+
+    for stats in snapshot.values():
+        total = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / total if total else 0
+    return {"entries": entry_count, "max_entries": MAX_ENTRIES, "endpoints": snapshot}
@@ -0,0 +1,152 @@
+from datetime import date, timedelta
+from typing import Optional
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.service import DailyServiceRollup
+from app.services.branches import rollup_branch_filter
+
+MAX_RANGE_DAYS = 3660
+FORECAST_DAYS = 30
+# Trend for the forecast is fitted on at most this many trailing days
+FORECAST_FIT_DAYS = 365
+# 52 weeks back keeps year-over-year comparisons on the same weekday
+YEAR_LAG_DAYS = 364
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+def load_daily_series(db: Session, start_date: date, end_date: date, branch_id: Optional[int] = None):
+    """
+    Daily revenue and service counts for [start_date, end_date] as dense
+    arrays (one slot per calendar day, zero on days without services), read
+    from daily_service_rollup with one grouped query.
+    """
+    query = db.query(
+        DailyServiceRollup.service_date,
+        func.sum(DailyServiceRollup.revenue),
+        func.sum(DailyServiceRollup.service_count),
+    ).filter(
+        DailyServiceRollup.service_date >= start_date,
+        DailyServiceRollup.service_date <= end_date
+    )
+    if branch_id is not None:
+        query = query.filter(rollup_branch_filter(branch_id))
+    rows = query.group_by(DailyServiceRollup.service_date).all()
+
+    days = (end_date - start_date).days + 1
+    revenue = np.zeros(days)
+    counts = np.zeros(days)
+    if rows:
+        service_dates, day_revenue, day_counts = zip(*rows)
+        offsets = (np.array(service_dates, dtype="datetime64[D]") - np.datetime64(start_date, "D")).astype(int)
+        revenue[offsets] = np.array(day_revenue, dtype=float)
+        counts[offsets] = np.array(day_counts, dtype=float)
+    return revenue, counts
+
+def _moving_average(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing moving average; NaN until a full window is available."""
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    result = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        result[window - 1:] = (cumulative[window:] - cumulative[:-window]) / window
+    return result
+
+def _pct_change(current: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(previous > 0, (current - previous) / previous * 100, np.nan)
+
+def _lagged(values: np.ndarray, lag: int) -> np.ndarray:
+    result = np.full(values.shape, np.nan)
+    if lag < len(values):
+        result[lag:] = values[:-lag]
+    return result
+
+def _weekday_index(values: np.ndarray, weekdays: np.ndarray):
+    """
+    Mean value per weekday (0 = Monday) and its ratio to the overall daily
+    mean. The index is 1 everywhere when there is no revenue at all.
+    """
+    weekday_days = np.bincount(weekdays, minlength=7)
+    weekday_total = np.bincount(weekdays, weights=values, minlength=7)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weekday_mean = np.where(weekday_days > 0, weekday_total / weekday_days, 0.0)
+    overall_mean = values.mean() if len(values) else 0.0
+    index = weekday_mean / overall_mean if overall_mean > 0 else np.ones(7)
+    return index, weekday_mean
+
+def _to_list(values: np.ndarray, digits: int = 2) -> list:
+    rounded = np.round(values, digits)
+    return [None if np.isnan(v) else float(v) for v in rounded]
+
+def compute_revenue_trends(db: Session, start_date: date, end_date: date, branch_id: Optional[int] = None) -> dict:
+    """
+    Revenue time-series analytics over [start_date, end_date]: 7/28-day
+    moving averages, week-over-week and year-over-year change of the 7-day
+    revenue, weekday seasonality and a FORECAST_DAYS-day forecast (linear
+    trend on deseasonalized revenue times the weekday index).
+
+    History before start_date is loaded so the first days of the range have
+    full windows and a year-ago comparison; all math is vectorized.
+    """
+    history_start = start_date - timedelta(days=YEAR_LAG_DAYS + 27)
+    revenue, counts = load_daily_series(db, history_start, end_date, branch_id)
+    offset = (start_date - history_start).days
+
+    weekly = _moving_average(revenue, 7) * 7
+    moving_avg_7 = _moving_average(revenue, 7)
+    moving_avg_28 = _moving_average(revenue, 28)
+    wow_change = _pct_change(weekly, _lagged(weekly, 7))
+    yoy_change = _pct_change(weekly, _lagged(weekly, YEAR_LAG_DAYS))
+
+    # Weekday seasonality over the requested range
+    in_range = revenue[offset:]
+    weekdays = (np.arange(len(in_range)) + start_date.weekday()) % 7
+    seasonal_index, weekday_mean = _weekday_index(in_range, weekdays)
+
+    # Forecast: weekday index over the fit window, a line fitted to the
+    # deseasonalized revenue of open weekdays, then the index reapplied
+    fit_values = in_range[-FORECAST_FIT_DAYS:]
+    fit_weekdays = weekdays[-FORECAST_FIT_DAYS:]
+    fit_index = _weekday_index(fit_values, fit_weekdays)[0]
+    x = np.arange(len(fit_values))
+    open_days = fit_index[fit_weekdays] > 0
+    if open_days.sum() >= 2:
+        slope, intercept = np.polyfit(x[open_days], fit_values[open_days] / fit_index[fit_weekdays][open_days], 1)
+    else:
+        slope, intercept = 0.0, float(fit_values.mean()) if len(fit_values) else 0.0
+    future_x = np.arange(len(fit_values), len(fit_values) + FORECAST_DAYS)
+    future_weekdays = (np.arange(1, FORECAST_DAYS + 1) + end_date.weekday()) % 7
+    forecast = np.clip((intercept + slope * future_x) * fit_index[future_weekdays], 0, None)
+
+    dates = np.arange(
+        np.datetime64(start_date, "D"),
+        np.datetime64(end_date, "D") + 1
+    ).astype(str).tolist()
+    forecast_dates = np.arange(
+        np.datetime64(end_date, "D") + 1,
+        np.datetime64(end_date, "D") + 1 + FORECAST_DAYS
+    ).astype(str).tolist()
+
+    return {
+        "start_date": str(start_date),
+        "end_date": str(end_date),
+        "dates": dates,
+        "revenue": _to_list(in_range),
+        "service_count": [int(c) for c in counts[offset:]],
+        "moving_avg_7": _to_list(moving_avg_7[offset:]),
+        "moving_avg_28": _to_list(moving_avg_28[offset:]),
+        "wow_change_pct": _to_list(wow_change[offset:]),
+        "yoy_change_pct": _to_list(yoy_change[offset:]),
+        "weekday_seasonality": [
+            {
+                "weekday": WEEKDAYS[day],
+                "avg_revenue": round(float(weekday_mean[day]), 2),
+                "index": round(float(seasonal_index[day]), 3),
+            }
+            for day in range(7)
+        ],
+        "forecast": [
+            {"date": forecast_date, "revenue": round(float(value), 2)}
+            for forecast_date, value in zip(forecast_dates, forecast)
+        ],
+        "forecast_trend_per_day": round(float(slope), 2),
+    }
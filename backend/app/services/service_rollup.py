@@ -0,0 +1,151 @@
+from datetime import date
+from decimal import Decimal
+from typing import Iterable
+from sqlalchemy import event, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from app.database import SessionLocal
+from app.models.service import Service, DailyServiceRollup
+
+# Rollup measure -> Service column it sums
+MEASURES = {
+    "revenue": "grand_total",
+    "labor_hours": "total_labor_hours",
+    "labor_cost": "total_labor_cost",
+    "parts_cost": "total_parts_cost",
+    "tax_amount": "tax_amount",
+    "discount_amount": "discount_amount",
+    "amount_paid": "amount_paid",
+}
+
+KEY_COLUMNS = ("service_date", "branch_id", "service_type_id", "payment_status", "payment_method")
+
+def _key(values: dict) -> tuple:
+    return (
+        values["service_date"],
+        values.get("branch_id") or 0,
+        values["service_type_id"],
+        values.get("payment_status") or "Pending",
+        values.get("payment_method") or "",
+    )
+
+def apply_rollup_changes(
+    db: Session,
+    removed: Iterable[dict] = (),
+    added: Iterable[dict] = ()
+) -> None:
+    """
+    Move services between rollup rows. Each item is a mapping of Service
+    column name -> value as the row looked before (removed) or after (added)
+    the change. Net deltas per key are applied with one INSERT ... ON CONFLICT
+    DO UPDATE that adds to the stored totals, so concurrent writers to the
+    same day commute instead of overwriting each other.
+
+    Call this after raw SQL writes to services; ORM writes are picked up
+    automatically by the after_flush hook below.
+    """
+    deltas = {}
+    for sign, rows in ((-1, removed), (1, added)):
+        for values in rows:
+            delta = deltas.get(_key(values))
+            if delta is None:
+                delta = deltas[_key(values)] = {"service_count": 0, **dict.fromkeys(MEASURES, Decimal("0"))}
+            delta["service_count"] += sign
+            for measure, column in MEASURES.items():
+                delta[measure] += sign * Decimal(values.get(column) or 0)
+
+    rows = [
+        {**dict(zip(KEY_COLUMNS, key)), **delta}
+        for key, delta in sorted(deltas.items())
+        if delta["service_count"] or any(delta[measure] for measure in MEASURES)
+    ]
+    if not rows:
+        return
+
+    stmt = pg_insert(DailyServiceRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={
+            **{
+                column: getattr(DailyServiceRollup, column) + getattr(stmt.excluded, column)
+                for column in ["service_count", *MEASURES]
+            },
+            "updated_at": func.now(),
+        }
+    )
+    db.connection().execute(stmt)
+
+_TRACKED_COLUMNS = (*KEY_COLUMNS, *MEASURES.values())
+
+def _current_values(service: Service) -> dict:
+    return {column: getattr(service, column) for column in _TRACKED_COLUMNS}
+
+def _previous_values(service: Service) -> dict:
+    values = {}
+    for column in _TRACKED_COLUMNS:
+        history = get_history(service, column)
+        values[column] = history.deleted[0] if history.deleted else getattr(service, column)
+    return values
+
+@event.listens_for(SessionLocal, "after_flush")
+def _update_rollup_after_flush(session, flush_context):
+    removed = []
+    added = []
+    for obj in session.new:
+        if isinstance(obj, Service):
+            added.append(_current_values(obj))
+    for obj in session.deleted:
+        if isinstance(obj, Service):
+            removed.append(_previous_values(obj))
+    for obj in session.dirty:
+        if isinstance(obj, Service) and session.is_modified(obj, include_collections=False):
+            before = _previous_values(obj)
+            after = _current_values(obj)
+            if before != after:
+                removed.append(before)
+                added.append(after)
+    apply_rollup_changes(session, removed, added)
+
+_INSERT_ROLLUP = """
+    INSERT INTO daily_service_rollup (
+        service_date, branch_id, service_type_id, payment_status, payment_method, service_count,
+        revenue, labor_hours, labor_cost, parts_cost, tax_amount, discount_amount, amount_paid
+    )
+    SELECT
+        service_date,
+        COALESCE(branch_id, 0),
+        service_type_id,
+        COALESCE(CAST(payment_status AS TEXT), 'Pending'),
+        COALESCE(CAST(payment_method AS TEXT), ''),
+        COUNT(*),
+        COALESCE(SUM(grand_total), 0),
+        COALESCE(SUM(total_labor_hours), 0),
+        COALESCE(SUM(total_labor_cost), 0),
+        COALESCE(SUM(total_parts_cost), 0),
+        COALESCE(SUM(tax_amount), 0),
+        COALESCE(SUM(discount_amount), 0),
+        COALESCE(SUM(amount_paid), 0)
+    FROM services
+    WHERE service_date >= :start_date AND service_date < :end_date
+    GROUP BY 1, 2, 3, 4, 5
+"""
+
+def rebuild_daily_rollup(db: Session, start_date: date, end_date: date) -> int:
+    """
+    Recompute the rollup for service dates in [start_date, end_date) from the
+    services table. The rollup is locked against incremental writers for the
+    duration, so writes that land meanwhile apply their deltas on top of the
+    rebuilt rows. Does not commit.
+
+    Returns:
+        Number of rollup rows written
+    """
+    db.execute(text("LOCK TABLE daily_service_rollup IN SHARE ROW EXCLUSIVE MODE"))
+    params = {"start_date": start_date, "end_date": end_date}
+    db.execute(
+        text("DELETE FROM daily_service_rollup WHERE service_date >= :start_date AND service_date < :end_date"),
+        params
+    )
+    result = db.execute(text(_INSERT_ROLLUP), params)
+    return result.rowcount
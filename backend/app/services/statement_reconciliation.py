@@ -0,0 +1,304 @@
+import csv
+import re
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, List, Optional
+from sqlalchemy import cast, func, select, Date
+from sqlalchemy.orm import Session
+from app.models.service import Service, ServicePayment
+from app.services.receivables import UNPAID_STATUSES
+from app.services.payment_updates import bulk_record_payments, MAX_BULK_UPDATES, PAYMENT_METHODS
+
+# Bank / mobile-money statements are matched to open services in memory: the
+# statement is parsed row by row, the open services are loaded once into hash
+# indexes (by reference number and by balance), and every line is then
+# matched with dictionary lookups instead of a query per line.
+
+# Accepted header names per field (compared lower-cased, spaces as "_")
+STATEMENT_COLUMNS = {
+    "date": ["date", "transaction_date", "value_date", "posting_date"],
+    "amount": ["amount", "credit", "credit_amount", "paid_in"],
+    "reference": ["reference", "reference_number", "ref", "transaction_reference"],
+    "description": ["description", "narration", "details", "particulars"],
+}
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d", "%d.%m.%Y"]
+# Amount-only matches must be paid at most this long after the service date
+AMOUNT_MATCH_WINDOW = timedelta(days=60)
+MAX_STATEMENT_LINES = 50000
+
+_TOKEN = re.compile(r"[A-Z0-9]+")
+
+class StatementError(ValueError):
+    """Unreadable statement (missing columns, too many lines) or unknown payment method."""
+
+def _normalize_reference(value: Optional[str]) -> str:
+    return "".join(_TOKEN.findall((value or "").upper()))
+
+def _reference_keys(value: str) -> set:
+    # Whole reference, with and without leading zeros ("0006601" / "6601")
+    keys = {_normalize_reference(value)}
+    keys |= {key.lstrip("0") for key in keys}
+    return {key for key in keys if key}
+
+def _token_keys(text: str) -> set:
+    # Only digit-bearing tokens long enough not to hit unrelated references
+    keys = set()
+    for token in _TOKEN.findall(text.upper()):
+        if len(token) >= 4 and any(ch.isdigit() for ch in token):
+            keys |= _reference_keys(token)
+    return keys
+
+def _statement_reference_keys(reference: str) -> set:
+    # "0006601" on the service may appear as "6601" or "INV 0006601" on the bank side
+    return _reference_keys(reference) | _token_keys(reference)
+
+def _cents(amount: Decimal) -> int:
+    return int((amount * 100).to_integral_value())
+
+def _parse_date(value: str) -> date:
+    # Time of day, if any, is dropped
+    value = value.strip().split(" ")[0].split("T")[0]
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {value}")
+
+def _parse_amount(value: str) -> Decimal:
+    try:
+        return Decimal(value.replace(",", "").strip())
+    except InvalidOperation:
+        raise ValueError(f"Unrecognized amount: {value}")
+
+def _resolve_columns(header: List[str]) -> dict:
+    names = [name.strip().lower().replace(" ", "_") for name in header]
+    columns = {}
+    for field, aliases in STATEMENT_COLUMNS.items():
+        for alias in aliases:
+            if alias in names:
+                columns[field] = names.index(alias)
+                break
+    missing = [field for field in ("date", "amount") if field not in columns]
+    if missing:
+        raise StatementError(f"Statement is missing column(s): {', '.join(missing)}")
+    if "reference" not in columns and "description" not in columns:
+        raise StatementError("Statement needs a reference or description column")
+    return columns
+
+def _cell(row: List[str], columns: dict, field: str) -> str:
+    index = columns.get(field)
+    return row[index] if index is not None and index < len(row) else ""
+
+def parse_statement(lines: Iterable[str]) -> tuple:
+    """
+    Parse a CSV statement row by row into compact line dicts.
+
+    Returns:
+        (lines, errors): parsed credit lines, and one error per unreadable line;
+        debits (amount <= 0) are skipped
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if not header:
+        raise StatementError("Statement is empty")
+    columns = _resolve_columns(header)
+
+    parsed = []
+    errors = []
+    for line_number, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        if len(parsed) + len(errors) >= MAX_STATEMENT_LINES:
+            raise StatementError(f"Statement has more than {MAX_STATEMENT_LINES} lines")
+        try:
+            amount = _parse_amount(_cell(row, columns, "amount"))
+            if amount <= 0:
+                continue
+            parsed.append({
+                "line": line_number,
+                "date": _parse_date(_cell(row, columns, "date")),
+                "amount": amount,
+                "reference": _cell(row, columns, "reference").strip() or None,
+                "description": _cell(row, columns, "description").strip() or None,
+            })
+        except ValueError as e:
+            errors.append({"line": line_number, "status": "invalid", "reason": str(e)})
+    return parsed, errors
+
+class _OpenServiceIndex:
+    """Open services keyed by reference number and by balance in cents."""
+
+    def __init__(self, db: Session):
+        self.balances = {}
+        self.service_dates = {}
+        self.references = {}
+        self.by_reference = defaultdict(list)
+        self.by_balance = defaultdict(list)
+        rows = db.execute(
+            select(
+                Service.service_id,
+                Service.service_date,
+                Service.reference_number,
+                func.coalesce(Service.grand_total, 0) - func.coalesce(Service.amount_paid, 0),
+            ).where(
+                Service.payment_status.in_(UNPAID_STATUSES)
+            ).execution_options(yield_per=10000)
+        )
+        for service_id, service_date, reference_number, balance in rows:
+            self.balances[service_id] = balance
+            self.service_dates[service_id] = service_date
+            self.references[service_id] = reference_number
+            for key in _reference_keys(reference_number or ""):
+                self.by_reference[key].append(service_id)
+            self.by_balance[_cents(balance)].append(service_id)
+
+    def reference_candidates(self, line: dict) -> list:
+        keys = set()
+        if line["reference"]:
+            keys |= _statement_reference_keys(line["reference"])
+        if line["description"]:
+            keys |= _token_keys(line["description"])
+        found = []
+        for key in keys:
+            for service_id in self.by_reference.get(key, ()):
+                if service_id not in found:
+                    found.append(service_id)
+        return found
+
+    def amount_candidates(self, line: dict) -> list:
+        # Entries go stale once a match changes the balance; filter them out here
+        cents = _cents(line["amount"])
+        return [
+            service_id for service_id in self.by_balance.get(cents, ())
+            if _cents(self.balances[service_id]) == cents
+            and self.service_dates[service_id] <= line["date"] <= self.service_dates[service_id] + AMOUNT_MATCH_WINDOW
+        ]
+
+    def apply(self, service_id: int, amount: Decimal) -> None:
+        self.balances[service_id] -= amount
+
+def _imported_keys(db: Session, lines: List[dict]) -> set:
+    # Ledger entries from earlier imports of these statement days, so
+    # re-importing a statement does not pay twice
+    if not lines:
+        return set()
+    paid_day = cast(ServicePayment.paid_at, Date)
+    rows = db.execute(
+        select(paid_day, ServicePayment.amount, ServicePayment.reference_number).where(
+            ServicePayment.paid_at >= min(line["date"] for line in lines),
+            ServicePayment.paid_at < max(line["date"] for line in lines) + timedelta(days=1),
+            ServicePayment.reference_number.isnot(None)
+        )
+    )
+    return {(paid_on, _cents(amount), reference) for paid_on, amount, reference in rows}
+
+def _line_reference(line: dict) -> str:
+    return (line["reference"] or line["description"] or f"line {line['line']}")[:50]
+
+def _match_line(index: _OpenServiceIndex, line: dict) -> dict:
+    candidates = index.reference_candidates(line)
+    if candidates:
+        open_ones = [service_id for service_id in candidates if index.balances[service_id] > 0]
+        exact = [service_id for service_id in open_ones if index.balances[service_id] == line["amount"]]
+        if len(exact) == 1 or len(open_ones) == 1:
+            service_id = (exact or open_ones)[0]
+            if line["amount"] > index.balances[service_id]:
+                return {"status": "unmatched", "reason": f"Amount exceeds the {index.balances[service_id]} balance", "service_id": service_id}
+            return {"status": "matched", "match": "reference", "service_id": service_id}
+        if not open_ones:
+            return {"status": "unmatched", "reason": "Referenced service has no open balance"}
+        return {"status": "unmatched", "reason": "Reference matches several open services", "candidates": open_ones[:10]}
+
+    candidates = index.amount_candidates(line)
+    if len(candidates) == 1:
+        return {"status": "matched", "match": "amount_date", "service_id": candidates[0]}
+    if candidates:
+        return {"status": "unmatched", "reason": "Amount matches several open services", "candidates": candidates[:10]}
+    return {"status": "unmatched", "reason": "No matching open service"}
+
+def reconcile_statement(
+    db: Session,
+    lines: Iterable[str],
+    payment_method: Optional[str] = None,
+    apply: bool = True,
+    recorded_by: Optional[str] = None
+) -> dict:
+    """
+    Match a CSV bank / mobile-money statement against open (Pending/Partial)
+    services and record the matches as ledger payments.
+
+    Each credit line is matched by its reference (or a reference number in
+    the description) first, then by an exact open balance paid within
+    AMOUNT_MATCH_WINDOW of the service date when that is unambiguous. Lines
+    already imported (same day, amount and bank reference in the ledger) are
+    skipped. Matches are written with bulk_record_payments in batches of
+    MAX_BULK_UPDATES, which re-checks every match under the row lock (gone,
+    or overpaying a balance that changed meanwhile); lines it refuses are
+    reported as unmatched. With apply=False nothing is written. Does not
+    commit.
+
+    Raises:
+        StatementError: unreadable statement, or payment_method not one of
+            PAYMENT_METHODS
+    """
+    if payment_method and payment_method not in PAYMENT_METHODS:
+        raise StatementError(f"Invalid payment method. Must be one of: {', '.join(PAYMENT_METHODS)}")
+    parsed, errors = parse_statement(lines)
+    index = _OpenServiceIndex(db)
+    imported = _imported_keys(db, parsed)
+
+    results = []
+    payments = []
+    for line in parsed:
+        result = {
+            "line": line["line"],
+            "date": str(line["date"]),
+            "amount": float(line["amount"]),
+            "reference": line["reference"],
+        }
+        if (line["date"], _cents(line["amount"]), _line_reference(line)) in imported:
+            result.update(status="duplicate", reason="Already imported")
+        else:
+            result.update(_match_line(index, line))
+        if result["status"] == "matched":
+            index.apply(result["service_id"], line["amount"])
+            result["service_reference"] = index.references[result["service_id"]]
+            payments.append({
+                "service_id": result["service_id"],
+                "amount": line["amount"],
+                "payment_method": payment_method,
+                "paid_at": datetime.combine(line["date"], datetime.min.time()),
+                "reference_number": _line_reference(line),
+                "notes": f"Statement import ({result['match']} match)",
+            })
+        results.append(result)
+
+    if apply:
+        # The index was built without locks; the locked re-read in
+        # bulk_record_payments has the final say on each match
+        matched = [result for result in results if result["status"] == "matched"]
+        for start in range(0, len(payments), MAX_BULK_UPDATES):
+            recorded = bulk_record_payments(
+                db,
+                payments[start:start + MAX_BULK_UPDATES],
+                recorded_by=recorded_by,
+                reject_overpayment=True
+            )
+            for result, outcome in zip(matched[start:start + MAX_BULK_UPDATES], recorded):
+                if outcome["status"] != "recorded":
+                    result.pop("match")
+                    result.update(status="unmatched", reason=outcome["error"])
+
+    matched = [result for result in results if result["status"] == "matched"]
+    unmatched = [result for result in results if result["status"] != "matched"] + errors
+    return {
+        "applied": apply,
+        "line_count": len(parsed) + len(errors),
+        "matched_count": len(matched),
+        "matched_amount": float(sum(result["amount"] for result in matched)),
+        "unmatched_count": len(unmatched),
+        "matched": matched,
+        "unmatched": sorted(unmatched, key=lambda result: result["line"]),
+    }
@@ -0,0 +1,36 @@
+-- Migration: Background jobs for heavy reports and exports
+-- The API enqueues a row and returns its job_id; scripts/job_worker.py claims
+-- queued rows with FOR UPDATE SKIP LOCKED (so several workers never pick the
+-- same job), reports progress on the row and stores the result.
+
+CREATE TABLE IF NOT EXISTS background_jobs (
+    job_id SERIAL PRIMARY KEY,
+    job_type VARCHAR(50) NOT NULL,
+    params JSONB NOT NULL DEFAULT '{}',
+    status VARCHAR(20) NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+    progress INTEGER NOT NULL DEFAULT 0,
+    progress_message VARCHAR(255),
+    result JSONB,
+    result_path TEXT,
+    result_media_type VARCHAR(100),
+    result_filename VARCHAR(255),
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_id VARCHAR(100),
+    created_by VARCHAR(100),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    heartbeat_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Queue head: the worker's claim query scans only queued jobs, oldest first
+CREATE INDEX IF NOT EXISTS idx_background_jobs_queued
+    ON background_jobs(created_at, job_id) WHERE status = 'queued';
+
+-- Stale running jobs (worker died) and "my jobs" listings
+CREATE INDEX IF NOT EXISTS idx_background_jobs_running
+    ON background_jobs(heartbeat_at) WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS idx_background_jobs_created_by
+    ON background_jobs(created_by, created_at DESC);
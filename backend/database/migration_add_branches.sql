@@ -0,0 +1,47 @@
+-- Migration: Branch lookup table and services.branch_id
+-- Branch names are normalized (whitespace collapsed, upper case) into a
+-- branches table; services reference it by branch_id, which the application
+-- assigns from services.branch on every insert/update. services.branch keeps
+-- the canonical name for display.
+--
+-- Rebuild the daily rollup afterwards so its branch keys use the canonical
+-- names:
+--     python scripts/rebuild_daily_service_rollup.py
+
+CREATE TABLE IF NOT EXISTS branches (
+    branch_id SERIAL PRIMARY KEY,
+    branch_name VARCHAR(100) UNIQUE NOT NULL,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE services ADD COLUMN IF NOT EXISTS branch_id INTEGER REFERENCES branches(branch_id);
+
+-- Canonicalize existing names (blank -> NULL)
+UPDATE services
+SET branch = NULLIF(UPPER(REGEXP_REPLACE(TRIM(branch), '\s+', ' ', 'g')), '')
+WHERE branch IS DISTINCT FROM NULLIF(UPPER(REGEXP_REPLACE(TRIM(branch), '\s+', ' ', 'g')), '');
+
+INSERT INTO branches (branch_name)
+SELECT DISTINCT branch FROM services WHERE branch IS NOT NULL
+ON CONFLICT (branch_name) DO NOTHING;
+
+UPDATE services s
+SET branch_id = b.branch_id
+FROM branches b
+WHERE b.branch_name = s.branch
+  AND s.branch_id IS DISTINCT FROM b.branch_id;
+
+-- Per-branch date-range scans touch only that branch's rows
+CREATE INDEX IF NOT EXISTS idx_services_branch_date ON services(branch_id, service_date);
+
+-- The rollup is keyed by branch_id since migration_key_rollup_by_branch_id.sql
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'daily_service_rollup' AND column_name = 'branch'
+    ) THEN
+        CREATE INDEX IF NOT EXISTS idx_daily_service_rollup_branch_date ON daily_service_rollup(branch, service_date);
+    END IF;
+END $$;
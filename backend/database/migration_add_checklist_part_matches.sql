@@ -0,0 +1,35 @@
+-- Migration: Precomputed checklist item -> candidate parts mapping
+-- Replaces the per-request O(items x parts) substring scan in the
+-- add-service checklist screen with one indexed join.
+
+CREATE TABLE IF NOT EXISTS checklist_part_matches (
+    checklist_id INTEGER NOT NULL,
+    part_id INTEGER NOT NULL,
+    PRIMARY KEY (checklist_id, part_id),
+    FOREIGN KEY (checklist_id) REFERENCES service_checklists(checklist_id) ON DELETE CASCADE,
+    FOREIGN KEY (part_id) REFERENCES parts_inventory(part_id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_checklist_part_matches_part ON checklist_part_matches(part_id);
+
+-- Optional: trigram index so refreshing matches for a checklist item
+-- (part_name ILIKE '%item%') does not scan the whole catalog.
+-- Skipped if the pg_trgm extension cannot be installed.
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX IF NOT EXISTS idx_parts_name_trgm ON parts_inventory USING gin (part_name gin_trgm_ops);
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'pg_trgm not available, skipping trigram index: %', SQLERRM;
+END
+$$;
+
+-- Backfill
+DELETE FROM checklist_part_matches;
+INSERT INTO checklist_part_matches (checklist_id, part_id)
+SELECT c.checklist_id, p.part_id
+FROM service_checklists c
+JOIN parts_inventory p ON (
+    p.part_name ILIKE '%' || replace(replace(replace(c.item_name, '\', '\\'), '%', '\%'), '_', '\_') || '%'
+    OR CAST(p.category AS TEXT) ILIKE '%' || replace(replace(replace(c.item_name, '\', '\\'), '%', '\%'), '_', '\_') || '%'
+);
@@ -0,0 +1,11 @@
+-- Migration: Per-customer data versions for conditional GET on the customer portal
+-- The application bumps a customer's version whenever their vehicles, services,
+-- appointments or loyalty change; /api/customer/* endpoints use it as an ETag
+-- and answer 304 Not Modified without rebuilding the payload.
+
+CREATE TABLE IF NOT EXISTS customer_data_versions (
+    customer_id INTEGER PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (customer_id) REFERENCES customers(customer_id) ON DELETE CASCADE
+);
@@ -0,0 +1,29 @@
+-- Migration: Customer summary read model for the admin customer views
+-- One row per customer with vehicle/service counts, lifetime paid, outstanding
+-- balance, last service, next due date and loyalty progress. The application
+-- refreshes a customer's row in the same transaction as any write to their
+-- vehicles, services or loyalty, so the admin full-details view reads totals
+-- by primary key instead of aggregating the service history.
+--
+-- Backfill existing customers after applying:
+--     python scripts/rebuild_customer_summaries.py
+
+CREATE TABLE IF NOT EXISTS customer_summaries (
+    customer_id INTEGER PRIMARY KEY,
+    vehicle_count INTEGER NOT NULL DEFAULT 0,
+    service_count INTEGER NOT NULL DEFAULT 0,
+    lifetime_paid DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    outstanding_amount DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    last_service_date DATE,
+    next_service_due DATE,
+    loyalty_id INTEGER,
+    loyalty_consecutive_count INTEGER NOT NULL DEFAULT 0,
+    loyalty_total_services INTEGER NOT NULL DEFAULT 0,
+    loyalty_free_services_earned INTEGER NOT NULL DEFAULT 0,
+    loyalty_free_services_used INTEGER NOT NULL DEFAULT 0,
+    loyalty_services_required INTEGER,
+    free_service_available BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (customer_id) REFERENCES customers(customer_id) ON DELETE CASCADE
+);
+
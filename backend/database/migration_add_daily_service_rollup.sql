@@ -0,0 +1,28 @@
+-- Migration: Daily service rollup for reports, dashboard and accountant summaries
+-- One row per (service_date, branch, service_type_id, payment_status) with the
+-- count and summed money columns of the matching services. The application
+-- applies each service insert/update/delete as a delta in the same transaction,
+-- so summaries over long periods read rollup rows instead of raw services.
+-- Services without a branch are stored under branch = ''.
+--
+-- Backfill (or repair a date range) after applying:
+--     python scripts/rebuild_daily_service_rollup.py [--start-date YYYY-MM-DD] [--end-date YYYY-MM-DD]
+
+CREATE TABLE IF NOT EXISTS daily_service_rollup (
+    service_date DATE NOT NULL,
+    branch VARCHAR(100) NOT NULL DEFAULT '',
+    service_type_id INTEGER NOT NULL,
+    payment_status VARCHAR(20) NOT NULL,
+    service_count INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    labor_hours DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    labor_cost DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    parts_cost DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    tax_amount DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    discount_amount DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (service_date, branch, service_type_id, payment_status)
+);
+
+-- Status-first lookups (payment summaries over a date range)
+CREATE INDEX IF NOT EXISTS idx_daily_service_rollup_status_date ON daily_service_rollup(payment_status, service_date);
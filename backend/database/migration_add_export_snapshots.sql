@@ -0,0 +1,7 @@
+-- Migration: Transaction snapshot per export watermark
+-- Incremental Parquet exports record the txid_current_snapshot() they were cut
+-- at. The next export for the consumer skips rows already visible in it, so
+-- the rescan below the watermark (for transactions that committed late) no
+-- longer exports the same rows again.
+
+ALTER TABLE export_watermarks ADD COLUMN IF NOT EXISTS snapshot TEXT;
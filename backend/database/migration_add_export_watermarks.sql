@@ -0,0 +1,18 @@
+-- Migration: Watermarks for incremental bulk (Parquet) exports
+-- One row per (consumer, table): the highest created_at/updated_at or id
+-- exported so far. scripts/export_parquet.py and GET /api/admin/exports/*
+-- export only rows past the watermark and advance it after the file is written.
+
+CREATE TABLE IF NOT EXISTS export_watermarks (
+    consumer VARCHAR(50) NOT NULL,
+    table_name VARCHAR(50) NOT NULL,
+    watermark TEXT NOT NULL,
+    row_count INTEGER NOT NULL DEFAULT 0,
+    exported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (consumer, table_name)
+);
+
+-- Watermark scans on tables exported by timestamp
+CREATE INDEX IF NOT EXISTS idx_services_created_at ON services(created_at);
+CREATE INDEX IF NOT EXISTS idx_appointments_updated_at ON appointments(updated_at);
+CREATE INDEX IF NOT EXISTS idx_proformas_updated_at ON proformas(updated_at);
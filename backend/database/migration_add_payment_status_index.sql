@@ -0,0 +1,7 @@
+-- Migration: Index for the accountant payments list
+-- GET /api/accountant/payments filters by payment_status and pages newest
+-- first on (service_date, service_id); with this index each page is a short
+-- range scan that starts at the cursor, however deep the page.
+
+CREATE INDEX IF NOT EXISTS idx_services_payment_status_date
+    ON services(payment_status, service_date DESC, service_id DESC);
@@ -0,0 +1,7 @@
+-- Migration: Index for the service reminder job
+-- check_and_send_service_reminders skips vehicles that already got a
+-- Service Reminder in the last 7 days with a NOT EXISTS anti-join; this index
+-- answers that probe per vehicle with one short range scan.
+
+CREATE INDEX IF NOT EXISTS idx_notifications_vehicle_type_created
+    ON notifications(vehicle_id, notification_type, created_at);
@@ -0,0 +1,16 @@
+-- Migration: Shared log of changed service dates for the report cache
+-- Every application commit that writes services (API, scripts, job worker)
+-- appends the service dates it touched. The API's in-process report cache
+-- polls rows from transactions it has not seen yet (by txid) and drops the
+-- cached reports covering those dates, so closed periods can be cached
+-- without an expiry. Rows older than a day are pruned by the poller.
+
+CREATE TABLE IF NOT EXISTS report_date_changes (
+    change_id BIGSERIAL PRIMARY KEY,
+    service_date DATE NOT NULL,
+    txid BIGINT NOT NULL DEFAULT txid_current(),
+    changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_report_date_changes_txid ON report_date_changes(txid);
+CREATE INDEX IF NOT EXISTS idx_report_date_changes_changed_at ON report_date_changes(changed_at);
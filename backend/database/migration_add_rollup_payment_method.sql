@@ -0,0 +1,41 @@
+-- Migration: Payment method in the daily service rollup
+-- Adds payment_method ('' when unset) to the rollup key so accountant payment
+-- summaries can break totals down by method without reading raw services.
+-- Existing rows carry no method, so the rollup is rebuilt from services the
+-- first time this runs.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'daily_service_rollup' AND column_name = 'payment_method'
+    ) THEN
+        LOCK TABLE daily_service_rollup IN SHARE ROW EXCLUSIVE MODE;
+
+        ALTER TABLE daily_service_rollup ADD COLUMN payment_method VARCHAR(20) NOT NULL DEFAULT '';
+        ALTER TABLE daily_service_rollup DROP CONSTRAINT daily_service_rollup_pkey;
+        ALTER TABLE daily_service_rollup
+            ADD PRIMARY KEY (service_date, branch, service_type_id, payment_status, payment_method);
+
+        DELETE FROM daily_service_rollup;
+        INSERT INTO daily_service_rollup (
+            service_date, branch, service_type_id, payment_status, payment_method, service_count,
+            revenue, labor_hours, labor_cost, parts_cost, tax_amount, discount_amount
+        )
+        SELECT
+            service_date,
+            COALESCE(branch, ''),
+            service_type_id,
+            COALESCE(CAST(payment_status AS TEXT), 'Pending'),
+            COALESCE(CAST(payment_method AS TEXT), ''),
+            COUNT(*),
+            COALESCE(SUM(grand_total), 0),
+            COALESCE(SUM(total_labor_hours), 0),
+            COALESCE(SUM(total_labor_cost), 0),
+            COALESCE(SUM(total_parts_cost), 0),
+            COALESCE(SUM(tax_amount), 0),
+            COALESCE(SUM(discount_amount), 0)
+        FROM services
+        GROUP BY 1, 2, 3, 4, 5;
+    END IF;
+END $$;
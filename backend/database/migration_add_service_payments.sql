@@ -0,0 +1,72 @@
+-- Migration: Payments ledger with running paid totals
+-- service_payments records every payment (negative amounts reverse one);
+-- services.amount_paid is the running total the application moves with each
+-- entry, and each entry keeps the running total after it (running_paid).
+-- Balances are grand_total - amount_paid instead of guesses from
+-- payment_status, and the daily rollup carries amount_paid as a measure.
+--
+-- On first run, services already marked Paid get one opening ledger entry
+-- for their grand total. Refresh the customer read model afterwards:
+--     python scripts/rebuild_customer_summaries.py
+
+CREATE TABLE IF NOT EXISTS service_payments (
+    payment_id SERIAL PRIMARY KEY,
+    service_id INTEGER NOT NULL REFERENCES services(service_id) ON DELETE CASCADE,
+    amount DECIMAL(10, 2) NOT NULL CHECK (amount <> 0),
+    payment_method VARCHAR(20),
+    paid_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    running_paid DECIMAL(10, 2) NOT NULL,
+    reference_number VARCHAR(50),
+    notes TEXT,
+    recorded_by VARCHAR(100),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- A service's ledger in order, and collections by payment date
+CREATE INDEX IF NOT EXISTS idx_service_payments_service ON service_payments(service_id, payment_id);
+CREATE INDEX IF NOT EXISTS idx_service_payments_paid_at
+    ON service_payments(paid_at) INCLUDE (amount, payment_method);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'services' AND column_name = 'amount_paid'
+    ) THEN
+        ALTER TABLE services ADD COLUMN amount_paid DECIMAL(10, 2) DEFAULT 0.00;
+
+        UPDATE services SET amount_paid = grand_total
+        WHERE payment_status = 'Paid' AND grand_total > 0;
+
+        INSERT INTO service_payments (service_id, amount, payment_method, paid_at, running_paid, notes)
+        SELECT service_id, grand_total, CAST(payment_method AS TEXT), COALESCE(created_at, service_date), grand_total, 'Opening balance'
+        FROM services
+        WHERE payment_status = 'Paid' AND grand_total > 0;
+
+        ALTER TABLE daily_service_rollup ADD COLUMN IF NOT EXISTS amount_paid DECIMAL(14, 2) NOT NULL DEFAULT 0;
+
+        UPDATE daily_service_rollup r
+        SET amount_paid = s.amount_paid
+        FROM (
+            SELECT service_date, COALESCE(branch, '') AS branch, service_type_id,
+                   COALESCE(CAST(payment_status AS TEXT), 'Pending') AS payment_status,
+                   COALESCE(CAST(payment_method AS TEXT), '') AS payment_method,
+                   SUM(amount_paid) AS amount_paid
+            FROM services
+            WHERE amount_paid <> 0
+            GROUP BY 1, 2, 3, 4, 5
+        ) s
+        WHERE r.service_date = s.service_date
+          AND r.branch = s.branch
+          AND r.service_type_id = s.service_type_id
+          AND r.payment_status = s.payment_status
+          AND r.payment_method = s.payment_method;
+
+        -- Receivables read balances, so the unpaid index also carries amount_paid
+        DROP INDEX IF EXISTS idx_services_unpaid;
+        CREATE INDEX idx_services_unpaid
+            ON services(vehicle_id, service_date, service_id)
+            INCLUDE (grand_total, amount_paid, branch_id)
+            WHERE payment_status IN ('Pending', 'Partial');
+    END IF;
+END $$;
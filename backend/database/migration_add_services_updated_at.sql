@@ -0,0 +1,31 @@
+-- Migration: services.updated_at for incremental exports
+-- The Parquet export watermarks services on updated_at instead of created_at,
+-- so later payment status, amount paid and total changes are exported again.
+-- The ORM sets it on update; the trigger also covers raw SQL updates
+-- (bulk payment updates, ledger batches).
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'services' AND column_name = 'updated_at'
+    ) THEN
+        ALTER TABLE services ADD COLUMN updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+        -- Existing rows continue from their created_at watermark
+        UPDATE services SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP);
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_services_updated_at ON services(updated_at);
+
+CREATE OR REPLACE FUNCTION update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS update_services_updated_at ON services;
+CREATE TRIGGER update_services_updated_at BEFORE UPDATE ON services
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
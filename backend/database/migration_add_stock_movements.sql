@@ -0,0 +1,22 @@
+-- Migration: Stock movement ledger and removal of the per-row inventory trigger
+-- The application now decrements stock in one set-based UPDATE per service
+-- (locking rows in part_id order) and records every change here. The old
+-- trigger decremented stock a second time for each inserted service_parts row.
+
+CREATE TABLE IF NOT EXISTS stock_movements (
+    movement_id SERIAL PRIMARY KEY,
+    part_id INTEGER NOT NULL,
+    service_id INTEGER,
+    movement_type VARCHAR(20) NOT NULL,
+    quantity_change INTEGER NOT NULL,
+    quantity_after INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (part_id) REFERENCES parts_inventory(part_id),
+    FOREIGN KEY (service_id) REFERENCES services(service_id) ON DELETE SET NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_stock_movements_part ON stock_movements(part_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_stock_movements_service ON stock_movements(service_id);
+
+DROP TRIGGER IF EXISTS update_inventory_trigger ON service_parts;
+DROP FUNCTION IF EXISTS update_inventory_after_service();
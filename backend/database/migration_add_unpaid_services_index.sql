@@ -0,0 +1,10 @@
+-- Migration: Partial index on unpaid services for receivables aging
+-- Only Pending/Partial services are indexed, so the aging report and its
+-- per-customer drill-down read a small index however many paid services
+-- accumulate. grand_total and branch_id are included so the aging aggregate
+-- can be answered from the index alone.
+
+CREATE INDEX IF NOT EXISTS idx_services_unpaid
+    ON services(vehicle_id, service_date, service_id)
+    INCLUDE (grand_total, branch_id)
+    WHERE payment_status IN ('Pending', 'Partial');
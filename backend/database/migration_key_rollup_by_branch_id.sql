@@ -0,0 +1,48 @@
+-- Migration: Key the daily service rollup by branch_id
+-- The rollup was keyed by the branch name copied from services.branch, so a
+-- branch filter had to resolve the name first and a renamed branch split its
+-- history. Rows are now keyed by services.branch_id (0 when a service has no
+-- branch) and per-branch reads filter on the id directly. The rollup is
+-- rebuilt from services the first time this runs.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'daily_service_rollup' AND column_name = 'branch_id'
+    ) THEN
+        LOCK TABLE daily_service_rollup IN SHARE ROW EXCLUSIVE MODE;
+
+        ALTER TABLE daily_service_rollup DROP CONSTRAINT daily_service_rollup_pkey;
+        -- Also drops idx_daily_service_rollup_branch_date
+        ALTER TABLE daily_service_rollup DROP COLUMN branch;
+        ALTER TABLE daily_service_rollup ADD COLUMN branch_id INTEGER NOT NULL DEFAULT 0;
+        ALTER TABLE daily_service_rollup
+            ADD PRIMARY KEY (service_date, branch_id, service_type_id, payment_status, payment_method);
+
+        DELETE FROM daily_service_rollup;
+        INSERT INTO daily_service_rollup (
+            service_date, branch_id, service_type_id, payment_status, payment_method, service_count,
+            revenue, labor_hours, labor_cost, parts_cost, tax_amount, discount_amount, amount_paid
+        )
+        SELECT
+            service_date,
+            COALESCE(branch_id, 0),
+            service_type_id,
+            COALESCE(CAST(payment_status AS TEXT), 'Pending'),
+            COALESCE(CAST(payment_method AS TEXT), ''),
+            COUNT(*),
+            COALESCE(SUM(grand_total), 0),
+            COALESCE(SUM(total_labor_hours), 0),
+            COALESCE(SUM(total_labor_cost), 0),
+            COALESCE(SUM(total_parts_cost), 0),
+            COALESCE(SUM(tax_amount), 0),
+            COALESCE(SUM(discount_amount), 0),
+            COALESCE(SUM(amount_paid), 0)
+        FROM services
+        GROUP BY 1, 2, 3, 4, 5;
+    END IF;
+END $$;
+
+-- Per-branch date-range reads (rollup_branch_filter)
+CREATE INDEX IF NOT EXISTS idx_daily_service_rollup_branch_id_date ON daily_service_rollup(branch_id, service_date);
@@ -194,6 +194,22 @@ CREATE TABLE service_parts (
 
 CREATE INDEX idx_service_parts_service ON service_parts(service_id, was_replaced);
 
+-- STOCK_MOVEMENTS (append-only stock ledger)
+CREATE TABLE stock_movements (
+    movement_id SERIAL PRIMARY KEY,
+    part_id INTEGER NOT NULL,
+    service_id INTEGER,
+    movement_type VARCHAR(20) NOT NULL,
+    quantity_change INTEGER NOT NULL,
+    quantity_after INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (part_id) REFERENCES parts_inventory(part_id),
+    FOREIGN KEY (service_id) REFERENCES services(service_id) ON DELETE SET NULL
+);
+
+CREATE INDEX idx_stock_movements_part ON stock_movements(part_id, created_at);
+CREATE INDEX idx_stock_movements_service ON stock_movements(service_id);
+
 -- ============================================
 -- 4. LOYALTY PROGRAM ENTITIES
 -- ============================================
@@ -398,31 +414,9 @@ CREATE TRIGGER update_customer_loyalty_updated_at BEFORE UPDATE ON customer_loya
 CREATE TRIGGER update_parts_inventory_updated_at BEFORE UPDATE ON parts_inventory
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
--- Inventory update trigger
-CREATE OR REPLACE FUNCTION update_inventory_after_service()
-RETURNS TRIGGER AS $$
-BEGIN
-    IF NEW.was_replaced = TRUE THEN
-        UPDATE parts_inventory
-        SET stock_quantity = stock_quantity - NEW.quantity,
-            updated_at = CURRENT_TIMESTAMP
-        WHERE part_id = NEW.part_id;
-        
-        INSERT INTO audit_logs (table_name, record_id, action_type, old_values, new_values)
-        VALUES (
-            'parts_inventory',
-            NEW.part_id,
-            'STOCK_DECREASE',
-            jsonb_build_object('quantity_before', (SELECT stock_quantity + NEW.quantity FROM parts_inventory WHERE part_id = NEW.part_id)),
-            jsonb_build_object('quantity_after', (SELECT stock_quantity FROM parts_inventory WHERE part_id = NEW.part_id))
-        );
-    END IF;
-    RETURN NEW;
-END;
-$$ language 'plpgsql';
-
-CREATE TRIGGER update_inventory_trigger AFTER INSERT ON service_parts
-    FOR EACH ROW EXECUTE FUNCTION update_inventory_after_service();
+-- Stock is decremented by the application in one set-based UPDATE per
+-- service (app/services/inventory.py), which also writes stock_movements.
+-- There is intentionally no per-row trigger on service_parts.
 
 -- ============================================
 -- INITIAL DATA
@@ -74,6 +74,23 @@ def main():
         "database/migration_make_customer_optional.sql",
         "database/migration_fix_proforma_cascade.sql",
         "database/migration_add_org_customer_car.sql",
+        "database/migration_add_checklist_part_matches.sql",
+        "database/migration_add_stock_movements.sql",
+        "database/migration_add_customer_data_versions.sql",
+        "database/migration_add_customer_summaries.sql",
+        "database/migration_add_daily_service_rollup.sql",
+        "database/migration_add_export_watermarks.sql",
+        "database/migration_add_branches.sql",
+        "database/migration_add_background_jobs.sql",
+        "database/migration_add_rollup_payment_method.sql",
+        "database/migration_add_payment_status_index.sql",
+        "database/migration_add_unpaid_services_index.sql",
+        "database/migration_add_service_payments.sql",
+        "database/migration_add_reminder_notifications_index.sql",
+        "database/migration_add_services_updated_at.sql",
+        "database/migration_add_report_date_changes.sql",
+        "database/migration_key_rollup_by_branch_id.sql",
+        "database/migration_add_export_snapshots.sql",
     ]
     
     # Connect to database
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the customers-due report (GET /api/reports/customers-due).
+
+Seeds synthetic customers, vehicles and services inside a transaction, times
+the report query (first page and a full walk over all pages), prints the
+query plan, then rolls everything back. Safe to run against a development
+database; nothing is committed.
+
+Usage:
+    python scripts/benchmark_customers_due.py
+    python scripts/benchmark_customers_due.py --vehicles 50000 --services-per-vehicle 3
+"""
+
+import sys
+import os
+import argparse
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, text
+from app.database import SessionLocal
+from app.routes.reports import get_customers_due_for_service
+
+SEED_SQL = [
+    """
+    INSERT INTO service_types (type_name, time_interval_months)
+    VALUES ('Benchmark Service', 6)
+    """,
+    """
+    INSERT INTO customers (first_name, last_name, email, phone, is_active)
+    SELECT 'Bench', 'Customer ' || g, 'bench' || g || '@example.com', 'B' || g, g % 10 <> 0
+    FROM generate_series(1, :customers) AS g
+    """,
+    """
+    INSERT INTO vehicles (customer_id, license_plate, make, model, year, current_mileage, next_service_mileage)
+    SELECT c.customer_id, 'BENCH-' || g, 'Toyota', 'Corolla', 2015 + g % 10,
+           (g * 37) % 100000, (g * 37) % 100000 + (g * 13) % 5000
+    FROM generate_series(1, :vehicles) AS g
+    JOIN customers c ON c.email = 'bench' || (1 + g % :customers) || '@example.com'
+    """,
+    """
+    INSERT INTO services (vehicle_id, service_type_id, service_date, mileage_at_service, next_service_mileage, grand_total)
+    SELECT v.vehicle_id, st.service_type_id,
+           CURRENT_DATE - ((v.vehicle_id * 7 + n * 120) % 720),
+           v.current_mileage, v.next_service_mileage, 1000
+    FROM vehicles v
+    CROSS JOIN generate_series(1, :services_per_vehicle) AS n
+    CROSS JOIN (SELECT service_type_id FROM service_types WHERE type_name = 'Benchmark Service') st
+    WHERE v.license_plate LIKE 'BENCH-%'
+    """,
+]
+
+def main():
+    """Main function to benchmark the customers-due report"""
+    parser = argparse.ArgumentParser(description="Benchmark the customers-due report")
+    parser.add_argument("--vehicles", type=int, default=50000)
+    parser.add_argument("--services-per-vehicle", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    params = {
+        "customers": max(1, args.vehicles // 2),
+        "vehicles": args.vehicles,
+        "services_per_vehicle": args.services_per_vehicle,
+    }
+
+    db = SessionLocal()
+    try:
+        print(f"Seeding {args.vehicles} vehicles with {args.services_per_vehicle} services each...")
+        started = time.perf_counter()
+        for statement in SEED_SQL:
+            db.execute(text(statement), params)
+        db.execute(text("ANALYZE customers, vehicles, services, service_types"))
+        print(f"  seeded in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        first_page = get_customers_due_for_service(days=7, skip=0, limit=100, db=db)
+        print(f"First page (100 rows): {(time.perf_counter() - started) * 1000:.1f} ms, {len(first_page)} rows")
+
+        started = time.perf_counter()
+        total = 0
+        skip = 0
+        while True:
+            page = get_customers_due_for_service(days=7, skip=skip, limit=args.page_size, db=db)
+            total += len(page)
+            if len(page) < args.page_size:
+                break
+            skip += args.page_size
+        print(f"All pages ({args.page_size}/page): {(time.perf_counter() - started) * 1000:.1f} ms, {total} vehicles due")
+
+        # Plan of the report query as issued for the first page
+        statement_log = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statement_log.append((statement, parameters))
+
+        engine = db.get_bind()
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            get_customers_due_for_service(days=7, skip=0, limit=100, db=db)
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+
+        statement, parameters = statement_log[-1]
+        plan = db.connection().exec_driver_sql("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters).fetchall()
+        print()
+        print("Query plan:")
+        for row in plan:
+            print("  " + row[0])
+    finally:
+        db.rollback()
+        db.close()
+        print()
+        print("Rolled back benchmark data")
+
+if __name__ == "__main__":
+    main()
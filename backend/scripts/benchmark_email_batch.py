@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark for EmailService batch sends against a local SMTP stand-in.
+
+Starts a minimal SMTP server on localhost (EHLO, AUTH, MAIL/RCPT/DATA,
+RSET, QUIT; messages are discarded) that sleeps --connect-latency ms per
+new connection to stand in for the TCP + STARTTLS + login round trips of a
+real server. Then times N reminders sent one connection per email
+(send_email) against send_batch with pooled connections. Nothing leaves the
+machine and no database is used.
+
+Usage:
+    python scripts/benchmark_email_batch.py
+    python scripts/benchmark_email_batch.py --emails 2000 --connect-latency 150 --connections 4
+"""
+
+import sys
+import os
+import argparse
+import socketserver
+import threading
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.email_service import EmailService
+
+class _SMTPStandIn(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+    connect_latency = 0.0
+    connections = 0
+    messages = 0
+    lock = threading.Lock()
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        with self.lock:
+            _SMTPStandIn.connections += 1
+        time.sleep(self.connect_latency)
+        self.reply("220 localhost SMTP stand-in")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250-localhost")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif command.startswith("AUTH"):
+                self.reply("235 Authentication successful")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                with self.lock:
+                    _SMTPStandIn.messages += 1
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def _reminders(service: EmailService, count: int) -> list:
+    return [
+        service.service_reminder_message(
+            customer_name=f"Bench Customer {i}",
+            customer_email=f"bench{i}@example.com",
+            vehicle_make="Toyota",
+            vehicle_model="Corolla",
+            license_plate=f"BENCH-{i}",
+            current_mileage=9700,
+            next_service_mileage=10000,
+            mileage_remaining=300
+        )
+        for i in range(count)
+    ]
+
+def main():
+    """Main function to run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark EmailService batch sends")
+    parser.add_argument("--emails", type=int, default=500)
+    parser.add_argument("--connect-latency", type=float, default=100, help="Simulated handshake + login cost per connection, in ms (default: 100)")
+    parser.add_argument("--connections", type=int, default=2, help="Parallel connections for send_batch (default: 2)")
+    parser.add_argument("--max-per-connection", type=int, default=100)
+    args = parser.parse_args()
+
+    _SMTPStandIn.connect_latency = args.connect_latency / 1000
+    server = _Server(("127.0.0.1", 0), _SMTPStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    service = EmailService()
+    service.smtp_server, service.smtp_port = server.server_address
+    service.smtp_username = service.smtp_password = "bench"
+    service.from_email = "bench@example.com"
+    service.use_tls = False
+    service.enabled = True
+    messages = _reminders(service, args.emails)
+
+    # Per-email sends print a line each; keep the output to the summary
+    stdout = sys.stdout
+    results = {}
+    try:
+        for name, send in [
+            ("send_email per message", lambda: [service.send_email(**message) for message in messages]),
+            ("send_batch", lambda: service.send_batch(messages, args.connections, args.max_per_connection)),
+        ]:
+            _SMTPStandIn.connections = _SMTPStandIn.messages = 0
+            sys.stdout = open(os.devnull, "w")
+            started = time.perf_counter()
+            sent = sum(send())
+            elapsed = time.perf_counter() - started
+            sys.stdout.close()
+            sys.stdout = stdout
+            results[name] = elapsed
+            print(f"{name:<24} {sent}/{args.emails} sent in {elapsed:7.2f}s "
+                  f"({args.emails / elapsed:7.1f} emails/s, {_SMTPStandIn.connections} connections)")
+    finally:
+        sys.stdout = stdout
+        server.shutdown()
+
+    print(f"✅ send_batch is {results['send_email per message'] / results['send_batch']:.1f}x faster")
+
+if __name__ == "__main__":
+    main()
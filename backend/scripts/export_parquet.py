@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Script to bulk-export services, service parts, appointments and proformas to
+Parquet for BI. Rows are read through server-side cursors and written one row
+group at a time, so memory stays bounded; Decimal columns keep their exact
+precision.
+
+By default each run is incremental: only rows past the consumer's watermark
+(created_at/updated_at, or the id for tables without timestamps) are exported,
+and the watermark is advanced once each file is written.
+
+Usage:
+    python scripts/export_parquet.py --output-dir exports
+    python scripts/export_parquet.py --tables services service_parts --full
+    python scripts/export_parquet.py --consumer warehouse --row-group-size 100000
+"""
+
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.parquet_export import export_tables, EXPORT_TABLES, DEFAULT_ROW_GROUP_SIZE
+
+def main():
+    """Main function to export tables to Parquet"""
+    parser = argparse.ArgumentParser(description="Export tables to Parquet")
+    parser.add_argument("--output-dir", default="exports", help="Directory for the Parquet files (default: exports)")
+    parser.add_argument("--tables", nargs="+", choices=list(EXPORT_TABLES), help="Tables to export (default: all)")
+    parser.add_argument("--consumer", default="cli", help="Watermark owner name (default: cli)")
+    parser.add_argument("--full", action="store_true", help="Export everything and do not touch the watermark")
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        results = export_tables(
+            db,
+            args.output_dir,
+            tables=args.tables,
+            consumer=None if args.full else args.consumer,
+            row_group_size=args.row_group_size
+        )
+        for result in results:
+            if result["rows"]:
+                print(f"✅ {result['table']}: {result['rows']} rows -> {result['path']} (watermark {result['watermark_to']})")
+            else:
+                print(f"➖ {result['table']}: no new rows")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
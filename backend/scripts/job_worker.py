@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Background job worker. Claims queued report/export jobs from the
+background_jobs table (FOR UPDATE SKIP LOCKED, so any number of workers can
+run side by side), runs them outside the API's request timeout and stores
+the result for download via /api/jobs/{job_id}/result.
+
+Usage:
+    python scripts/job_worker.py
+    python scripts/job_worker.py --poll-interval 5
+    python scripts/job_worker.py --once   # drain the queue, then exit
+"""
+
+import sys
+import os
+import argparse
+import socket
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.jobs import claim_next_job, run_job, requeue_stale_jobs, purge_expired_jobs
+
+# Stale-job recovery and purging run at most this often (seconds)
+MAINTENANCE_INTERVAL = 60
+
+def main():
+    """Main function to run the job worker"""
+    parser = argparse.ArgumentParser(description="Run queued background jobs")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to wait when the queue is empty")
+    parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}:{os.getpid()}")
+    args = parser.parse_args()
+    
+    print(f"🚀 Job worker {args.worker_id} started")
+    next_maintenance = 0
+    db = SessionLocal()
+    try:
+        while True:
+            if time.monotonic() >= next_maintenance:
+                recovered = requeue_stale_jobs(db)
+                purged = purge_expired_jobs(db)
+                if recovered or purged:
+                    print(f"♻️  Recovered {recovered} stale job(s), purged {purged} expired job(s)")
+                next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+            
+            job_id = claim_next_job(db, args.worker_id)
+            if job_id is None:
+                if args.once:
+                    break
+                time.sleep(args.poll_interval)
+                continue
+            
+            started = time.perf_counter()
+            status = run_job(job_id, args.worker_id)
+            if status == "lost":
+                print(f"⚠️  Job {job_id} was requeued while running; result discarded")
+                continue
+            icon = "✅" if status == "succeeded" else "❌"
+            print(f"{icon} Job {job_id} {status} in {time.perf_counter() - started:.1f}s")
+    except KeyboardInterrupt:
+        print("Stopping worker")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the checklist item -> candidate parts mapping.
+Run after bulk-loading parts or checklist items outside the API
+(e.g. the seed_*.sql files) so the add-service screen sees them.
+
+Usage:
+    python scripts/rebuild_checklist_part_matches.py
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.checklist_matching import rebuild_checklist_part_matches
+
+def main():
+    """Main function to rebuild checklist part matches"""
+    db = SessionLocal()
+    try:
+        match_count = rebuild_checklist_part_matches(db)
+        db.commit()
+        print(f"✅ Rebuilt checklist part matches: {match_count} rows")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the customer summary read model (customer_summaries).
+Run once after applying migration_add_customer_summaries.sql to backfill
+existing customers, and after bulk changes made outside the API.
+
+Usage:
+    python scripts/rebuild_customer_summaries.py
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.customer_summary import rebuild_customer_summaries
+
+def main():
+    """Main function to rebuild customer summaries"""
+    db = SessionLocal()
+    try:
+        row_count = rebuild_customer_summaries(db)
+        print(f"✅ Rebuilt customer summaries: {row_count} rows")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
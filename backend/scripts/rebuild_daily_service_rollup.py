@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the daily service rollup (daily_service_rollup) from the
+services table. Run once after applying migration_add_daily_service_rollup.sql
+to backfill, or for a date range after bulk changes made outside the API.
+
+Usage:
+    python scripts/rebuild_daily_service_rollup.py
+    python scripts/rebuild_daily_service_rollup.py --start-date 2024-01-01 --end-date 2024-12-31
+"""
+
+import sys
+import os
+import argparse
+from datetime import date, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func
+from app.database import SessionLocal
+from app.models.service import Service
+from app.services.service_rollup import rebuild_daily_rollup
+
+def main():
+    """Main function to rebuild the daily service rollup"""
+    parser = argparse.ArgumentParser(description="Rebuild daily_service_rollup for a date range")
+    parser.add_argument("--start-date", type=date.fromisoformat, help="First service date (default: earliest service)")
+    parser.add_argument("--end-date", type=date.fromisoformat, help="Last service date, inclusive (default: latest service)")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        first_date, last_date = db.query(func.min(Service.service_date), func.max(Service.service_date)).one()
+        start_date = args.start_date or first_date
+        end_date = args.end_date or last_date
+        if start_date is None or end_date is None:
+            print("No services found, nothing to rebuild")
+            return
+        
+        row_count = rebuild_daily_rollup(db, start_date, end_date + timedelta(days=1))
+        db.commit()
+        print(f"✅ Rebuilt daily service rollup {start_date} to {end_date}: {row_count} rows")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Script to reconcile a CSV bank / mobile-money statement against open
+services. Each credit line is matched by reference number, or by exact
+balance and date, and the matches are recorded as ledger payments.
+The statement is read row by row and matched through in-memory hash
+indexes, so large statements reconcile in one pass.
+
+Usage:
+    python scripts/reconcile_statement.py statement.csv --dry-run
+    python scripts/reconcile_statement.py statement.csv --payment-method "Mobile Payment"
+"""
+
+import sys
+import os
+import argparse
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.statement_reconciliation import reconcile_statement
+from app.services.payment_updates import PAYMENT_METHODS
+
+def main():
+    """Main function to reconcile a statement"""
+    parser = argparse.ArgumentParser(description="Reconcile a CSV statement against open services")
+    parser.add_argument("statement", help="CSV file with date, amount and reference/description columns")
+    parser.add_argument("--payment-method", default="Bank Transfer", choices=PAYMENT_METHODS, help="Payment method for matched lines (default: Bank Transfer)")
+    parser.add_argument("--dry-run", action="store_true", help="Match only; record nothing")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        with open(args.statement, encoding="utf-8-sig", newline="") as statement:
+            result = reconcile_statement(
+                db,
+                statement,
+                payment_method=args.payment_method,
+                apply=not args.dry_run,
+                recorded_by="reconcile_statement.py"
+            )
+        if args.dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        elapsed = time.perf_counter() - started
+        
+        print(f"✅ Matched {result['matched_count']} of {result['line_count']} lines "
+              f"({result['matched_amount']:.2f}) in {elapsed:.2f}s"
+              f"{' (dry run, nothing recorded)' if args.dry_run else ''}")
+        for line in result["unmatched"]:
+            print(f"   line {line['line']}: {line['status']} - {line.get('reason', '')}")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import SessionLocal
+from app.services.checklist_matching import rebuild_checklist_part_matches
 from app.models.service import ServiceType, ServiceChecklist
 
 # Standard checklist items in order
@@ -84,6 +85,11 @@ def seed_checklist_items():
                 else:
                     print(f"  - Already exists: {item_name}")
         
+        # Refresh checklist -> parts matching for the seeded rows
+        db.flush()
+        match_count = rebuild_checklist_part_matches(db)
+        print(f"\n  ✓ Rebuilt checklist part matches: {match_count}")
+        
         db.commit()
         print("\n✅ Successfully seeded checklist items!")
         
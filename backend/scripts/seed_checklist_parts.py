@@ -10,6 +10,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import SessionLocal
+from app.services.checklist_matching import rebuild_checklist_part_matches
 from app.models.part import PartInventory
 from decimal import Decimal
 
@@ -211,6 +212,11 @@ def seed_checklist_parts():
                 db.rollback()
                 continue
         
+        # Refresh checklist -> parts matching for the seeded rows
+        db.flush()
+        match_count = rebuild_checklist_part_matches(db)
+        print(f"\n  ✓ Rebuilt checklist part matches: {match_count}")
+        
         db.commit()
         print(f"\n✅ Successfully seeded parts!")
         print(f"   Created: {created_count} parts")
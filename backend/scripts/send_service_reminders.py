@@ -13,6 +13,9 @@ Environment variables required:
     - SMTP_PASSWORD: SMTP password or app password
     - FROM_EMAIL: Email address to send from (default: SMTP_USERNAME)
     - EMAIL_ENABLED: Enable/disable email sending (default: true)
+    - SMTP_USE_TLS: Use STARTTLS (default: true)
+    - SMTP_BATCH_CONNECTIONS: Parallel SMTP connections for reminder batches (default: 2)
+    - SMTP_MAX_MESSAGES_PER_CONNECTION: Emails per connection before reconnecting (default: 100)
 """
 
 import sys
@@ -20,6 +20,12 @@ export default function AdminCustomerDetails() {
     queryFn: () => adminCustomersApi.getFullDetails(id),
   })
 
+  // Latest services; the header count comes from the customer summary
+  const { data: services } = useQuery({
+    queryKey: ['admin-customer', id, 'services'],
+    queryFn: () => adminCustomersApi.getServices(id, { limit: 100 }),
+  })
+
   const { data: serviceTypes } = useQuery({
     queryKey: ['service-types'],
     queryFn: () => serviceTypesApi.getAll(),
@@ -222,10 +228,10 @@ export default function AdminCustomerDetails() {
       <div className="bg-white rounded-lg shadow-md p-6">
         <h2 className="text-xl font-semibold mb-4 flex items-center space-x-2">
           <Wrench size={24} />
-          <span>Services ({customer?.data?.services?.length || 0})</span>
+          <span>Services ({customer?.data?.total_services || 0})</span>
         </h2>
         <div className="space-y-3">
-          {customer?.data?.services?.map((service) => (
+          {services?.data?.map((service) => (
             <div 
               key={service.service_id} 
               className="border border-gray-200 rounded-lg p-4 hover:bg-gray-50 cursor-pointer transition-colors"
@@ -267,7 +273,7 @@ export default function AdminCustomerDetails() {
               </div>
             </div>
           ))}
-          {(!customer?.data?.services || customer.data.services.length === 0) && (
+          {(!services?.data || services.data.length === 0) && (
             <div className="text-center py-8 text-gray-500">
               <Wrench className="mx-auto mb-2 text-gray-400" size={32} />
               <p>No services found</p>
@@ -4,18 +4,17 @@ import { Car, Wrench, DollarSign, Calendar, AlertTriangle, Plus } from 'lucide-r
 import { Link } from 'react-router-dom'
 
 export default function CustomerDashboard() {
-  const { data: summary, isLoading: summaryLoading } = useQuery({
-    queryKey: ['customer-summary'],
-    queryFn: () => customerApi.getSummary(),
+  // Summary, recent services, upcoming appointments and loyalty in one request
+  const { data: home, isLoading } = useQuery({
+    queryKey: ['customer-home'],
+    queryFn: () => customerApi.getHome({ recent_services: 5 }),
     refetchInterval: 30000, // Refetch every 30 seconds to catch admin-added vehicles
   })
 
-  const { data: services, isLoading: servicesLoading } = useQuery({
-    queryKey: ['customer-services'],
-    queryFn: () => customerApi.getServices(),
-  })
+  const summary = home?.data?.summary
+  const services = home?.data?.recent_services
 
-  if (summaryLoading || servicesLoading) {
+  if (isLoading) {
     return (
       <div className="flex justify-center items-center h-64">
         <div className="flex flex-col items-center gap-4">
@@ -26,7 +25,7 @@ export default function CustomerDashboard() {
     )
   }
 
-  const dueServices = summary?.data?.next_services?.filter(s => s.is_due) || []
+  const dueServices = summary?.next_services?.filter(s => s.is_due) || []
 
   return (
     <div className="space-y-6 animate-fade-in">
@@ -48,7 +47,7 @@ export default function CustomerDashboard() {
             <div className="flex-1 min-w-0">
               <p className="text-muted-foreground text-xs sm:text-sm font-medium">Total Payments</p>
               <p className="text-xl sm:text-2xl lg:text-3xl font-bold mt-2 text-foreground">
-                ETB {summary?.data?.total_payments?.toLocaleString() || '0'}
+                ETB {summary?.total_payments?.toLocaleString() || '0'}
               </p>
             </div>
             <div className="ml-4 p-3 rounded-lg bg-green-500/10 group-hover:bg-green-500/20 transition-colors">
@@ -62,7 +61,7 @@ export default function CustomerDashboard() {
             <div className="flex-1 min-w-0">
               <p className="text-muted-foreground text-xs sm:text-sm font-medium">Vehicles</p>
               <p className="text-xl sm:text-2xl lg:text-3xl font-bold mt-2 text-foreground">
-                {summary?.data?.vehicles_count || 0}
+                {summary?.vehicles_count || 0}
               </p>
             </div>
             <div className="ml-4 p-3 rounded-lg bg-blue-500/10 group-hover:bg-blue-500/20 transition-colors">
@@ -76,7 +75,7 @@ export default function CustomerDashboard() {
             <div className="flex-1 min-w-0">
               <p className="text-muted-foreground text-xs sm:text-sm font-medium">Total Services</p>
               <p className="text-xl sm:text-2xl lg:text-3xl font-bold mt-2 text-foreground">
-                {summary?.data?.total_services || 0}
+                {summary?.total_services || 0}
               </p>
             </div>
             <div className="ml-4 p-3 rounded-lg bg-purple-500/10 group-hover:bg-purple-500/20 transition-colors">
@@ -101,7 +100,7 @@ export default function CustomerDashboard() {
       </div>
 
       {/* No Vehicles Prompt */}
-      {summary?.data?.vehicles_count === 0 && (
+      {summary?.vehicles_count === 0 && (
         <div className="bg-gradient-to-r from-blue-50 to-indigo-50 border border-blue-200/50 rounded-xl p-6 sm:p-8 shadow-sm">
           <div className="flex flex-col sm:flex-row sm:items-center sm:justify-between gap-4">
             <div className="flex-1">
@@ -156,7 +155,7 @@ export default function CustomerDashboard() {
           </Link>
         </div>
         <div className="space-y-4">
-          {services?.data?.slice(0, 5).map((service) => (
+          {services?.slice(0, 5).map((service) => (
             <div key={service.service_id} className="border-b border-gray-200 pb-4 last:border-0">
               <div className="flex justify-between items-start">
                 <div>
@@ -189,7 +188,7 @@ export default function CustomerDashboard() {
               </div>
             </div>
           ))}
-          {(!services?.data || services.data.length === 0) && (
+          {(!services || services.length === 0) && (
             <p className="text-gray-500 text-center py-8">No services yet</p>
           )}
         </div>
@@ -35,7 +35,7 @@ export default function CustomerVehicles() {
     onSuccess: () => {
       setSuccessMessage('Vehicle added successfully!')
       queryClient.invalidateQueries(['customer-vehicles'])
-      queryClient.invalidateQueries(['customer-summary'])
+      queryClient.invalidateQueries(['customer-home'])
       setIsModalOpen(false)
       setFormData({
         license_plate: '',
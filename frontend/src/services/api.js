@@ -103,7 +103,12 @@ export const loyaltyApi = {
 
 // Dashboard
 export const dashboardApi = {
-  getStats: () => api.get('/dashboard'),
+  getStats: (params) => api.get('/dashboard', { params }),
+}
+
+// Branches
+export const branchesApi = {
+  getAll: () => api.get('/branches'),
 }
 
 // Reports
@@ -111,6 +116,17 @@ export const reportsApi = {
   getDaily: (date) => api.get('/reports/daily', { params: { report_date: date } }),
   getMonthly: (month, year) => api.get('/reports/monthly', { params: { month, year } }),
   getCustomersDue: (days) => api.get('/reports/customers-due', { params: { days } }),
+  getGrouped: (params) => api.get('/reports/grouped', { params }),
+  getTrends: (params) => api.get('/reports/trends', { params }),
+  queueGrouped: (params) => api.post('/reports/grouped/jobs', null, { params }),
+  queueTrends: (params) => api.post('/reports/trends/jobs', null, { params }),
+}
+
+// Background jobs
+export const jobsApi = {
+  getAll: () => api.get('/jobs'),
+  getStatus: (jobId) => api.get(`/jobs/${jobId}`),
+  getResult: (jobId, config) => api.get(`/jobs/${jobId}/result`, config),
 }
 
 // Authentication
@@ -132,11 +148,13 @@ export const customerApi = {
   getServices: () => api.get('/customer/services'),
   getSummary: () => api.get('/customer/summary'),
   getAppointments: () => api.get('/customer/appointments'),
+  getHome: (params) => api.get('/customer/home', { params }),
 }
 
 // Admin Customer Management
 export const adminCustomersApi = {
   getFullDetails: (customerId) => api.get(`/admin/customers/${customerId}/full-details`),
+  getServices: (customerId, params) => api.get(`/admin/customers/${customerId}/services`, { params }),
   addService: (customerId, serviceData) => api.post(`/admin/customers/${customerId}/add-service`, serviceData),
   getServiceChecklist: (customerId, serviceTypeId) => 
     api.get(`/admin/customers/${customerId}/service-checklist/${serviceTypeId}`),
@@ -149,7 +167,23 @@ export const accountantApi = {
   register: (data) => api.post('/auth/register-accountant', data),
   getPayments: (params) => api.get('/accountant/payments', { params }),
   updatePaymentStatus: (serviceId, data) => api.put(`/accountant/payments/${serviceId}`, data),
+  bulkUpdatePayments: (updates) => api.post('/accountant/payments/bulk', { updates }),
+  reconcileStatement: (file, params) => {
+    const formData = new FormData()
+    formData.append('file', file)
+    return api.post('/accountant/payments/reconcile', formData, {
+      params,
+      headers: { 'Content-Type': 'multipart/form-data' },
+    })
+  },
+  getLedger: (serviceId) => api.get(`/accountant/payments/${serviceId}/ledger`),
+  recordPayment: (serviceId, data) => api.post(`/accountant/payments/${serviceId}/ledger`, data),
+  getCollections: (params) => api.get('/accountant/collections', { params }),
+  getReceivablesAging: (params) => api.get('/accountant/receivables/aging', { params }),
+  getCustomerReceivables: (customerId, params) => api.get(`/accountant/receivables/aging/customers/${customerId}`, { params }),
   getPaymentSummary: (params) => api.get('/accountant/payments/summary', { params }),
+  exportPayments: (params) => api.get('/accountant/payments/export', { params, responseType: 'blob' }),
+  queuePaymentsExport: (params) => api.post('/accountant/payments/export/jobs', null, { params }),
   getPendingApprovals: () => api.get('/accountant/pending-approval'),
 }
 